@@ -0,0 +1,104 @@
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+
+
+# Set by ReplicaRoutingMiddleware for the duration of a replica-safe request
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def _pin_key(request):
+    """Identify the client: the auth token when present (the SPA sends no cookies), else the IP"""
+    ident = request.META.get('HTTP_AUTHORIZATION') or request.META.get('REMOTE_ADDR', '')
+    return 'db-pin:' + hashlib.sha256(ident.encode('utf-8')).hexdigest()
+
+
+def reading_from_replica():
+    """Whether the current request's reads go to a replica"""
+    return _read_from_replica.get()
+
+
+def pin_to_primary(request):
+    """Send this client's reads to the primary for a while so it can read its own writes"""
+    cache.set(_pin_key(request), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+class PrimaryReplicaRouter:
+    """Route reads to a replica only inside requests the middleware marked as replica-safe"""
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _read_from_replica.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """Serve allow-listed GET routes from replicas and pin clients to the primary after writes.
+
+    Supports both sync and async request handling, so an ASGI stack needs no thread hop for it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _is_replica_route(request):
+        if not settings.DATABASE_REPLICAS or request.method not in ('GET', 'HEAD'):
+            return False
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return False
+        return match.url_name in settings.DATABASE_REPLICA_READ_ROUTES
+
+    @staticmethod
+    def _should_pin(request, response):
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = None
+        if self._is_replica_route(request) and not cache.get(_pin_key(request)):
+            token = _read_from_replica.set(True)
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                _read_from_replica.reset(token)
+        if self._should_pin(request, response):
+            pin_to_primary(request)
+        return response
+
+    async def __acall__(self, request):
+        token = None
+        if self._is_replica_route(request) and not await cache.aget(_pin_key(request)):
+            token = _read_from_replica.set(True)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                _read_from_replica.reset(token)
+        if self._should_pin(request, response):
+            await cache.aset(_pin_key(request), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+        return response
@@ -0,0 +1,222 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.urls import Resolver404, resolve
+
+
+logger = logging.getLogger(__name__)
+
+# SQL log of the request being recorded, if any; copied into sync_to_async threads with the context
+_sql_log = ContextVar('profiling_sql_log', default=None)
+# One cProfile per thread at a time (a second enable() would silently replace the first)
+_profiling = threading.local()
+
+
+def record_sql(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection; a no-op unless a request is being recorded"""
+    log = _sql_log.get()
+    if log is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        log.append({'sql': sql, 'ms': round((time.perf_counter() - start) * 1000, 3), 'many': many})
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+# Ring buffer of records on disk: <id>.json (request, timings, SQL) and <id>.prof (pstats dump)
+
+def profile_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def list_records():
+    """Metadata of the stored records, newest first"""
+    records = []
+    for path in sorted(profile_dir().glob('*.json'), reverse=True):
+        try:
+            with open(path) as f:
+                records.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # pruned or half-written meanwhile
+    return records
+
+
+def load_record(record_id):
+    with open(profile_dir() / f'{record_id}.json') as f:
+        return json.load(f)
+
+
+def profile_path(record_id):
+    return profile_dir() / f'{record_id}.prof'
+
+
+def save_record(meta, profiler=None):
+    """Write one record atomically, then drop the oldest beyond PROFILING_MAX_RECORDS"""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    record_id = f'{time.time_ns()}-{os.getpid()}'
+    meta = {'id': record_id, 'has_profile': profiler is not None, **meta}
+    if profiler is not None:
+        profiler.dump_stats(directory / f'{record_id}.prof.tmp')
+        os.replace(directory / f'{record_id}.prof.tmp', profile_path(record_id))
+    with open(directory / f'{record_id}.json.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(directory / f'{record_id}.json.tmp', directory / f'{record_id}.json')
+
+    stale = sorted(directory.glob('*.json'), reverse=True)[settings.PROFILING_MAX_RECORDS:]
+    for path in stale:
+        for stale_path in (path, path.with_suffix('.prof')):
+            try:
+                stale_path.unlink()
+            except FileNotFoundError:
+                pass
+    return record_id
+
+
+class ProfilingMiddleware:
+    """Opt-in request profiling (PROFILING_ENABLED).
+
+    A request is run under cProfile when it carries `X-Profile: 1` from a staff user,
+    falls in the PROFILING_SAMPLE_RATE sample, or hits a route whose previous request
+    was slower than PROFILING_SLOW_MS. Profiled and slow requests are stored with
+    their SQL in the on-disk ring buffer read by `manage.py profiles`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        # Route name -> profiled requests still owed after a slow one; shared by request threads
+        self.armed = {}
+        self.armed_lock = threading.Lock()
+        connection_created.connect(_install_wrapper, dispatch_uid='profiling-sql')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _route(request):
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return None
+        return match.view_name
+
+    @staticmethod
+    def _staff_header(request):
+        """`X-Profile: 1` counts only for a staff user's token"""
+        if request.headers.get('X-Profile') != '1':
+            return False
+        header = request.META.get('HTTP_AUTHORIZATION', '').split()
+        if len(header) != 2 or header[0].lower() != 'token':
+            return False
+        from rest_framework.authtoken.models import Token
+
+        return Token.objects.filter(key=header[1], user__is_staff=True, user__is_active=True).exists()
+
+    def _reason(self, request, route, forced):
+        if forced:
+            return 'header'
+        with self.armed_lock:
+            if self.armed.get(route):
+                self.armed[route] -= 1
+                return 'slow-route'
+        if random.random() < settings.PROFILING_SAMPLE_RATE:
+            return 'sample'
+        return None
+
+    def _finish(self, request, route, reason, profiler, log, started, response):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        slow = settings.PROFILING_SLOW_MS and elapsed_ms >= settings.PROFILING_SLOW_MS
+        if slow and route and not reason:
+            with self.armed_lock:
+                self.armed[route] = settings.PROFILING_SLOW_FOLLOWUPS
+        if not (reason or slow):
+            return
+        try:
+            save_record({
+                'recorded_at': time.time(),
+                'method': request.method,
+                'path': request.get_full_path(),
+                'route': route,
+                'status': getattr(response, 'status_code', None),
+                'ms': round(elapsed_ms, 1),
+                'reason': reason or 'slow',
+                'query_count': len(log),
+                'sql_ms': round(sum(query['ms'] for query in log), 1),
+                'queries': log[:settings.PROFILING_MAX_QUERIES],
+            }, profiler)
+        except OSError:
+            logger.exception('Could not store the profile of %s %s', request.method, request.path)
+
+    def _start(self, reason):
+        if not reason or getattr(_profiling, 'active', False):
+            return None
+        _profiling.active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    @staticmethod
+    def _stop(profiler):
+        if profiler is not None:
+            profiler.disable()
+            _profiling.active = False
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        from django.db import connection
+
+        route = self._route(request)
+        reason = self._reason(request, route, self._staff_header(request))
+        _install_wrapper(None, connection)
+        log = []
+        token = _sql_log.set(log)
+        profiler = self._start(reason)
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            self._stop(profiler)
+            _sql_log.reset(token)
+            self._finish(request, route, reason, profiler, log, started, response)
+        return response
+
+    async def __acall__(self, request):
+        # Only the event-loop thread is profiled here; ORM calls and delegated sync views run
+        # in worker threads, so their cost shows up as time in the await, with their SQL logged.
+        route = self._route(request)
+        forced = request.headers.get('X-Profile') == '1' and await sync_to_async(self._staff_header)(request)
+        reason = self._reason(request, route, forced)
+        log = []
+        token = _sql_log.set(log)
+        profiler = self._start(reason)
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._stop(profiler)
+            _sql_log.reset(token)
+            await sync_to_async(self._finish)(request, route, reason, profiler, log, started, response)
+        return response
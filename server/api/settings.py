@@ -10,30 +10,18 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
-
-"""
-Django settings for api project.
-
-Generated by 'django-admin startproject' using Django 4.2.25.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/4.2/topics/settings/
-
-For the full list of settings and their values, see
-https://docs.djangoproject.com/en/4.2/ref/settings/
-"""
-
 from pathlib import Path
 import os
 from dotenv import load_dotenv
 import dj_database_url
 
+# Load .env files for local development, once: the repository root's first, then
+# server/.env for anything it leaves unset. Real environment variables always win.
 env_repo = Path(__file__).resolve().parents[2] / '.env'
 env_server = Path(__file__).resolve().parent.parent / '.env'
-if env_repo.exists():
-    load_dotenv(env_repo)
-elif env_server.exists():
-    load_dotenv(env_server)
+for env_file in (env_repo, env_server):
+    if env_file.exists():
+        load_dotenv(env_file)
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -80,12 +68,18 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'if-match',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
 
+# Let the SPA read the version it must send back in If-Match (see with_etag in job.views)
+CORS_EXPOSE_HEADERS = [
+    'etag',
+]
+
 # CSRF settings to match CORS
 CSRF_TRUSTED_ORIGINS = [
     'http://localhost:5173'
@@ -110,6 +104,8 @@ AUTH_USER_MODEL = 'job.User'
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'api.profiling.ProfilingMiddleware',
+    'api.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -148,15 +144,156 @@ DEFAULT_SQLITE = {
     'NAME': BASE_DIR / 'db.sqlite3',
 }
 
+# Persistent connections are reused across requests for this many seconds and
+# health-checked before reuse, so a dropped connection is replaced transparently
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '600'))
+
 # Use DATABASE_URL from environment if provided, otherwise fall back to SQLite
 database_url = os.environ.get('DATABASE_URL')
 if database_url:
     DATABASES = {
-        'default': dj_database_url.parse(database_url, conn_max_age=600)
+        'default': dj_database_url.parse(database_url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
     }
 else:
     DATABASES = {'default': DEFAULT_SQLITE}
 
+# Read replicas: comma-separated URLs, e.g.
+# DATABASE_REPLICA_URLS=postgres://.../replica1,postgres://.../replica2
+# (or two local files: sqlite:////tmp/replica.sqlite3). Tests mirror them onto default.
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        replica_url.strip(),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
+        test_options={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.db_router.PrimaryReplicaRouter']
+
+# GET routes (URL names) whose reads may be served from a replica
+DATABASE_REPLICA_READ_ROUTES = {
+    'job-list', 'job-detail', 'job-recent', 'job-by-employer',
+    'profile-seekers', 'profile-employers', 'user-seekers', 'user-employers',
+}
+
+# After a write, the client's reads stay on the primary for this long (read-your-writes)
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('DATABASE_REPLICA_PIN_SECONDS', '15'))
+
+# Shared cache (used e.g. for replica pinning across workers); in-memory per process otherwise
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            # The default 300 entries thrash once the messaging caches see a few hundred users
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('LOCAL_CACHE_MAX_ENTRIES', '50000'))},
+        }
+    }
+
+
+# Notification digests: unsent notifications are batched per recipient and sent by
+# `manage.py send_notification_digests` once the oldest has waited this long
+NOTIFICATION_DIGEST_WINDOW_MINUTES = int(os.environ.get('NOTIFICATION_DIGEST_WINDOW_MINUTES', '15'))
+# job.notifications.ConsoleSender, FileSender or EmailSender, or any class with send(recipient, subject, body)
+NOTIFICATION_SENDER = os.environ.get('NOTIFICATION_SENDER', 'job.notifications.ConsoleSender')
+NOTIFICATION_FILE_PATH = os.environ.get('NOTIFICATION_FILE_PATH', str(BASE_DIR / 'notifications.jsonl'))
+
+# Job lifecycle: new postings expire after this many days unless given expires_at;
+# `manage.py archive_jobs` (nightly) expires them and moves postings closed/expired for
+# longer than JOB_ARCHIVE_AFTER_DAYS, with their applications, into archive tables
+JOB_DEFAULT_LIFETIME_DAYS = int(os.environ.get('JOB_DEFAULT_LIFETIME_DAYS', '60'))
+JOB_ARCHIVE_AFTER_DAYS = int(os.environ.get('JOB_ARCHIVE_AFTER_DAYS', '90'))
+
+# What posting a near-duplicate of one of the employer's own open jobs does (see job.dedup):
+# 'flag' saves it with duplicate_of set (hidden by ?collapse_duplicates=1), 'reject' answers 409
+JOB_DUPLICATE_POLICY = os.environ.get('JOB_DUPLICATE_POLICY', 'flag')
+
+# Token-bucket throttles for expensive public endpoints (see job.throttling); a rate of
+# 'N/min' allows bursts of N and refills N per minute. THROTTLE_BACKEND=cache shares the
+# buckets between workers through CACHES (Redis when REDIS_URL is set). Anonymous clients
+# are keyed by the address NUM_PROXIES proxies back in X-Forwarded-For (Render's load
+# balancer appends one), so addresses the client puts in the header are ignored.
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_RATES': {
+        'job_search': os.environ.get('THROTTLE_RATE_JOB_SEARCH', '60/min'),
+        'directory': os.environ.get('THROTTLE_RATE_DIRECTORY', '30/min'),
+    },
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '1')),
+}
+THROTTLE_BACKEND = os.environ.get('THROTTLE_BACKEND', 'memory')
+
+# The unpaginated seekers/employers actions under /api/users/ and /api/profile/ are
+# deprecated for the cursor-paginated /api/directory/; they return only the newest this many
+LEGACY_DIRECTORY_MAX_ROWS = int(os.environ.get('LEGACY_DIRECTORY_MAX_ROWS', '100'))
+
+# Read messages older than this are moved into compressed MessageArchive chunks by
+# `manage.py archive_messages`; the conversation endpoint pages into them on demand
+MESSAGE_RETENTION_DAYS = int(os.environ.get('MESSAGE_RETENTION_DAYS', '180'))
+MESSAGE_ARCHIVE_CHUNK_SIZE = int(os.environ.get('MESSAGE_ARCHIVE_CHUNK_SIZE', '500'))
+
+# Seconds the send path caches a participant's role and a conversation's id/pair
+# (job.messaging); role and is_active changes evict the participant entry at once
+MESSAGING_CACHE_SECONDS = int(os.environ.get('MESSAGING_CACHE_SECONDS', '300'))
+
+# Facet counts for filter-only job searches are cached this long (job.facets); any job
+# write invalidates them, so the TTL only bounds staleness from jobs passing expires_at
+FACET_CACHE_SECONDS = int(os.environ.get('FACET_CACHE_SECONDS', '300'))
+
+# Each worker keeps the autocomplete and recommender indexes in memory; after another
+# worker's write they are rebuilt at most this many seconds later (job.generations;
+# needs REDIS_URL to be shared)
+INDEX_REFRESH_SECONDS = int(os.environ.get('INDEX_REFRESH_SECONDS', '10'))
+
+# POST /api/users/import/ hashes passwords inside the request, so it takes at most this many
+# records (about what fits in the request timeout); run `manage.py import_users` for more
+USER_IMPORT_MAX_ROWS = int(os.environ.get('USER_IMPORT_MAX_ROWS', '50'))
+
+# Resume ingestion (job.resumes): `manage.py ingest_resumes` fetches the file behind each
+# new or changed User.resume with RESUME_FETCHER (job.resumes.HttpFetcher, or MediaFetcher
+# for files in media storage), extracts at most RESUME_MAX_CHARS of text on
+# RESUME_INGEST_WORKERS threads and indexes it for ?resume= searches. PDFs are read with
+# pypdf when it is installed, else with a built-in reader for simply-encoded files.
+RESUME_FETCHER = os.environ.get('RESUME_FETCHER', 'job.resumes.HttpFetcher')
+RESUME_FETCH_TIMEOUT = int(os.environ.get('RESUME_FETCH_TIMEOUT', '10'))
+RESUME_MAX_BYTES = int(os.environ.get('RESUME_MAX_BYTES', str(5 * 1024 * 1024)))
+RESUME_MAX_CHARS = int(os.environ.get('RESUME_MAX_CHARS', '100000'))
+RESUME_INGEST_WORKERS = int(os.environ.get('RESUME_INGEST_WORKERS', '4'))
+
+# Opt-in request profiling (api.profiling). Requests are run under cProfile when sampled
+# (PROFILING_SAMPLE_RATE, 0-1), when a staff token sends `X-Profile: 1`, or for the next
+# PROFILING_SLOW_FOLLOWUPS requests to a route after one took over PROFILING_SLOW_MS (slow
+# requests themselves are stored with their SQL log). The newest PROFILING_MAX_RECORDS
+# records are kept in PROFILING_DIR; inspect them with `manage.py profiles`.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() in ('1', 'true', 'yes')
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_SLOW_MS = int(os.environ.get('PROFILING_SLOW_MS', '0'))
+PROFILING_SLOW_FOLLOWUPS = int(os.environ.get('PROFILING_SLOW_FOLLOWUPS', '1'))
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_MAX_RECORDS = int(os.environ.get('PROFILING_MAX_RECORDS', '200'))
+PROFILING_MAX_QUERIES = int(os.environ.get('PROFILING_MAX_QUERIES', '2000'))
+
+# Worker warmup (job.warmup). With WARMUP_ON_START, api.wsgi and api.asgi run the
+# comma-separated WARMUP_STEPS (connect to the databases, import the views and the file
+# storage backend, build the in-process autocomplete and recommender indexes) before the
+# worker serves a request; without it each is done by the first request that needs it.
+# Under ASGI the database step is skipped: connections are per thread and the warmup
+# thread serves no requests.
+# `manage.py startup_profile` shows import and warmup times.
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'False').lower() in ('1', 'true', 'yes')
+WARMUP_STEPS = [
+    step.strip() for step in os.environ.get('WARMUP_STEPS', 'database,urls,storage,autocomplete,recommender').split(',')
+    if step.strip()
+]
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -207,11 +344,6 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
-# --- Load .env file for local development ---
-import os
-from dotenv import load_dotenv
-load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
-
 # Public site URL used for building absolute links when request is not available
 # Set via environment in production, e.g. SITE_URL=https://your-app.onrender.com
 SITE_URL = os.environ.get('SITE_URL')
@@ -219,12 +351,13 @@ SITE_URL = os.environ.get('SITE_URL')
 # Cloudinary configuration (optional). Use environment variables on production.
 # If CLOUDINARY_URL or CLOUDINARY_API_KEY/CLOUDINARY_API_SECRET are present,
 # enable Cloudinary storage for media files.
+# The storage class is only imported on the first file access, so the cloudinary
+# SDK stays out of worker boot. Set CLOUDINARY_APPS=1 to install the apps as well,
+# e.g. for cloudinary_storage's deleteorphanedmedia management command.
 if os.environ.get('CLOUDINARY_URL') or os.environ.get('CLOUDINARY_API_KEY'):
-    # add cloudinary apps if not already present
-    if 'cloudinary' not in INSTALLED_APPS:
+    if os.environ.get('CLOUDINARY_APPS', '').lower() in ('1', 'true', 'yes'):
         INSTALLED_APPS += ['cloudinary', 'cloudinary_storage']
 
-
     CLOUDINARY_STORAGE = {
         'CLOUD_NAME': os.environ.get('CLOUD_NAME'),
         'API_KEY': os.environ.get('CLOUDINARY_API_KEY'),
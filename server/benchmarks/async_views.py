@@ -0,0 +1,153 @@
+"""Throughput of the read endpoints under uvicorn (ASGI) vs. gunicorn (WSGI).
+
+Seeds a throwaway SQLite database, starts each server with one worker, drives
+it with a fixed number of concurrent aiohttp clients and prints a Markdown table.
+
+    python benchmarks/async_views.py [--concurrency 64] [--duration 10]
+
+Needs uvicorn, gunicorn and aiohttp installed (not in requirements.txt). Results,
+including the run that led to dropping the async views, are kept in
+benchmarks/results/async_views.md.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+PORT = 8765
+
+SERVERS = {
+    'uvicorn (ASGI, 1 worker)': [
+        sys.executable, '-m', 'uvicorn', 'api.asgi:application',
+        '--port', str(PORT), '--workers', '1', '--log-level', 'warning', '--no-access-log',
+    ],
+    'gunicorn sync (WSGI, 1 worker)': [
+        sys.executable, '-m', 'gunicorn', 'api.wsgi:application',
+        '--bind', f'127.0.0.1:{PORT}', '--workers', '1', '--log-level', 'warning',
+    ],
+    'gunicorn gthread (WSGI, 1 worker x 8 threads)': [
+        sys.executable, '-m', 'gunicorn', 'api.wsgi:application',
+        '--bind', f'127.0.0.1:{PORT}', '--workers', '1', '--threads', '8',
+        '--worker-class', 'gthread', '--log-level', 'warning',
+    ],
+}
+
+
+def seed(env, jobs=50):
+    """Migrate the benchmark database and return (job_id, auth token) to query with"""
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '-v', '0'], cwd=SERVER_DIR, env=env, check=True)
+    script = f'''
+from rest_framework.authtoken.models import Token
+from job.models import Conversation, Job, Message, User
+employer = User.objects.create_user(email='bench-employer@example.com', username='bench-employer',
+                                    password='benchpass', role='employer', name='Bench Employer', company='Bench')
+seeker = User.objects.create_user(email='bench-seeker@example.com', username='bench-seeker',
+                                  password='benchpass', role='seeker', name='Bench Seeker')
+for i in range({jobs}):
+    Job.objects.create(title=f'Engineer {{i}}', company='Bench', location='Nairobi',
+                       description='Build things ' * 20, requirements=['Python', 'Django'], posted_by=employer)
+conversation = Conversation.objects.create(employer=employer, seeker=seeker)
+for i in range(20):
+    Message.objects.create(conversation=conversation, sender=employer, content=f'Message {{i}}')
+print(Job.objects.first().id, Token.objects.create(user=seeker).key)
+'''
+    out = subprocess.run(
+        [sys.executable, 'manage.py', 'shell', '-c', script],
+        cwd=SERVER_DIR, env=env, check=True, capture_output=True, text=True,
+    ).stdout.split()
+    return out[-2], out[-1]
+
+
+async def drive(paths, token, concurrency, duration):
+    headers = {'Authorization': f'Token {token}'}
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(session, n):
+        nonlocal errors
+        i = n
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            async with session.get(f'http://127.0.0.1:{PORT}{path}', headers=headers) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session, n) for n in range(concurrency)))
+    latencies.sort()
+    return {
+        'rps': len(latencies) / duration,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'errors': errors,
+    }
+
+
+def wait_until_up(timeout=20):
+    import urllib.request
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{PORT}/api/jobs/recent/', timeout=1)
+            return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{tmp}/bench.sqlite3', DEBUG='False')
+        job_id, token = seed(env)
+        workloads = {
+            'Mixed (jobs, conversations, unread-count and checks)': [
+                '/api/jobs/',
+                f'/api/jobs/{job_id}/',
+                '/api/conversations/',
+                '/api/conversations/unread-count/',
+                f'/api/applications/check/{job_id}/',
+                f'/api/saved-jobs/check/{job_id}/',
+            ],
+            'Light (unread-count and check endpoints)': [
+                '/api/conversations/unread-count/',
+                f'/api/applications/check/{job_id}/',
+                f'/api/saved-jobs/check/{job_id}/',
+            ],
+        }
+
+        print(f'Concurrency {args.concurrency}, {args.duration:g}s per run, SQLite, one worker per server.')
+        for workload, paths in workloads.items():
+            print(f'\n### {workload}\n')
+            print('| Server | req/s | p50 ms | p99 ms | errors |')
+            print('|---|---:|---:|---:|---:|')
+            for name, command in SERVERS.items():
+                server = subprocess.Popen(command, cwd=SERVER_DIR, env=env)
+                try:
+                    wait_until_up()
+                    result = asyncio.run(drive(paths, token, args.concurrency, args.duration))
+                finally:
+                    server.terminate()
+                    server.wait()
+                print(f"| {name} | {result['rps']:.0f} | {result['p50']:.1f} | {result['p99']:.1f} | {result['errors']} |")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Messages per second one worker can send, old view logic vs job.messaging.send.
+
+Seeds a throwaway SQLite database with employer/seeker pairs, then sends messages
+round-robin across the pairs through both paths and counts the SQL statements each
+one issues (notification inserts from the post_save handler included).
+
+    python benchmarks/message_send.py [--pairs 200] [--messages 5000]
+
+Results from a run are kept in benchmarks/results/message_send.md.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+
+def legacy_send(User, Conversation, Message, sender, recipient_id, content):
+    """What SendMessageSerializer plus ConversationViewSet.send_message did before"""
+    User.objects.get(id=recipient_id, is_active=True)  # validate_recipient_id
+    recipient = User.objects.get(id=recipient_id, is_active=True)
+    if sender.role == 'employer':
+        employer, seeker = sender, recipient
+    else:
+        employer, seeker = recipient, sender
+    conversation, _ = Conversation.objects.get_or_create(employer=employer, seeker=seeker)
+    message = Message.objects.create(conversation=conversation, sender=sender, content=content)
+    conversation.save()
+    return message
+
+
+def run(connection, pairs, messages, send):
+    """Return (messages per second, statements per message)"""
+    statements = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal statements
+        statements += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        for i in range(messages):
+            seeker, employer = pairs[i % len(pairs)]
+            # Alternate directions so both role branches are exercised
+            if i % 2:
+                send(seeker, employer.pk, f'message {i}')
+            else:
+                send(employer, seeker.pk, f'message {i}')
+        seconds = time.perf_counter() - start
+    return messages / seconds, statements / messages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pairs', type=int, default=200)
+    parser.add_argument('--messages', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f'sqlite:///{tmp}/bench.sqlite3'
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+        sys.path.insert(0, str(SERVER_DIR))
+        import django
+        django.setup()
+        from django.core.cache import cache
+        from django.core.management import call_command
+        from django.db import connection
+        from job import messaging
+        from job.models import Conversation, Message, User
+
+        call_command('migrate', verbosity=0)
+        seekers = User.objects.bulk_create(
+            [User(email=f'seeker{i}@example.com', username=f'seeker{i}', password='!', role='seeker')
+             for i in range(args.pairs)]
+        )
+        employers = User.objects.bulk_create(
+            [User(email=f'employer{i}@example.com', username=f'employer{i}', password='!', role='employer')
+             for i in range(args.pairs)]
+        )
+        pairs = list(zip(seekers, employers))
+
+        print(f'{args.pairs} employer/seeker pairs, {args.messages} messages per path, SQLite, one worker.\n')
+        print('| Path | messages/s | statements per message |')
+        print('|---|---:|---:|')
+        runs = [
+            ('view logic (old)', lambda *a: legacy_send(User, Conversation, Message, *a)),
+            ('messaging.send, caches start empty', messaging.send),
+            ('messaging.send, caches warm', messaging.send),
+        ]
+        for label, send in runs:
+            Conversation.objects.all().delete()
+            if 'warm' not in label:
+                cache.clear()
+            else:
+                # One pass over every pair first: conversations exist and are cached
+                run(connection, pairs, len(pairs) * 2, send)
+            rate, statements = run(connection, pairs, args.messages, send)
+            print(f'| {label} | {rate:,.0f} | {statements:.2f} |')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Cost of allocating a username for a signup whose local part is already taken many times.
+
+Seeds a throwaway SQLite database with `john`, `john1` ... `john{N-1}`, then times
+the old probe-one-suffix-per-query loop against User.objects.next_free_username().
+
+    python benchmarks/username_allocation.py [--collisions 100000]
+
+Results from a run are kept in benchmarks/results/username_allocation.md.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+
+def legacy_next_free_username(User, base):
+    """The allocation loop RegisterSerializer.create used before"""
+    username = base
+    counter = 0
+    while User.objects.filter(username=username).exists():
+        counter += 1
+        username = f"{base}{counter}"
+    return username
+
+
+def timed(connection, fn, repeat):
+    """Return (result, queries per call, seconds per call)"""
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        seconds = time.perf_counter() - start
+    return result, queries // repeat, seconds / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--collisions', type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f'sqlite:///{tmp}/bench.sqlite3'
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+        sys.path.insert(0, str(SERVER_DIR))
+        import django
+        django.setup()
+        from django.core.management import call_command
+        from django.db import connection
+        from job.models import User
+
+        call_command('migrate', verbosity=0)
+        User.objects.bulk_create(
+            [User(email=f'john{i}@example.com', username=f'john{i or ""}', password='!', name='John')
+             for i in range(args.collisions)],
+            batch_size=5000,
+        )
+        # Unrelated neighbours in the same index range
+        User.objects.bulk_create(
+            [User(email=f'johnny{i}@example.com', username=f'johnny.{i}', password='!', name='Johnny')
+             for i in range(1000)],
+        )
+
+        print(f'{args.collisions} existing `john*` usernames, SQLite.\n')
+        print('| Strategy | result | queries | time per signup |')
+        print('|---|---|---:|---:|')
+        runs = [
+            ('exists() per suffix (old)', lambda: legacy_next_free_username(User, 'john'), 1),
+            ('suffix aggregate (new)', lambda: User.objects.next_free_username('john'), 20),
+            ('suffix aggregate, unused base', lambda: User.objects.next_free_username('maria'), 20),
+        ]
+        for label, fn, repeat in runs:
+            result, queries, seconds = timed(connection, fn, repeat)
+            print(f'| {label} | {result} | {queries} | {seconds * 1000:.1f} ms |')
+
+
+if __name__ == '__main__':
+    main()
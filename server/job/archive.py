@@ -0,0 +1,27 @@
+import gzip
+import json
+
+from django.utils.dateparse import parse_datetime
+
+
+ARCHIVED_MESSAGE_FIELDS = ('id', 'sender_id', 'content', 'is_read', 'created_at')
+
+
+def encode_messages(rows):
+    """Pack message rows (dicts with ARCHIVED_MESSAGE_FIELDS) into gzip-compressed JSON lines"""
+    lines = []
+    for row in rows:
+        record = {field: row[field] for field in ARCHIVED_MESSAGE_FIELDS}
+        record['created_at'] = record['created_at'].isoformat()
+        lines.append(json.dumps(record, separators=(',', ':'), ensure_ascii=False))
+    return gzip.compress('\n'.join(lines).encode('utf-8'))
+
+
+def decode_messages(data):
+    """Inverse of encode_messages; created_at comes back as an aware datetime"""
+    rows = []
+    for line in gzip.decompress(bytes(data)).decode('utf-8').splitlines():
+        row = json.loads(line)
+        row['created_at'] = parse_datetime(row['created_at'])
+        rows.append(row)
+    return rows
@@ -0,0 +1,225 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import OrderedDict
+
+from .generations import SharedGeneration
+
+
+KINDS = ('title', 'company', 'location', 'skill')
+
+# Upper bounds on what one worker keeps in memory
+MAX_TERMS = 50_000
+MAX_CACHED_QUERIES = 2_048
+MAX_WORD_TAILS = 4
+
+
+def normalize_term(text):
+    return re.sub(r'\s+', ' ', str(text or '')).strip().lower()
+
+
+class PrefixIndex(SharedGeneration):
+    """In-memory prefix index over a bounded set of (term, kind) pairs with frequencies.
+
+    Every term is stored once in `_terms` and referenced from a sorted array of
+    lookup keys: the full normalized term plus the tails starting at each of its
+    first few words, so 'dev' also finds 'senior developer'. A prefix query is two
+    bisects plus a scan of the matching slice; results are memoized until a
+    term they could include changes.
+    """
+    generation_key = 'autocomplete:generation'
+
+    def __init__(self, max_terms=MAX_TERMS, max_cached_queries=MAX_CACHED_QUERIES):
+        self.max_terms = max_terms
+        self.max_cached_queries = max_cached_queries
+        self._terms = {}  # (normalized, kind) -> [display, count]
+        self._keys = []  # sorted [(lookup_key, normalized, kind)]
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+        self._rebuilding = threading.Lock()
+        self.is_built = False
+
+    def __len__(self):
+        return len(self._terms)
+
+    @staticmethod
+    def _lookup_keys(normalized):
+        words = normalized.split(' ')
+        return [' '.join(words[i:]) for i in range(min(len(words), MAX_WORD_TAILS))]
+
+    def add(self, text, kind, count=1):
+        normalized = normalize_term(text)
+        if not normalized:
+            return
+        with self._lock:
+            entry = self._terms.get((normalized, kind))
+            if entry is not None:
+                entry[1] += count
+            else:
+                self._terms[(normalized, kind)] = [str(text).strip(), count]
+                for key in self._lookup_keys(normalized):
+                    bisect.insort(self._keys, (key, normalized, kind))
+                if len(self._terms) > self.max_terms:
+                    self._evict(keep=(normalized, kind))
+                    self._cache.clear()
+            self._invalidate(normalized)
+
+    def remove(self, text, kind, count=1):
+        normalized = normalize_term(text)
+        with self._lock:
+            entry = self._terms.get((normalized, kind))
+            if entry is None:
+                return
+            entry[1] -= count
+            if entry[1] <= 0:
+                self._drop(normalized, kind)
+            self._invalidate(normalized)
+
+    def _invalidate(self, normalized):
+        """Forget memoized results for prefixes that could have matched this term"""
+        keys = self._lookup_keys(normalized)
+        stale = [
+            cache_key for cache_key in self._cache
+            if any(key.startswith(cache_key[0]) for key in keys)
+        ]
+        for cache_key in stale:
+            del self._cache[cache_key]
+
+    def _drop(self, normalized, kind):
+        del self._terms[(normalized, kind)]
+        for key in self._lookup_keys(normalized):
+            item = (key, normalized, kind)
+            i = bisect.bisect_left(self._keys, item)
+            if i < len(self._keys) and self._keys[i] == item:
+                del self._keys[i]
+
+    def _evict(self, keep=None):
+        """Drop the least frequent terms until 10% below the bound, never `keep` (the term
+        being added, which starts at count 1). Ties go oldest first: nsmallest is stable
+        and `_terms` is in insertion order, so recent terms get time to gain counts."""
+        target = int(self.max_terms * 0.9)
+        excess = len(self._terms) - target
+        victims = heapq.nsmallest(
+            excess, (item for item in self._terms.items() if item[0] != keep), key=lambda item: item[1][1]
+        )
+        dropped = {term for term, _ in victims}
+        for term in dropped:
+            del self._terms[term]
+        self._keys = [item for item in self._keys if (item[1], item[2]) not in dropped]
+
+    def search(self, prefix, kind=None, limit=10):
+        """Return up to `limit` [{'value', 'kind', 'count'}] starting with `prefix`, most frequent first"""
+        prefix = normalize_term(prefix)
+        if not prefix:
+            return []
+        cache_key = (prefix, kind, limit)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                return cached
+
+            lo = bisect.bisect_left(self._keys, (prefix,))
+            hi = bisect.bisect_left(self._keys, (prefix + '\uffff',), lo)
+            seen = set()
+            for _, normalized, term_kind in self._keys[lo:hi]:
+                if kind is None or term_kind == kind:
+                    seen.add((normalized, term_kind))
+            best = heapq.nsmallest(
+                limit, seen, key=lambda term: (-self._terms[term][1], term[0])
+            )
+            results = [
+                {'value': self._terms[term][0], 'kind': term[1], 'count': self._terms[term][1]}
+                for term in best
+            ]
+
+            self._cache[cache_key] = results
+            if len(self._cache) > self.max_cached_queries:
+                self._cache.popitem(last=False)
+            return results
+
+    def build(self, batch_size=2000):
+        """(Re)build the index from the database in one pass and a single sort"""
+        from .models import Job, User
+
+        generation = self.current_generation()
+        terms = {}
+
+        def collect(text, kind):
+            normalized = normalize_term(text)
+            if normalized:
+                entry = terms.setdefault((normalized, kind), [str(text).strip(), 0])
+                entry[1] += 1
+
+        jobs = Job.objects.values_list('title', 'company', 'location')
+        for title, company, location in jobs.iterator(chunk_size=batch_size):
+            collect(title, 'title')
+            collect(company, 'company')
+            collect(location, 'location')
+        users = User.objects.filter(is_active=True).values_list('skills', 'location')
+        for skills, location in users.iterator(chunk_size=batch_size):
+            if isinstance(skills, str):
+                skills = [skills]
+            for skill in skills or []:
+                collect(skill, 'skill')
+            collect(location, 'location')
+
+        if len(terms) > self.max_terms:
+            terms = dict(heapq.nlargest(self.max_terms, terms.items(), key=lambda item: item[1][1]))
+        keys = sorted(
+            (key, normalized, kind)
+            for normalized, kind in terms
+            for key in self._lookup_keys(normalized)
+        )
+        with self._lock:
+            self._terms = terms
+            self._keys = keys
+            self._cache.clear()
+            self.is_built = True
+            self.mark_built(generation)
+
+    def ensure_built(self):
+        if not self.is_built:
+            with self._lock:
+                if not self.is_built:
+                    self.build()
+
+    # Helpers used by the model signal handlers
+
+    def _add_job_terms(self, title, company, location, sign):
+        update = self.add if sign > 0 else self.remove
+        update(title, 'title')
+        update(company, 'company')
+        update(location, 'location')
+
+    def _add_user_terms(self, skills, location, sign):
+        update = self.add if sign > 0 else self.remove
+        if isinstance(skills, str):
+            skills = [skills]
+        for skill in skills or []:
+            update(skill, 'skill')
+        update(location, 'location')
+
+    def job_changed(self, old, new):
+        """Apply a Job write given (title, company, location) tuples before/after (None if absent)"""
+        if not self.is_built or old == new:
+            return
+        with self._lock:
+            if old:
+                self._add_job_terms(*old, -1)
+            if new:
+                self._add_job_terms(*new, 1)
+
+    def user_changed(self, old, new):
+        """Apply a User write given (skills, location) tuples before/after (None if absent)"""
+        if not self.is_built or old == new:
+            return
+        with self._lock:
+            if old:
+                self._add_user_terms(*old, -1)
+            if new:
+                self._add_user_terms(*new, 1)
+
+
+index = PrefixIndex()
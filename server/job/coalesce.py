@@ -0,0 +1,56 @@
+import threading
+from concurrent.futures import Future
+
+from api.db_router import reading_from_replica
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls: the first caller for a key runs the work,
+    callers arriving while it is in flight wait for and share its result.
+
+    Nothing is cached once the call finishes. Waiters in other threads block on a
+    concurrent.futures.Future.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        """Return (future, is_leader)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _finish(self, key, future, result=None, exc=None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as exc:
+            self._finish(key, future, exc=exc)
+            raise
+        self._finish(key, future, result)
+        return result
+
+
+def request_key(name, request):
+    """Coalescing key for a GET: endpoint name, host (absolute URLs differ), sorted params
+    and the database read from, so a client pinned to the primary never gets a replica's result"""
+    params = tuple(sorted((key, tuple(request.GET.getlist(key))) for key in request.GET))
+    return (name, request.get_host(), params, reading_from_replica())
+
+
+flights = SingleFlight()
@@ -0,0 +1,147 @@
+import hashlib
+import re
+import zlib
+from functools import reduce
+from operator import or_
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from .models import JobSignature, JobSignatureBand
+
+
+NUM_PERM = 64
+BANDS = 16  # x 4 rows: a pair at Jaccard 0.8 shares a bucket with probability > 0.999
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# Estimated Jaccard similarity of shingle sets above which two postings count as duplicates
+DUPLICATE_THRESHOLD = 0.8
+# Buckets of boilerplate text can get huge; only verify against this many earlier members
+MAX_BUCKET_COMPARISONS = 50
+
+WORD_RE = re.compile(r'[a-z0-9+#]+')
+_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(7)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(title, description, requirements):
+    if not isinstance(requirements, str):
+        requirements = ' '.join(item for item in requirements or [] if isinstance(item, str))
+    words = WORD_RE.findall(' '.join(filter(None, (title, description, requirements))).lower())
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def signature(title, description, requirements):
+    """MinHash signature (uint32[NUM_PERM]) of the job's word 3-gram shingles"""
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles(title, description, requirements)),
+        dtype=np.uint64,
+    )
+    if not len(hashes):
+        return np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+    # h_i(x) = (a_i * x + b_i) mod p; uint64 wraps, which is fine for hashing
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return (permuted.min(axis=1) & 0xFFFFFFFF).astype(np.uint32)
+
+
+def job_signature(job):
+    return signature(job.title, job.description, job.requirements)
+
+
+def to_bytes(sig):
+    return sig.astype('<u4').tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(bytes(data), dtype='<u4')
+
+
+def band_buckets(sig):
+    """[(band, bucket)] with each band's rows hashed to a signed 64-bit bucket id"""
+    raw = to_bytes(sig)
+    width = ROWS_PER_BAND * 4
+    return [
+        (band, int.from_bytes(
+            hashlib.blake2b(raw[band * width:(band + 1) * width], digest_size=8).digest(), 'little', signed=True
+        ))
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity: the fraction of agreeing MinHash rows"""
+    return float(np.mean(a == b))
+
+
+def find_duplicate(sig, posted_by_id, exclude_id=None):
+    """Return (canonical job id, similarity) of the closest near-duplicate among the
+    employer's own postings, or None"""
+    buckets = band_buckets(sig)
+    # Reposting a closed or expired job is legitimate, so only live postings count. Other
+    # employers' postings never do: common roles read alike across companies.
+    candidates = JobSignatureBand.objects.filter(
+        reduce(or_, (Q(band=band, bucket=bucket) for band, bucket in buckets)),
+        job__status='open', job__posted_by_id=posted_by_id,
+    ).values_list('job_id', flat=True).distinct()
+    if exclude_id is not None:
+        candidates = candidates.exclude(job_id=exclude_id)
+
+    best = None
+    for job_id, data, duplicate_of_id in JobSignature.objects.filter(job_id__in=candidates).values_list(
+        'job_id', 'minhash', 'job__duplicate_of_id'
+    ):
+        score = similarity(sig, from_bytes(data))
+        if score >= DUPLICATE_THRESHOLD and (best is None or score > best[1]):
+            best = (duplicate_of_id or job_id, score)
+    return best
+
+
+def store_signature(job_id, sig):
+    """Replace the stored signature and LSH buckets for one job"""
+    with transaction.atomic():
+        JobSignature.objects.update_or_create(job_id=job_id, defaults={'minhash': to_bytes(sig)})
+        JobSignatureBand.objects.filter(job_id=job_id).delete()
+        JobSignatureBand.objects.bulk_create(
+            [JobSignatureBand(job_id=job_id, band=band, bucket=bucket) for band, bucket in band_buckets(sig)]
+        )
+
+
+def cluster(signatures):
+    """Group {job_id: signature} into {job_id: canonical (lowest) job id} for duplicates only.
+
+    Jobs are bucketed per band; within a bucket each job is verified against up to
+    MAX_BUCKET_COMPARISONS earlier members, and verified pairs are unioned.
+    """
+    parent = {}
+
+    def find(job_id):
+        root = job_id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while job_id != root:
+            parent[job_id], job_id = root, parent.get(job_id, job_id)
+        return root
+
+    for band in range(BANDS):
+        buckets = {}
+        for job_id, sig in signatures.items():
+            buckets.setdefault(bytes(sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]), []).append(job_id)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            members.sort()
+            for i, job_id in enumerate(members[1:], start=1):
+                for earlier in members[max(0, i - MAX_BUCKET_COMPARISONS):i]:
+                    if find(earlier) == find(job_id):
+                        break
+                    if similarity(signatures[job_id], signatures[earlier]) >= DUPLICATE_THRESHOLD:
+                        a, b = find(earlier), find(job_id)
+                        parent[max(a, b)] = min(a, b)
+                        break
+
+    return {job_id: find(job_id) for job_id in parent if find(job_id) != job_id}
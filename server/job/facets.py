@@ -0,0 +1,120 @@
+"""Facet counts (type, location, company, salary band) for the job search page.
+
+Each facet is one grouped COUNT over the open job cards, filtered by every current
+filter except the facet's own, so the counts say how many results picking that
+value would give. Results for filter-only requests are cached under a generation
+number that any job write bumps; free-text and radius searches are never cached.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Value, When
+
+# Lower bounds of the salary bands on salary_min; the last band is open-ended
+SALARY_BAND_EDGES = (0, 25_000, 50_000, 100_000, 250_000)
+# Query-string parameters each facet's own filter reads
+FACET_PARAMS = {
+    'type': ('type',),
+    'location': ('location',),
+    'company': ('company',),
+    'salary_band': ('salary_band', 'salary_min', 'salary_max'),
+}
+# Requests filtered only by these are cached
+CACHEABLE_PARAMS = {'type', 'location', 'company', 'salary_band', 'salary_min', 'salary_max',
+                    'currency', 'period', 'collapse_duplicates', 'facet_limit'}
+GENERATION_KEY = 'facets:generation'
+
+
+def salary_bands():
+    """[(label, low, high)], high None for the last band"""
+    edges = list(SALARY_BAND_EDGES) + [None]
+    return [
+        (f'{low}-{high}' if high is not None else f'{low}+', low, high)
+        for low, high in zip(edges, edges[1:])
+    ]
+
+
+def parse_salary_band(label):
+    """(low, high) for a band label such as '50000-100000' or '250000+', None if malformed"""
+    low, _, high = label.replace('+', '-').partition('-')
+    if not low.isdigit() or (high and not high.isdigit()):
+        return None
+    return int(low), int(high) if high else None
+
+
+def _band_expression():
+    return Case(
+        *[When(salary_min__gte=low, salary_min__lt=high, then=Value(label))
+          for label, low, high in salary_bands() if high is not None],
+        *[When(salary_min__gte=low, then=Value(label))
+          for label, low, high in salary_bands() if high is None],
+        default=Value(None),
+        output_field=CharField(),
+    )
+
+
+def _without(params, names):
+    params = params.copy()
+    for name in names:
+        params.pop(name, None)
+    return params
+
+
+def _counts(queryset, field, limit):
+    rows = queryset.order_by().values(field).annotate(count=Count('pk')).order_by('-count', field)
+    return [{'value': row[field], 'count': row['count']} for row in rows.exclude(**{field: ''})[:limit]]
+
+
+def compute(search, params, limit):
+    """Facet counts for the cards `search(params)` returns"""
+    facets = {
+        name: _counts(search(_without(params, FACET_PARAMS[name])), name, limit)
+        for name in ('type', 'location', 'company')
+    }
+    bands = (
+        search(_without(params, FACET_PARAMS['salary_band']))
+        .filter(salary_min__isnull=False)
+        .annotate(salary_band=_band_expression())
+        .order_by().values('salary_currency', 'salary_band').annotate(count=Count('pk'))
+    )
+    order = {label: i for i, (label, _, _) in enumerate(salary_bands())}
+    facets['salary_band'] = sorted(
+        ({'value': row['salary_band'], 'currency': row['salary_currency'], 'count': row['count']}
+         for row in bands),
+        key=lambda row: (row['currency'] or '', order[row['value']]),
+    )
+    return {'total': search(params).count(), 'facets': facets}
+
+
+def _cache_key(params, generation):
+    items = sorted((key, value) for key, values in params.lists() for value in values if value)
+    digest = hashlib.sha1(repr(items).encode()).hexdigest()
+    return f'facets:{generation}:{digest}'
+
+
+def facet_counts(search, params, limit):
+    """compute(), served from the cache when the request only uses cacheable filters"""
+    params = _without(params, ('ordering', 'limit'))
+    if not set(key for key, value in params.items() if value) <= CACHEABLE_PARAMS:
+        return compute(search, params, limit)
+    generation = cache.get_or_set(GENERATION_KEY, time.time_ns, None)
+    key = _cache_key(params, generation)
+    result = cache.get(key)
+    if result is None:
+        result = compute(search, params, limit)
+        cache.set(key, result, settings.FACET_CACHE_SECONDS)
+    return result
+
+
+def invalidate():
+    """Drop every cached facet count once the current transaction commits"""
+    def bump():
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            # Evicted: start from a fresh number so no older entry can match again
+            cache.set(GENERATION_KEY, time.time_ns(), None)
+    transaction.on_commit(bump)
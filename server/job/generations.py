@@ -0,0 +1,63 @@
+"""Keep the in-process indexes of every worker in step with the database.
+
+Signal handlers update the index of the worker that makes a write and, once the
+transaction commits, bump a generation number in the shared cache. Any other worker
+notices within INDEX_REFRESH_SECONDS that its index was built at an older generation
+and rebuilds it. This needs a cache the workers share (REDIS_URL); with the
+per-process default each worker only sees its own writes.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class SharedGeneration:
+    """Mixin for an index with build(), ensure_built(), is_built and a `_rebuilding` Lock.
+
+    build() records current_generation() before it reads the database, so a write that
+    lands during the build bumps past it and triggers another rebuild.
+    """
+    generation_key = None
+    built_generation = None
+    _checked_at = 0.0
+
+    def current_generation(self):
+        return cache.get_or_set(self.generation_key, time.time_ns, None)
+
+    def mark_built(self, generation):
+        self.built_generation = generation
+        self._checked_at = time.monotonic()
+
+    def changed(self):
+        """Tell the other workers to rebuild once the current transaction commits"""
+        def bump():
+            try:
+                generation = cache.incr(self.generation_key)
+            except ValueError:
+                # Evicted: a fresh number no index can have been built at
+                cache.set(self.generation_key, time.time_ns(), None)
+                return
+            # This worker applied its own write already; only the others need to rebuild
+            if self.built_generation == generation - 1:
+                self.built_generation = generation
+        transaction.on_commit(bump)
+
+    def ensure_current(self):
+        """Build on first use, and rebuild when another worker changed the data since"""
+        if not self.is_built:
+            self.ensure_built()
+            return
+        now = time.monotonic()
+        if now - self._checked_at < settings.INDEX_REFRESH_SECONDS:
+            return
+        self._checked_at = now
+        if self.current_generation() == self.built_generation:
+            return
+        # One thread rebuilds; the others keep serving the current index meanwhile
+        if self._rebuilding.acquire(blocking=False):
+            try:
+                self.build()
+            finally:
+                self._rebuilding.release()
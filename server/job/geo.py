@@ -0,0 +1,62 @@
+import csv
+import math
+import re
+import unicodedata
+from pathlib import Path
+
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+
+EARTH_RADIUS_KM = 6371.0088
+
+DEFAULT_RADIUS_KM = 50
+
+
+def normalize_place_name(text):
+    """Lowercase, strip accents and collapse punctuation/whitespace: ' São  Paulo ' -> 'sao paulo'"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()
+
+
+def place_name_candidates(location):
+    """Keys to try when resolving free text such as 'Westlands, Nairobi, Kenya'"""
+    if not location:
+        return []
+    candidates = [normalize_place_name(location)]
+    for part in location.split(','):
+        key = normalize_place_name(part)
+        if key and key not in candidates:
+            candidates.append(key)
+    return [key for key in candidates if key]
+
+
+def read_gazetteer(path=GAZETTEER_PATH):
+    """Yield (name, country, latitude, longitude) rows from the bundled gazetteer"""
+    with open(path, newline='', encoding='utf-8') as fh:
+        for row in csv.DictReader(fh):
+            yield row['name'], row['country'], float(row['latitude']), float(row['longitude'])
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat, lon, radius_km):
+    """Return (min_lat, max_lat, min_lon, max_lon) enclosing the radius around a point"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    # Longitude degrees shrink towards the poles; widen to the full range near them
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-6 or max_lat >= 90.0 or min_lat <= -90.0:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    if dlon >= 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lon - dlon, lon + dlon
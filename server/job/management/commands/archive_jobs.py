@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from job import facets
+from job.models import Application, ApplicationArchive, ApplicationEvent, Job, JobArchive, JobCard
+
+# Columns kept as real columns on JobArchive; the rest go into its JSON `data`
+ARCHIVE_COLUMNS = ('id', 'posted_by_id', 'title', 'company', 'status', 'posted_at', 'closed_at')
+
+
+class Command(BaseCommand):
+    help = 'Expire open jobs past expires_at, then move long-closed jobs and their applications to archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=settings.JOB_ARCHIVE_AFTER_DAYS,
+            help='Archive jobs closed or expired more than this many days ago',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=200, help='Bound the work done per run')
+        parser.add_argument('--skip-archive', action='store_true', help='Only expire jobs')
+
+    def handle(self, *args, **options):
+        expired = self.expire(options['batch_size'], options['max_batches'])
+        self.stdout.write(f'Expired {expired} jobs')
+        if options['skip_archive']:
+            return
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        jobs, applications = self.archive(cutoff, options['batch_size'], options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {jobs} jobs and {applications} applications'))
+
+    def expire(self, batch_size, max_batches):
+        now = timezone.now()
+        due = Job.objects.filter(status='open', expires_at__lte=now).order_by('expires_at')
+        expired = 0
+        for _ in range(max_batches):
+            job_ids = list(due.values_list('pk', flat=True)[:batch_size])
+            if not job_ids:
+                break
+            with transaction.atomic():
+                Job.objects.filter(pk__in=job_ids).update(status='expired', closed_at=now, version=F('version') + 1)
+                JobCard.objects.filter(job_id__in=job_ids).update(status='expired')
+                facets.invalidate()
+            expired += len(job_ids)
+        return expired
+
+    def archive(self, cutoff, batch_size, max_batches):
+        stale = Job.objects.exclude(status='open').filter(closed_at__lt=cutoff).order_by('closed_at', 'pk')
+        archived_jobs = archived_applications = 0
+        for _ in range(max_batches):
+            job_ids = list(stale.values_list('pk', flat=True)[:batch_size])
+            if not job_ids:
+                break
+            with transaction.atomic():
+                archived_applications += self.archive_batch(job_ids)
+            archived_jobs += len(job_ids)
+        return archived_jobs, archived_applications
+
+    def archive_batch(self, job_ids):
+        """Copy the jobs, their applications and status history to the archive, then delete them"""
+        jobs = []
+        for row in Job.objects.filter(pk__in=job_ids).values():
+            columns = {column: row.pop(column) for column in ARCHIVE_COLUMNS}
+            jobs.append(JobArchive(**columns, data=row))
+        JobArchive.objects.bulk_create(jobs, ignore_conflicts=True)
+
+        events = {}
+        for event in ApplicationEvent.objects.filter(job_id__in=job_ids).values(
+            'application_id', 'from_status', 'to_status', 'actor_id', 'created_at'
+        ):
+            events.setdefault(event.pop('application_id'), []).append(event)
+        applications = [
+            ApplicationArchive(
+                id=app['id'], job_id=app['job_id'], seeker_id=app['seeker_id'], status=app['status'],
+                applied_at=app['applied_at'], updated_at=app['updated_at'], events=events.get(app['id'], []),
+            )
+            for app in Application.objects.filter(job_id__in=job_ids).values()
+        ]
+        ApplicationArchive.objects.bulk_create(applications, ignore_conflicts=True)
+
+        # Cascades to applications, events, cards, signatures, saved jobs and match scores;
+        # applications deleted with their job leave its counters alone (see job.signals)
+        Job.objects.filter(pk__in=job_ids).delete()
+        return len(applications)
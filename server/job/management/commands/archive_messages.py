@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from job.archive import ARCHIVED_MESSAGE_FIELDS, encode_messages
+from job.models import Message, MessageArchive
+
+
+class Command(BaseCommand):
+    help = 'Move read messages past the retention window into compressed per-conversation archive chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=settings.MESSAGE_RETENTION_DAYS,
+            help='Archive read messages older than this many days',
+        )
+        parser.add_argument('--chunk-size', type=int, default=settings.MESSAGE_ARCHIVE_CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        # Unread messages stay hot so unread counts and read receipts keep working
+        eligible = Message.objects.filter(created_at__lt=cutoff, is_read=True)
+
+        if options['dry_run']:
+            self.stdout.write(f'{eligible.count()} messages older than {cutoff:%Y-%m-%d} would be archived')
+            return
+
+        conversation_ids = list(
+            eligible.order_by('conversation_id').values_list('conversation_id', flat=True).distinct()
+        )
+        archived = 0
+        for conversation_id in conversation_ids:
+            archived += self.archive_conversation(
+                eligible.filter(conversation_id=conversation_id), conversation_id, options['chunk_size']
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} messages from {len(conversation_ids)} conversations'
+        ))
+
+    def archive_conversation(self, queryset, conversation_id, chunk_size):
+        """Archive one conversation oldest first; each chunk is written and deleted atomically"""
+        queryset = queryset.order_by('id').values(*ARCHIVED_MESSAGE_FIELDS)
+        archived = 0
+        while True:
+            with transaction.atomic():
+                rows = list(queryset[:chunk_size])
+                if not rows:
+                    break
+                MessageArchive.objects.create(
+                    conversation_id=conversation_id,
+                    first_message_id=rows[0]['id'],
+                    last_message_id=rows[-1]['id'],
+                    first_created_at=rows[0]['created_at'],
+                    last_created_at=rows[-1]['created_at'],
+                    message_count=len(rows),
+                    data=encode_messages(rows),
+                )
+                Message.objects.filter(id__in=[row['id'] for row in rows]).delete()
+            archived += len(rows)
+        return archived
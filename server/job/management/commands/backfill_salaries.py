@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from job.models import Job, JobCard
+
+
+class Command(BaseCommand):
+    help = 'Parse Job.salary into the structured salary columns for existing jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-parse every job, not only those with unparsed salaries',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Job.objects.exclude(salary__isnull=True).exclude(salary='')
+        if not options['all']:
+            queryset = queryset.filter(salary_min__isnull=True)
+        queryset = queryset.only('id', 'salary').order_by('pk')
+
+        # Keyset pagination keeps each batch an index range scan on the pk
+        last_pk = 0
+        processed = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for job in batch:
+                job.parse_salary()
+            Job.objects.bulk_update(
+                batch, ['salary_min', 'salary_max', 'salary_currency', 'salary_period']
+            )
+            JobCard.objects.refresh([job.pk for job in batch])
+            last_pk = batch[-1].pk
+            processed += len(batch)
+            self.stdout.write(f'Processed {processed} jobs')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled salaries for {processed} jobs'))
@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from job.dedup import band_buckets, cluster, from_bytes, job_signature, to_bytes
+from job.models import Job, JobCard, JobSignature, JobSignatureBand
+
+
+class Command(BaseCommand):
+    help = 'Compute missing MinHash signatures and mark near-duplicate jobs with duplicate_of'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--recompute', action='store_true', help='Recompute every signature')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        signed = self.sign_jobs(batch_size, options['recompute'])
+        self.stdout.write(f'Computed {signed} signatures')
+
+        # Clustered per employer: other companies' postings of the same role are not duplicates
+        signatures = defaultdict(dict)
+        for job_id, employer_id, data in JobSignature.objects.values_list(
+            'job_id', 'job__posted_by_id', 'minhash'
+        ).iterator(chunk_size=batch_size):
+            signatures[employer_id][job_id] = from_bytes(data)
+        canonical = {}
+        for employer_signatures in signatures.values():
+            canonical.update(cluster(employer_signatures))
+
+        changed = []
+        for job in Job.objects.only('id', 'duplicate_of_id').iterator(chunk_size=batch_size):
+            duplicate_of_id = canonical.get(job.id)
+            if job.duplicate_of_id != duplicate_of_id:
+                job.duplicate_of_id = duplicate_of_id
+                changed.append(job)
+        for start in range(0, len(changed), batch_size):
+            batch = changed[start:start + batch_size]
+            Job.objects.bulk_update(batch, ['duplicate_of'])
+            JobCard.objects.refresh([job.pk for job in batch])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(canonical)} of {sum(map(len, signatures.values()))} jobs are near-duplicates in '
+            f'{len(set(canonical.values()))} clusters ({len(changed)} updated)'
+        ))
+
+    def sign_jobs(self, batch_size, recompute):
+        queryset = Job.objects.only('id', 'title', 'description', 'requirements').order_by('pk')
+        if not recompute:
+            queryset = queryset.filter(signature__isnull=True)
+        last_pk = 0
+        signed = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            signatures = {job.pk: job_signature(job) for job in batch}
+            JobSignature.objects.bulk_create(
+                [JobSignature(job_id=job_id, minhash=to_bytes(sig)) for job_id, sig in signatures.items()],
+                update_conflicts=True, unique_fields=['job'], update_fields=['minhash'],
+            )
+            JobSignatureBand.objects.filter(job_id__in=signatures).delete()
+            JobSignatureBand.objects.bulk_create([
+                JobSignatureBand(job_id=job_id, band=band, bucket=bucket)
+                for job_id, sig in signatures.items() for band, bucket in band_buckets(sig)
+            ])
+            signed += len(batch)
+            last_pk = batch[-1].pk
+        return signed
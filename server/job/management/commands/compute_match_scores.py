@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from job.matching import (
+    JOB_MATCH_FIELDS, SEEKER_MATCH_FIELDS, compute_match_score, job_fingerprint, seeker_fingerprint,
+)
+from job.models import Application, Job, MatchScore, User
+
+
+class Command(BaseCommand):
+    help = 'Compute missing or stale match scores in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all-pairs', action='store_true',
+            help='Score every active seeker against every job, not only applied pairs',
+        )
+
+    def handle(self, *args, **options):
+        if options['all_pairs']:
+            written = self.score_all_pairs(options['batch_size'])
+        else:
+            written = self.score_applications(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} match scores'))
+
+    def upsert(self, pairs):
+        """Score (job, seeker) pairs, skipping those whose stored fingerprints are current"""
+        existing = {
+            (job_id, seeker_id): (job_fp, seeker_fp)
+            for job_id, seeker_id, job_fp, seeker_fp in MatchScore.objects.filter(
+                job_id__in={job.id for job, _ in pairs},
+                seeker_id__in={seeker.id for _, seeker in pairs},
+            ).values_list('job_id', 'seeker_id', 'job_fingerprint', 'seeker_fingerprint')
+        }
+        now = timezone.now()
+        rows = []
+        for job, seeker in pairs:
+            fps = (job_fingerprint(job), seeker_fingerprint(seeker))
+            if existing.get((job.id, seeker.id)) == fps:
+                continue
+            rows.append(MatchScore(
+                job=job, seeker=seeker, score=compute_match_score(job, seeker),
+                job_fingerprint=fps[0], seeker_fingerprint=fps[1], computed_at=now,
+            ))
+        MatchScore.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['job', 'seeker'],
+            update_fields=['score', 'job_fingerprint', 'seeker_fingerprint', 'computed_at'],
+        )
+        return len(rows)
+
+    def score_applications(self, batch_size):
+        queryset = Application.objects.select_related('job', 'seeker').order_by('pk')
+        last_pk = 0
+        written = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            written += self.upsert([(app.job, app.seeker) for app in batch])
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Scored applications up to id {last_pk}')
+        return written
+
+    def score_all_pairs(self, batch_size):
+        jobs = Job.objects.only('id', *JOB_MATCH_FIELDS).order_by('pk')
+        seekers = User.objects.filter(role='seeker', is_active=True).only('id', *SEEKER_MATCH_FIELDS).order_by('pk')
+        written = 0
+        last_seeker_pk = 0
+        while True:
+            seeker_batch = list(seekers.filter(pk__gt=last_seeker_pk)[:batch_size])
+            if not seeker_batch:
+                break
+            last_job_pk = 0
+            while True:
+                job_batch = list(jobs.filter(pk__gt=last_job_pk)[:batch_size])
+                if not job_batch:
+                    break
+                written += self.upsert([(job, seeker) for job in job_batch for seeker in seeker_batch])
+                last_job_pk = job_batch[-1].pk
+            last_seeker_pk = seeker_batch[-1].pk
+            self.stdout.write(f'Scored seekers up to id {last_seeker_pk}')
+        return written
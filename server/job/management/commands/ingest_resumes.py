@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from job.models import ResumeDocument
+from job.resumes import ResumeIngestor
+
+
+class Command(BaseCommand):
+    help = 'Fetch, extract and index resumes queued by a change to User.resume'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--workers', type=int, default=settings.RESUME_INGEST_WORKERS)
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry documents that failed before')
+        parser.add_argument(
+            '--requeue', action='store_true',
+            help='Re-queue every indexed document first (files that did not change are not re-indexed)',
+        )
+        parser.add_argument('--loop', action='store_true', help='Keep running, checking every --interval seconds')
+        parser.add_argument('--interval', type=int, default=60)
+
+    def handle(self, *args, **options):
+        if options['requeue']:
+            requeued = ResumeDocument.objects.filter(status='indexed').update(status='pending')
+            self.stdout.write(f'Re-queued {requeued} resumes')
+        statuses = ('pending', 'failed') if options['retry_failed'] else ('pending',)
+        while True:
+            ingestor = ResumeIngestor(workers=options['workers'], batch_size=options['batch_size'])
+            counts = ingestor.run(statuses)
+            self.stdout.write(
+                f"Indexed {counts['indexed']} resumes, {counts['unchanged']} unchanged, {counts['failed']} failed"
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
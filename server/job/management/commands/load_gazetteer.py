@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from job.geo import GAZETTEER_PATH, normalize_place_name, read_gazetteer
+from job.models import Job, JobCard, Place, User
+
+
+class Command(BaseCommand):
+    help = 'Load places from the bundled offline gazetteer and link existing jobs and users to them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=str(GAZETTEER_PATH), help='Gazetteer CSV to load')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--skip-link', action='store_true', help='Only load places')
+
+    def handle(self, *args, **options):
+        places = [
+            Place(name=name, key=normalize_place_name(name), country=country,
+                  latitude=latitude, longitude=longitude)
+            for name, country, latitude, longitude in read_gazetteer(options['path'])
+        ]
+        Place.objects.bulk_create(places, batch_size=options['batch_size'], ignore_conflicts=True)
+        self.stdout.write(f'Loaded {len(places)} gazetteer entries ({Place.objects.count()} places total)')
+
+        if options['skip_link']:
+            return
+
+        for model in (Job, User):
+            linked = self.link(model, options['batch_size'])
+            self.stdout.write(f'Linked {linked} {model._meta.verbose_name_plural} to places')
+        self.stdout.write(self.style.SUCCESS('Gazetteer load complete'))
+
+    def link(self, model, batch_size):
+        """Resolve `place` for rows that have a location but no place yet, in pk-ordered batches"""
+        queryset = (
+            model.objects.filter(place__isnull=True, location__isnull=False)
+            .exclude(location='')
+            .only('id', 'location')
+            .order_by('pk')
+        )
+        resolved = {}
+        last_pk = 0
+        linked = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            changed = []
+            for obj in batch:
+                if obj.location not in resolved:
+                    resolved[obj.location] = Place.objects.resolve(obj.location)
+                if resolved[obj.location] is not None:
+                    obj.place = resolved[obj.location]
+                    changed.append(obj)
+            model.objects.bulk_update(changed, ['place'])
+            if model is Job:
+                JobCard.objects.refresh([job.pk for job in changed])
+            linked += len(changed)
+            last_pk = batch[-1].pk
+        return linked
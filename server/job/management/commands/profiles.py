@@ -0,0 +1,101 @@
+import io
+import pstats
+import re
+import shutil
+from collections import defaultdict
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import list_records, load_record, profile_dir, profile_path
+
+# Collapse literal IN lists so the same statement groups together whatever its size
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+class Command(BaseCommand):
+    help = 'List and inspect the request profiles recorded by api.profiling.ProfilingMiddleware'
+
+    def add_arguments(self, parser):
+        subcommands = parser.add_subparsers(dest='subcommand', required=True)
+        listing = subcommands.add_parser('list', help='Stored records, newest first')
+        listing.add_argument('--route', help='Only this URL name, e.g. application-for-job')
+        listing.add_argument('--limit', type=int, default=50)
+
+        show = subcommands.add_parser('show', help='Top functions and queries of one record')
+        show.add_argument('record_id', help="A record id, or 'latest'")
+        show.add_argument('--limit', type=int, default=25)
+        show.add_argument('--sort', default='cumulative', help="pstats sort key, e.g. 'tottime'")
+
+        export = subcommands.add_parser('export', help='Copy the .prof file, e.g. for snakeviz or flameprof')
+        export.add_argument('record_id')
+        export.add_argument('path')
+
+        subcommands.add_parser('clear', help='Delete every record')
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['subcommand']}")(options)
+
+    def _record(self, record_id):
+        if record_id == 'latest':
+            records = list_records()
+            if not records:
+                raise CommandError('No profiles recorded')
+            return records[0]
+        try:
+            return load_record(record_id)
+        except FileNotFoundError:
+            raise CommandError(f'No profile {record_id} (it may have been rotated out)')
+
+    def handle_list(self, options):
+        records = [r for r in list_records() if not options['route'] or r['route'] == options['route']]
+        self.stdout.write(f"{'id':<30} {'recorded':<19} {'ms':>8} {'sql ms':>8} {'queries':>7}  {'reason':<10} request")
+        for record in records[:options['limit']]:
+            recorded = datetime.fromtimestamp(record['recorded_at']).strftime('%Y-%m-%d %H:%M:%S')
+            self.stdout.write(
+                f"{record['id']:<30} {recorded:<19} {record['ms']:>8.1f} {record['sql_ms']:>8.1f} "
+                f"{record['query_count']:>7}  {record['reason']:<10} "
+                f"{record['method']} {record['path']} -> {record['status']}"
+            )
+
+    def handle_show(self, options):
+        record = self._record(options['record_id'])
+        self.stdout.write(
+            f"{record['method']} {record['path']} ({record['route']}) -> {record['status']}: "
+            f"{record['ms']} ms, {record['query_count']} queries taking {record['sql_ms']} ms [{record['reason']}]"
+        )
+
+        if record['has_profile']:
+            self.stdout.write('\nTop functions:')
+            out = io.StringIO()
+            stats = pstats.Stats(str(profile_path(record['id'])), stream=out)
+            stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
+            self.stdout.write(out.getvalue().strip('\n'))
+        else:
+            self.stdout.write('\nNo profile: stored because it was slow; the next request to the route is profiled.')
+
+        grouped = defaultdict(lambda: [0, 0.0])
+        for query in record['queries']:
+            entry = grouped[IN_LIST_RE.sub('IN (...)', query['sql'])]
+            entry[0] += 1
+            entry[1] += query['ms']
+        self.stdout.write('\nTop queries by total time:')
+        self.stdout.write(f"{'count':>6} {'total ms':>9}  statement")
+        for sql, (count, ms) in sorted(grouped.items(), key=lambda item: -item[1][1])[:options['limit']]:
+            self.stdout.write(f'{count:>6} {ms:>9.2f}  {sql[:200]}')
+        if record['query_count'] > len(record['queries']):
+            self.stdout.write(f"(first {len(record['queries'])} of {record['query_count']} queries kept)")
+
+    def handle_export(self, options):
+        record = self._record(options['record_id'])
+        if not record['has_profile']:
+            raise CommandError(f"Record {record['id']} has the SQL log only, no profile")
+        shutil.copyfile(profile_path(record['id']), options['path'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['path']}"))
+
+    def handle_clear(self, options):
+        removed = 0
+        for path in list(profile_dir().glob('*.json')) + list(profile_dir().glob('*.prof')):
+            path.unlink(missing_ok=True)
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} files'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from job.models import Job, JobCard
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized JobCard rows from Job and User in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = Job.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = 0
+        rebuilt = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            JobCard.objects.refresh(batch)
+            rebuilt += len(batch)
+            last_pk = batch[-1]
+        # Cards whose job is gone are removed by the cascade; nothing else to prune
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} job cards'))
@@ -0,0 +1,70 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from job.models import Notification
+from job.notifications import get_sender, render_digest
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Send one digest per recipient whose unsent notifications have waited out the batching window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window-minutes', type=int, default=settings.NOTIFICATION_DIGEST_WINDOW_MINUTES)
+        parser.add_argument('--chunk-size', type=int, default=500, help='Recipients per chunk')
+        parser.add_argument('--loop', action='store_true', help='Keep running, checking every --interval seconds')
+        parser.add_argument('--interval', type=int, default=60)
+        parser.add_argument(
+            '--purge-days', type=int, default=30,
+            help='Delete notifications sent more than this many days ago',
+        )
+
+    def handle(self, *args, **options):
+        window = timedelta(minutes=options['window_minutes'])
+        sender = get_sender()
+        while True:
+            recipients, sent = self.send_due(sender, window, options['chunk_size'])
+            purged, _ = Notification.objects.filter(
+                sent_at__lt=timezone.now() - timedelta(days=options['purge_days'])
+            ).delete()
+            self.stdout.write(f'Sent {recipients} digests covering {sent} notifications; purged {purged}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def send_due(self, sender, window, chunk_size):
+        recipients = sent = 0
+        after_id = 0
+        while True:
+            recipient_ids = Notification.objects.due_recipient_ids(window, after_id=after_id, limit=chunk_size)
+            if not recipient_ids:
+                break
+            pending = (
+                Notification.objects.pending().filter(recipient_id__in=recipient_ids)
+                .select_related('recipient', 'actor', 'job').order_by('recipient_id', 'created_at')
+            )
+            by_recipient = {}
+            for notification in pending:
+                by_recipient.setdefault(notification.recipient_id, []).append(notification)
+
+            delivered = []
+            for notifications in by_recipient.values():
+                recipient = notifications[0].recipient
+                try:
+                    sender.send(recipient, *render_digest(recipient, notifications))
+                except Exception:
+                    # Left unsent, so the next run retries this recipient
+                    logger.exception('Sending notification digest to user %s failed', recipient.pk)
+                    continue
+                delivered += [notification.pk for notification in notifications]
+                recipients += 1
+            Notification.objects.filter(pk__in=delivered).update(sent_at=timezone.now())
+            sent += len(delivered)
+            after_id = recipient_ids[-1]
+        return recipients, sent
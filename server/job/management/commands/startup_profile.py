@@ -0,0 +1,90 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from job.warmup import STEPS
+
+# Run in a fresh interpreter, so nothing this process already imported is hidden:
+# boot the WSGI application as gunicorn does, then import the views as the first request would
+CHILD = '''
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+os.environ['WARMUP_ON_START'] = 'False'
+started = time.perf_counter()
+import api.wsgi
+booted = time.perf_counter()
+from job.warmup import warm
+timings = warm(json.loads(sys.argv[1]))
+print(json.dumps({'boot_ms': (booted - started) * 1000, 'warmup_ms': timings}))
+'''
+
+
+def parse_importtime(output):
+    """[(module, self_us, cumulative_us)] from the stderr of `python -X importtime`"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Time a cold worker start: module import times, then each warmup step'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Modules to list')
+        parser.add_argument('--sort', choices=('self', 'cumulative'), default='cumulative')
+        parser.add_argument('--prefix', help="Only modules under this package, e.g. 'job'")
+        parser.add_argument(
+            '--steps', default=','.join(settings.WARMUP_STEPS),
+            help=f"Comma-separated warmup steps to time after the imports ({', '.join(STEPS)}); '' for none",
+        )
+
+    def handle(self, *args, **options):
+        steps = [step.strip() for step in options['steps'].split(',') if step.strip()]
+        unknown = [step for step in steps if step not in STEPS]
+        if unknown:
+            raise CommandError(f"Unknown warmup steps {', '.join(unknown)}; choose from {', '.join(STEPS)}")
+
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD, json.dumps(steps)],
+            cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+        )
+        modules = parse_importtime(result.stderr)
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        if result.returncode:
+            raise CommandError('The worker failed to start:\n' + '\n'.join(errors[-20:]))
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(f"Boot (settings, apps, WSGI handler): {report['boot_ms']:.0f} ms")
+        for step, ms in report['warmup_ms'].items():
+            self.stdout.write(f'  warmup {step}: ' + (f'{ms:.0f} ms' if ms is not None else 'failed'))
+        if None in report['warmup_ms'].values():
+            self.stderr.write('\n'.join(errors))
+        self.stdout.write(
+            f'{len(modules)} modules imported, {sum(module[1] for module in modules) / 1000:.0f} ms in total'
+        )
+
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split('.')[0]] += self_us
+        self.stdout.write('\nBy top-level package (self ms):')
+        for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'{self_us / 1000:9.1f}  {package}')
+
+        prefix = options['prefix']
+        if prefix:
+            modules = [module for module in modules if module[0] == prefix or module[0].startswith(prefix + '.')]
+        key = 1 if options['sort'] == 'self' else 2
+        self.stdout.write(f"\nSlowest modules by {options['sort']} time (self ms, cumulative ms):")
+        for name, self_us, cumulative_us in sorted(modules, key=lambda module: -module[key])[:options['top']]:
+            self.stdout.write(f'{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}')
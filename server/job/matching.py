@@ -0,0 +1,78 @@
+import hashlib
+import json
+import re
+
+
+WORD_RE = re.compile(r'[a-z0-9+#.]{2,}')
+
+STOPWORDS = frozenset(
+    'and the for with you our are will has have from that this your who can all not '
+    'job role work team years year experience able any etc using use'.split()
+)
+
+# Fields each side of a match depends on; a change to any of them invalidates the pair
+JOB_MATCH_FIELDS = ('title', 'description', 'requirements')
+SEEKER_MATCH_FIELDS = ('skills', 'experience', 'bio')
+
+
+def fingerprint(values):
+    """Short stable hash of the fields a score was computed from"""
+    payload = json.dumps(values, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def job_fingerprint(job):
+    return fingerprint([getattr(job, field) for field in JOB_MATCH_FIELDS])
+
+
+def seeker_fingerprint(seeker):
+    return fingerprint([getattr(seeker, field) for field in SEEKER_MATCH_FIELDS])
+
+
+def _as_list(value):
+    if isinstance(value, str):
+        return [value]
+    return [item for item in value or [] if isinstance(item, str)]
+
+
+def _words(*texts):
+    return {
+        word for text in texts if text
+        for word in WORD_RE.findall(text.lower())
+        if word not in STOPWORDS
+    }
+
+
+def matching_skills(skills, requirements):
+    """Seeker skills that appear in (or contain) one of the job requirements"""
+    requirements = [req.lower() for req in _as_list(requirements)]
+    return [
+        skill for skill in _as_list(skills)
+        if any(skill.lower() in req or req in skill.lower() for req in requirements)
+    ]
+
+
+def compute_match_score(job, seeker):
+    """Score a seeker against a job on a 0-100 scale.
+
+    Mirrors the client's fallback scoring (base 30, up to 50 for requirement
+    coverage, 10 for a well-documented profile) plus up to 10 for vocabulary
+    shared between the posting and the seeker's experience/bio.
+    """
+    skills = _as_list(seeker.skills)
+    requirements = _as_list(job.requirements)
+    matched = matching_skills(skills, requirements)
+
+    score = 30.0
+    if requirements:
+        score += min(len(matched) / len(requirements), 1.0) * 50
+    if len(skills) > 5:
+        score += 10
+
+    job_words = _words(job.title, job.description, ' '.join(requirements))
+    seeker_words = _words(seeker.experience, seeker.bio, ' '.join(skills))
+    if job_words and seeker_words:
+        overlap = len(job_words & seeker_words) / (len(job_words) * len(seeker_words)) ** 0.5
+        score += 10 * overlap
+
+    return min(100, max(0, round(score)))
@@ -0,0 +1,115 @@
+"""Message send path: participant checks, conversation resolution and the write.
+
+Participants (role, active flag) and conversations (employer/seeker pair <-> id) are
+cached in CACHES, so a warm send is two statements in one transaction: an UPDATE
+that bumps the conversation's updated_at (and proves it still exists and that the
+sender belongs to it) followed by the Message INSERT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Conversation, Message, User
+
+
+class MessagingError(Exception):
+    """A send that must be refused; `field` is set for request-validation errors"""
+
+    def __init__(self, error, status, field=None):
+        self.error = error
+        self.status = status
+        self.field = field
+
+
+def _participant_key(user_id):
+    return f'messaging:participant:{user_id}'
+
+
+def _pair_key(employer_id, seeker_id):
+    return f'messaging:pair:{employer_id}:{seeker_id}'
+
+
+def _conversation_key(conversation_id):
+    return f'messaging:conversation:{conversation_id}'
+
+
+def participant_role(user_id):
+    """Role of an active user, None if there is no such user; cached"""
+    key = _participant_key(user_id)
+    role = cache.get(key)
+    if role is None:
+        role = User.objects.filter(pk=user_id, is_active=True).values_list('role', flat=True).first() or ''
+        cache.set(key, role, settings.MESSAGING_CACHE_SECONDS)
+    return role or None
+
+
+def forget_participant(user_id):
+    cache.delete(_participant_key(user_id))
+
+
+def conversation_pair(sender, recipient_id):
+    """(employer_id, seeker_id) for a message from sender to recipient, or MessagingError"""
+    recipient_role = participant_role(recipient_id)
+    if recipient_role is None:
+        raise MessagingError('Recipient not found', 400, field='recipient_id')
+    if sender.role == 'employer' and recipient_role == 'seeker':
+        return sender.pk, recipient_id
+    if sender.role == 'seeker' and recipient_role == 'employer':
+        return recipient_id, sender.pk
+    raise MessagingError('Messages can only be sent between employers and seekers', 400)
+
+
+def _remember(conversation):
+    cache.set_many({
+        _pair_key(conversation.employer_id, conversation.seeker_id): conversation.pk,
+        _conversation_key(conversation.pk): (conversation.employer_id, conversation.seeker_id),
+    }, settings.MESSAGING_CACHE_SECONDS)
+
+
+def _bump(conversation_id, now, member_id=None):
+    """Touch updated_at; 0 if the conversation is gone (or member_id is not part of it)"""
+    conversations = Conversation.objects.filter(pk=conversation_id)
+    if member_id is not None:
+        conversations = conversations.filter(Q(employer_id=member_id) | Q(seeker_id=member_id))
+    return conversations.update(updated_at=now)
+
+
+def _insert(conversation, sender, content):
+    message = Message(conversation=conversation, sender=sender, content=content)
+    message.save(force_insert=True)
+    return message
+
+
+def send(sender, recipient_id, content):
+    """Send content from sender to recipient_id; returns (message, conversation_id)"""
+    employer_id, seeker_id = conversation_pair(sender, recipient_id)
+    now = timezone.now()
+    with transaction.atomic():
+        conversation_id = cache.get(_pair_key(employer_id, seeker_id))
+        if conversation_id is None or not _bump(conversation_id, now):
+            conversation, created = Conversation.objects.get_or_create(employer_id=employer_id, seeker_id=seeker_id)
+            if not created:
+                _bump(conversation.pk, now)
+            _remember(conversation)
+        else:
+            conversation = Conversation(pk=conversation_id, employer_id=employer_id, seeker_id=seeker_id)
+        message = _insert(conversation, sender, content)
+    return message, conversation.pk
+
+
+def reply(sender, conversation_id, content):
+    """Post content into one of sender's conversations; returns the message"""
+    now = timezone.now()
+    with transaction.atomic():
+        if not _bump(conversation_id, now, member_id=sender.pk):
+            raise MessagingError('Conversation not found', 404)
+        pair = cache.get(_conversation_key(conversation_id))
+        if pair is None:
+            conversation = Conversation.objects.only('employer_id', 'seeker_id').get(pk=conversation_id)
+            _remember(conversation)
+        else:
+            conversation = Conversation(pk=conversation_id, employer_id=pair[0], seeker_id=pair[1])
+        message = _insert(conversation, sender, content)
+    return message
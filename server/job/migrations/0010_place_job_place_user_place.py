@@ -0,0 +1,40 @@
+# Generated by Django 4.2.25 on 2026-10-19 01:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0009_job_salary_currency_job_salary_max_job_salary_min_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('key', models.CharField(db_index=True, max_length=255)),
+                ('country', models.CharField(max_length=2)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['latitude', 'longitude'], name='place_lat_lon_idx')],
+                'unique_together': {('key', 'country')},
+            },
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='place',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='job.place'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='place',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='users', to='job.place'),
+        ),
+    ]
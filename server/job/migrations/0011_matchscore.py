@@ -0,0 +1,32 @@
+# Generated by Django 4.2.25 on 2026-10-19 01:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0010_place_job_place_user_place'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(default=0)),
+                ('job_fingerprint', models.CharField(max_length=16)),
+                ('seeker_fingerprint', models.CharField(max_length=16)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='job.job')),
+                ('seeker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['job', '-score'], name='matchscore_job_score_idx'), models.Index(fields=['seeker', '-score'], name='matchscore_seeker_score_idx')],
+                'unique_together': {('job', 'seeker')},
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.25 on 2026-10-19 01:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_job_cards(apps, schema_editor):
+    Job = apps.get_model('job', 'Job')
+    JobCard = apps.get_model('job', 'JobCard')
+    batch = []
+    for job in Job.objects.select_related('posted_by').iterator(chunk_size=1000):
+        employer = job.posted_by
+        batch.append(JobCard(
+            job_id=job.pk, employer_id=employer.pk,
+            title=job.title, company=job.company, location=job.location, place_id=job.place_id,
+            type=job.type, description=job.description, requirements=job.requirements,
+            salary=job.salary, salary_min=job.salary_min, salary_max=job.salary_max,
+            salary_currency=job.salary_currency, salary_period=job.salary_period,
+            posted_at=job.posted_at, applicant_count=job.applicant_count,
+            employer_name=employer.name or '', employer_company=employer.company or '',
+            employer_avatar_url=employer.avatar.url if employer.avatar else '',
+        ))
+        if len(batch) == 1000:
+            JobCard.objects.bulk_create(batch)
+            batch = []
+    JobCard.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0011_matchscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCard',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='job.job')),
+                ('title', models.CharField(max_length=255)),
+                ('company', models.CharField(max_length=255)),
+                ('location', models.CharField(max_length=255)),
+                ('type', models.CharField(choices=[('full-time', 'Full Time'), ('part-time', 'Part Time'), ('contract', 'Contract'), ('remote', 'Remote')], max_length=20)),
+                ('description', models.TextField()),
+                ('requirements', models.JSONField(default=list)),
+                ('salary', models.CharField(blank=True, max_length=100, null=True)),
+                ('salary_min', models.PositiveIntegerField(blank=True, null=True)),
+                ('salary_max', models.PositiveIntegerField(blank=True, null=True)),
+                ('salary_currency', models.CharField(blank=True, max_length=3, null=True)),
+                ('salary_period', models.CharField(blank=True, max_length=10, null=True)),
+                ('posted_at', models.DateTimeField()),
+                ('applicant_count', models.PositiveIntegerField(default=0)),
+                ('employer_name', models.CharField(blank=True, max_length=255)),
+                ('employer_company', models.CharField(blank=True, max_length=255)),
+                ('employer_avatar_url', models.CharField(blank=True, max_length=500)),
+                ('employer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('place', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='job.place')),
+            ],
+            options={
+                'ordering': ['-posted_at'],
+                'indexes': [models.Index(fields=['-posted_at'], name='jobcard_posted_idx'), models.Index(fields=['employer', '-posted_at'], name='jobcard_employer_posted_idx'), models.Index(fields=['salary_min'], name='jobcard_salary_min_idx'), models.Index(fields=['salary_max'], name='jobcard_salary_max_idx')],
+            },
+        ),
+        migrations.RunPython(populate_job_cards, migrations.RunPython.noop),
+    ]
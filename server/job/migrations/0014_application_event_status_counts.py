@@ -0,0 +1,85 @@
+# Generated by Django 4.2.25 on 2026-10-19 02:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_counts_and_events(apps, schema_editor):
+    Application = apps.get_model('job', 'Application')
+    ApplicationEvent = apps.get_model('job', 'ApplicationEvent')
+    Job = apps.get_model('job', 'Job')
+
+    counts = {}
+    for job_id, status, total in (
+        Application.objects.order_by().values_list('job_id', 'status').annotate(total=models.Count('pk'))
+    ):
+        counts.setdefault(job_id, {})[f'{status}_count'] = total
+    for job_id, fields in counts.items():
+        Job.objects.filter(pk=job_id).update(**fields)
+
+    # History before the log existed is unknown: record the application, then its current status
+    batch = []
+    for app in Application.objects.order_by('pk').iterator(chunk_size=1000):
+        batch.append(ApplicationEvent(
+            application_id=app.pk, job_id=app.job_id, seeker_id=app.seeker_id,
+            to_status='pending', created_at=app.applied_at,
+        ))
+        if app.status != 'pending':
+            batch.append(ApplicationEvent(
+                application_id=app.pk, job_id=app.job_id, seeker_id=app.seeker_id,
+                from_status='pending', to_status=app.status, created_at=app.updated_at,
+            ))
+        if len(batch) >= 1000:
+            ApplicationEvent.objects.bulk_create(batch)
+            batch = []
+    ApplicationEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0013_messagearchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rejected_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='reviewed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ApplicationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('to_status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('application', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='job.application')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='application_events', to='job.job')),
+                ('seeker', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='application_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['job', 'created_at'], name='appevent_job_created_idx'), models.Index(fields=['application', 'created_at'], name='appevent_app_created_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_counts_and_events, migrations.RunPython.noop),
+    ]
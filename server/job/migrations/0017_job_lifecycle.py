@@ -0,0 +1,104 @@
+# Generated by Django 4.2.25 on 2026-10-19 02:06
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.core.serializers.json
+import django.db.models.deletion
+
+
+def set_expiry(apps, schema_editor):
+    # Existing postings get the default lifetime from when they were posted; the next
+    # archive_jobs run marks those already past it as expired
+    lifetime = timedelta(days=settings.JOB_DEFAULT_LIFETIME_DAYS)
+    apps.get_model('job', 'Job').objects.update(expires_at=models.F('posted_at') + lifetime)
+    apps.get_model('job', 'JobCard').objects.update(expires_at=models.F('posted_at') + lifetime)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0016_job_duplicates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('seeker_id', models.BigIntegerField(db_index=True)),
+                ('status', models.CharField(max_length=20)),
+                ('applied_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('events', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+            ],
+            options={
+                'ordering': ['-applied_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('posted_by_id', models.BigIntegerField(db_index=True)),
+                ('title', models.CharField(max_length=255)),
+                ('company', models.CharField(max_length=255)),
+                ('status', models.CharField(max_length=10)),
+                ('posted_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-posted_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('closed', 'Closed'), ('expired', 'Expired')], default='open', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='jobcard',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobcard',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('closed', 'Closed'), ('expired', 'Expired')], default='open', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['-posted_at'], name='job_open_posted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['expires_at'], name='job_open_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'open'), _negated=True), fields=['closed_at'], name='job_closed_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['-posted_at'], name='jobcard_open_posted_idx'),
+        ),
+        migrations.AddField(
+            model_name='applicationarchive',
+            name='job',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='job.jobarchive'),
+        ),
+        migrations.RunPython(set_expiry, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.25 on 2026-10-19 02:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_skills(apps, schema_editor):
+    User = apps.get_model('job', 'User')
+    UserSkill = apps.get_model('job', 'UserSkill')
+
+    batch = []
+    for user_id, skills in User.objects.order_by('pk').values_list('pk', 'skills').iterator(chunk_size=1000):
+        names = {' '.join(skill.split()).lower()[:100] for skill in skills or [] if isinstance(skill, str) and skill.strip()}
+        batch.extend(UserSkill(user_id=user_id, name=name) for name in names)
+        if len(batch) >= 1000:
+            UserSkill.objects.bulk_create(batch)
+            batch = []
+    UserSkill.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0017_job_lifecycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['role', '-id'], name='user_active_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['industry'], name='user_industry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['company_size'], name='user_company_size_idx'),
+        ),
+        migrations.AddField(
+            model_name='userskill',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_rows', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='userskill',
+            index=models.Index(fields=['name', 'user'], name='userskill_name_user_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='userskill',
+            unique_together={('user', 'name')},
+        ),
+        migrations.RunPython(backfill_skills, migrations.RunPython.noop),
+    ]
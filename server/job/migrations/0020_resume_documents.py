@@ -0,0 +1,60 @@
+# Generated by Django 4.2.25 on 2026-10-19 02:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def queue_existing_resumes(apps, schema_editor):
+    User = apps.get_model('job', 'User')
+    ResumeDocument = apps.get_model('job', 'ResumeDocument')
+
+    batch = []
+    resumes = User.objects.exclude(resume__isnull=True).exclude(resume='').order_by('pk').values_list('pk', 'resume')
+    for user_id, resume in resumes.iterator(chunk_size=1000):
+        batch.append(ResumeDocument(user_id=user_id, source_url=resume))
+        if len(batch) >= 1000:
+            ResumeDocument.objects.bulk_create(batch)
+            batch = []
+    ResumeDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0019_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeDocument',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resume_document', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('source_url', models.URLField(max_length=500)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('indexed', 'Indexed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('text', models.TextField(blank=True)),
+                ('skills', models.JSONField(blank=True, default=list)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('indexed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'user'], name='resumedoc_status_user_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumeTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resume_terms', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'user'], name='resumeterm_term_user_idx')],
+                'unique_together': {('user', 'term')},
+            },
+        ),
+        migrations.RunPython(queue_existing_resumes, migrations.RunPython.noop),
+    ]
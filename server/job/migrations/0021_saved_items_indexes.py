@@ -0,0 +1,21 @@
+# Generated by Django 4.2.25 on 2026-10-19 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0020_resume_documents'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savedcandidate',
+            index=models.Index(fields=['employer', '-saved_at'], name='savedcand_employer_saved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedjob',
+            index=models.Index(fields=['seeker', '-saved_at'], name='savedjob_seeker_saved_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.25 on 2026-10-19 03:43
+
+from django.db import migrations, models
+
+
+def copy_employer_emails(apps, schema_editor):
+    JobCard = apps.get_model('job', 'JobCard')
+    User = apps.get_model('job', 'User')
+    JobCard.objects.update(employer_email=models.Subquery(
+        User.objects.filter(pk=models.OuterRef('employer_id')).values('email')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0021_saved_items_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobcard',
+            name='employer_email',
+            field=models.EmailField(blank=True, max_length=254),
+        ),
+        migrations.RunPython(copy_employer_emails, migrations.RunPython.noop),
+    ]
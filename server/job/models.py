@@ -1,6 +1,27 @@
-from django.db import models
+import re
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models import BigIntegerField, Count, F, Max, Min, Q
+from django.db.models.functions import Cast, Substr
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 
+from . import facets
+from .archive import decode_messages
+from .geo import bounding_box, haversine_km, place_name_candidates
+from .matching import compute_match_score, job_fingerprint, seeker_fingerprint
+from .salary import parse_salary
+
+
+# Numeric username suffixes up to this long are counted (they still cast to a 64-bit
+# integer); a fallback suffix is this many random digits
+MAX_COUNTED_SUFFIX_DIGITS = 18
+RANDOM_SUFFIX_DIGITS = 9
+
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, username, password=None, role='seeker', **extra_fields):
@@ -14,12 +35,112 @@ class CustomUserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def next_free_username(self, base):
+        """`base` if unused, else base + (highest existing numeric suffix + 1), in one query.
+
+        The startswith filter is a range scan on the username index; only rows
+        shaped exactly like base<digits> are cast and aggregated. Suffixes longer
+        than a 64-bit integer holds are not counted, so a name built from them may
+        already be taken; create_user_with_free_username then picks a random suffix.
+        """
+        suffixed = Q(username__regex=rf'^{re.escape(base)}[0-9]{{1,{MAX_COUNTED_SUFFIX_DIGITS}}}$')
+        taken = self.filter(username__startswith=base).aggregate(
+            exact=Count('pk', filter=Q(username=base)),
+            top=Max(Cast(Substr('username', len(base) + 1), BigIntegerField()), filter=suffixed),
+        )
+        if not taken['exact']:
+            return base
+        username = f"{base}{(taken['top'] or 0) + 1}"
+        if len(username) > self.model._meta.get_field('username').max_length:
+            return self.random_username(base)
+        return username
+
+    @staticmethod
+    def random_username(base):
+        return f'{base}{secrets.randbelow(10 ** RANDOM_SUFFIX_DIGITS)}'
+
+    def create_user_with_free_username(self, email, base_username, password=None, attempts=5, **extra_fields):
+        """create_user() with the next free `base_username` variant, retrying if a concurrent
+        signup claims the same one first"""
+        base_username = base_username[:140]  # leave room for the suffix within max_length
+        tried = set()
+        for attempt in range(attempts):
+            username = self.next_free_username(base_username)
+            if username in tried:
+                # Still taken after a retry, e.g. by a suffix too long to count: go random
+                username = self.random_username(base_username)
+            tried.add(username)
+            try:
+                with transaction.atomic():
+                    return self.create_user(email, username, password, **extra_fields)
+            except IntegrityError:
+                # Only a lost race on the username is retried; e.g. a duplicate email is not
+                if attempt == attempts - 1 or not self.filter(username=username).exists():
+                    raise
+
     def create_superuser(self, email, username, password=None, **extra_fields):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
         return self.create_user(email, username, password, role='employer', **extra_fields)
 
 
+class PlaceManager(models.Manager):
+    def resolve(self, location):
+        """Match free-text location to a Place, trying the full text then each comma-separated part"""
+        candidates = place_name_candidates(location)
+        if not candidates:
+            return None
+        places = {place.key: place for place in self.filter(key__in=candidates)}
+        for key in candidates:
+            if key in places:
+                return places[key]
+        return None
+
+    def within(self, latitude, longitude, radius_km):
+        """Return [(place, distance_km)] within the radius, nearest first.
+
+        The bounding box is answered from the (latitude, longitude) index; only the
+        places inside it get an exact haversine check.
+        """
+        min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+        box = Q(latitude__gte=min_lat, latitude__lte=max_lat)
+        if min_lon < -180.0:
+            box &= Q(longitude__gte=min_lon + 360.0) | Q(longitude__lte=max_lon)
+        elif max_lon > 180.0:
+            box &= Q(longitude__gte=min_lon) | Q(longitude__lte=max_lon - 360.0)
+        else:
+            box &= Q(longitude__gte=min_lon, longitude__lte=max_lon)
+
+        matches = []
+        for place in self.filter(box):
+            distance = haversine_km(latitude, longitude, place.latitude, place.longitude)
+            if distance <= radius_km:
+                matches.append((place, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+
+class Place(models.Model):
+    """Normalized location loaded from the bundled offline gazetteer"""
+    name = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, db_index=True)  # normalized name used for lookups
+    country = models.CharField(max_length=2)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    objects = PlaceManager()
+
+    class Meta:
+        ordering = ['name']
+        unique_together = ['key', 'country']
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='place_lat_lon_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}, {self.country}"
+
+
 class User(AbstractUser):
     ROLE_CHOICES = (
         ('seeker', 'Seeker'),
@@ -35,6 +156,7 @@ class User(AbstractUser):
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, max_length=255)
     bio = models.TextField(blank=True, null=True)
     location = models.CharField(max_length=255, blank=True, null=True)
+    place = models.ForeignKey(Place, on_delete=models.SET_NULL, blank=True, null=True, related_name='users')
     phone = models.CharField(max_length=20, blank=True, null=True)
     website = models.URLField(max_length=500, blank=True, null=True)
     
@@ -71,14 +193,155 @@ class User(AbstractUser):
         help_text='Specific permissions for this user.'
     )
 
+    # Bumped by every save() that changes profile data; sent as the ETag and checked against If-Match
+    version = models.PositiveIntegerField(default=0)
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
+    # Bookkeeping columns whose writes do not count as an edit
+    UNVERSIONED_FIELDS = ('last_login',)
 
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Public directory pages: active users of one role, newest first
+            models.Index(fields=['role', '-id'], name='user_active_role_idx', condition=Q(is_active=True)),
+            models.Index(fields=['industry'], name='user_industry_idx'),
+            models.Index(fields=['company_size'], name='user_company_size_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'location' in update_fields:
+            self.place = Place.objects.resolve(self.location)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'place'}
+        adding = self._state.adding
+        if not adding and (update_fields is None or set(update_fields) - set(self.UNVERSIONED_FIELDS)):
+            self.version += 1
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'version'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not adding and self.role == 'employer' and (
+                update_fields is None or set(JobCard.EMPLOYER_FIELDS) & set(update_fields)
+            ):
+                JobCard.objects.sync_employer(self)
+            if update_fields is None or 'skills' in update_fields:
+                UserSkill.objects.sync(self, created=adding)
+            if update_fields is None or 'resume' in update_fields:
+                ResumeDocument.objects.track(self, created=adding)
+
+
+def normalize_skill(skill):
+    return ' '.join(skill.split()).lower()[:100]
+
+
+class UserSkillManager(models.Manager):
+    def sync(self, user, created=False):
+        """Make the user's rows match User.skills (called from User.save inside its transaction)"""
+        wanted = {normalize_skill(skill) for skill in user.skills or [] if isinstance(skill, str) and skill.strip()}
+        existing = set() if created else set(self.filter(user=user).values_list('name', flat=True))
+        if existing - wanted:
+            self.filter(user=user, name__in=existing - wanted).delete()
+        self.bulk_create([UserSkill(user=user, name=name) for name in wanted - existing])
+
+    def sync_many(self, users):
+        """Rows for freshly bulk-created users"""
+        self.bulk_create([
+            UserSkill(user=user, name=name)
+            for user in users
+            for name in {normalize_skill(skill) for skill in user.skills or [] if isinstance(skill, str) and skill.strip()}
+        ], batch_size=1000)
+
+
+class UserSkill(models.Model):
+    """One normalized skill of a user, so skill filters are an index lookup instead of a JSON scan"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='skill_rows')
+    name = models.CharField(max_length=100)
+
+    objects = UserSkillManager()
+
+    class Meta:
+        unique_together = ['user', 'name']
+        indexes = [
+            models.Index(fields=['name', 'user'], name='userskill_name_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.name}"
+
+
+class ResumeDocumentManager(models.Manager):
+    def track(self, user, created=False):
+        """Queue the user's resume for ingestion when the link changed (called from User.save).
+
+        The terms of the previous file stay searchable until `manage.py ingest_resumes`
+        replaces them; clearing the link drops the document and its terms at once.
+        """
+        if created:
+            if user.resume:
+                self.create(user=user, source_url=user.resume)
+            return
+        current = self.filter(user=user).values_list('source_url', flat=True).first()
+        if not user.resume:
+            if current is not None:
+                self.filter(user=user).delete()
+                ResumeTerm.objects.filter(user=user).delete()
+        elif current is None:
+            self.create(user=user, source_url=user.resume)
+        elif current != user.resume:
+            self.filter(user=user).update(source_url=user.resume, status='pending', error='', attempts=0)
+
+
+class ResumeDocument(models.Model):
+    """Text extracted from the file behind User.resume, filled in by `manage.py ingest_resumes`"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('indexed', 'Indexed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='resume_document')
+    source_url = models.URLField(max_length=500)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    content_hash = models.CharField(max_length=64, blank=True)  # sha256 of the fetched file
+    text = models.TextField(blank=True)  # NFKC, whitespace collapsed
+    skills = models.JSONField(default=list, blank=True)  # known skills found in the text
+    error = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    indexed_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ResumeDocumentManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'user'], name='resumedoc_status_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.status}"
+
+
+class ResumeTerm(models.Model):
+    """One distinct word of a user's ingested resume: the inverted index behind ?resume= searches"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resume_terms')
+    term = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ['user', 'term']
+        indexes = [
+            models.Index(fields=['term', 'user'], name='resumeterm_term_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.term}"
+
 
 class Job(models.Model):
     JOB_TYPE_CHOICES = [
@@ -87,24 +350,238 @@ class Job(models.Model):
         ('contract', 'Contract'),
         ('remote', 'Remote'),
     ]
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('closed', 'Closed'),
+        ('expired', 'Expired'),
+    ]
 
     title = models.CharField(max_length=255)
     company = models.CharField(max_length=255)
     location = models.CharField(max_length=255)
+    place = models.ForeignKey(Place, on_delete=models.SET_NULL, blank=True, null=True, related_name='jobs')
     description = models.TextField()
     requirements = models.JSONField(default=list)  # Store as JSON array
     salary = models.CharField(max_length=100, blank=True, null=True)
+    # Structured salary, parsed from `salary` on save so filters and sorting hit an index
+    salary_min = models.PositiveIntegerField(blank=True, null=True)
+    salary_max = models.PositiveIntegerField(blank=True, null=True)
+    salary_currency = models.CharField(max_length=3, blank=True, null=True)
+    salary_period = models.CharField(max_length=10, blank=True, null=True)
     type = models.CharField(max_length=20, choices=JOB_TYPE_CHOICES, default='full-time')
     posted_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs')
     posted_at = models.DateTimeField(auto_now_add=True)
+    # Lifecycle: open until the employer closes it or expires_at passes (see archive_jobs)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    expires_at = models.DateTimeField(blank=True, null=True)  # None: never expires
+    closed_at = models.DateTimeField(blank=True, null=True)
     applicant_count = models.PositiveIntegerField(default=0)
+    # Applications per status, kept in step by Application.save and its post_delete handler
+    pending_count = models.PositiveIntegerField(default=0)
+    reviewed_count = models.PositiveIntegerField(default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    # Earliest posting this one near-duplicates (see job.dedup); None for originals
+    duplicate_of = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, blank=True, null=True, related_name='duplicates'
+    )
+    # Bumped by every save(); sent as the ETag and checked against If-Match
+    version = models.PositiveIntegerField(default=0)
+
+    # Only ever changed with F() updates; a full save() must not write back stale values
+    COUNTER_FIELDS = ('applicant_count', 'pending_count', 'reviewed_count', 'accepted_count', 'rejected_count')
 
     class Meta:
         ordering = ['-posted_at']
+        indexes = [
+            models.Index(fields=['salary_min'], name='job_salary_min_idx'),
+            models.Index(fields=['salary_max'], name='job_salary_max_idx'),
+            # Partial indexes: listing walks only the live set, expiry/archival only their candidates
+            models.Index(fields=['-posted_at'], name='job_open_posted_idx', condition=Q(status='open')),
+            models.Index(fields=['expires_at'], name='job_open_expires_idx', condition=Q(status='open')),
+            models.Index(fields=['closed_at'], name='job_closed_at_idx', condition=~Q(status='open')),
+        ]
 
     def __str__(self):
         return f"{self.title} at {self.company}"
 
+    def parse_salary(self):
+        """Refresh the structured salary columns from the free-form `salary` text"""
+        (self.salary_min, self.salary_max,
+         self.salary_currency, self.salary_period) = parse_salary(self.salary)
+
+    def is_open(self):
+        return self.status == 'open' and (self.expires_at is None or self.expires_at > timezone.now())
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self._state.adding and self.expires_at is None and self.status == 'open':
+            self.expires_at = timezone.now() + timedelta(days=settings.JOB_DEFAULT_LIFETIME_DAYS)
+        if update_fields is None or 'status' in update_fields:
+            if self.status == 'open':
+                self.closed_at = None
+            elif self.closed_at is None:
+                self.closed_at = timezone.now()
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = set(update_fields) | {'closed_at'}
+        if update_fields is None or 'location' in update_fields:
+            self.place = Place.objects.resolve(self.location)
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = set(update_fields) | {'place'}
+        if update_fields is None or 'salary' in update_fields:
+            self.parse_salary()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {
+                    'salary_min', 'salary_max', 'salary_currency', 'salary_period'
+                }
+        adding = self._state.adding
+        if not adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        if not adding and kwargs['update_fields']:
+            self.version += 1
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'version'}
+        # Keep the denormalized list card in step within the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            JobCard.objects.sync_job(self, created=adding)
+
+    def status_counts(self):
+        return {status: getattr(self, f'{status}_count') for status, _ in Application.STATUS_CHOICES}
+
+
+class JobCardManager(models.Manager):
+    @staticmethod
+    def employer_values(employer):
+        return {
+            'employer_name': employer.name or '',
+            'employer_email': employer.email or '',
+            'employer_company': employer.company or '',
+            'employer_avatar_url': employer.avatar.url if employer.avatar else '',
+        }
+
+    def card_for(self, job, employer):
+        return JobCard(
+            job_id=job.pk,
+            employer_id=employer.pk,
+            **self.employer_values(employer),
+            **{field: getattr(job, field) for field in JobCard.JOB_FIELDS},
+        )
+
+    def sync_job(self, job, created=False):
+        """Write the card for one job (called from Job.save inside its transaction)"""
+        card = self.card_for(job, job.posted_by)
+        if created:
+            card.save(force_insert=True)
+            return
+        # applicant_count is maintained with F() updates (see Application.save), never copied back
+        values = {field: getattr(card, field) for field in JobCard.JOB_FIELDS if field != 'applicant_count'}
+        values.update(employer_id=card.employer_id, **self.employer_values(job.posted_by))
+        if not self.filter(job_id=job.pk).update(**values):
+            card.save(force_insert=True)
+
+    def sync_employer(self, employer):
+        """Copy an employer's display fields onto all of their cards in one UPDATE"""
+        self.filter(employer_id=employer.pk).update(**self.employer_values(employer))
+
+    def refresh(self, job_ids):
+        """Rebuild the cards for these jobs, e.g. after a bulk_update/QuerySet.update on Job"""
+        cards = [
+            self.card_for(job, job.posted_by)
+            for job in Job.objects.filter(pk__in=job_ids).select_related('posted_by')
+        ]
+        self.bulk_create(
+            cards,
+            update_conflicts=True,
+            unique_fields=['job'],
+            update_fields=[*JobCard.JOB_FIELDS, 'employer', *JobCard.EMPLOYER_FIELDS.values()],
+        )
+        facets.invalidate()
+
+
+class JobCard(models.Model):
+    """Denormalized read model holding exactly what job list views render, one row per job"""
+    # Job fields copied verbatim onto the card
+    JOB_FIELDS = (
+        'title', 'company', 'location', 'place_id', 'type', 'description', 'requirements',
+        'salary', 'salary_min', 'salary_max', 'salary_currency', 'salary_period',
+        'posted_at', 'status', 'expires_at', 'applicant_count', 'duplicate_of_id',
+    )
+    # User field -> card field for the posting employer
+    EMPLOYER_FIELDS = {
+        'name': 'employer_name',
+        'email': 'employer_email',
+        'company': 'employer_company',
+        'avatar': 'employer_avatar_url',
+    }
+
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    employer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', db_index=False)
+    title = models.CharField(max_length=255)
+    company = models.CharField(max_length=255)
+    location = models.CharField(max_length=255)
+    place = models.ForeignKey(Place, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    type = models.CharField(max_length=20, choices=Job.JOB_TYPE_CHOICES)
+    description = models.TextField()
+    requirements = models.JSONField(default=list)
+    salary = models.CharField(max_length=100, blank=True, null=True)
+    salary_min = models.PositiveIntegerField(blank=True, null=True)
+    salary_max = models.PositiveIntegerField(blank=True, null=True)
+    salary_currency = models.CharField(max_length=3, blank=True, null=True)
+    salary_period = models.CharField(max_length=10, blank=True, null=True)
+    posted_at = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=Job.STATUS_CHOICES, default='open')
+    expires_at = models.DateTimeField(blank=True, null=True)
+    applicant_count = models.PositiveIntegerField(default=0)
+    duplicate_of = models.ForeignKey(
+        Job, on_delete=models.SET_NULL, blank=True, null=True, related_name='+', db_index=False
+    )
+    employer_name = models.CharField(max_length=255, blank=True)
+    employer_email = models.EmailField(blank=True)
+    employer_company = models.CharField(max_length=255, blank=True)
+    employer_avatar_url = models.CharField(max_length=500, blank=True)
+
+    objects = JobCardManager()
+
+    class Meta:
+        ordering = ['-posted_at']
+        indexes = [
+            models.Index(fields=['-posted_at'], name='jobcard_posted_idx'),
+            models.Index(fields=['-posted_at'], name='jobcard_open_posted_idx', condition=Q(status='open')),
+            models.Index(fields=['employer', '-posted_at'], name='jobcard_employer_posted_idx'),
+            models.Index(fields=['salary_min'], name='jobcard_salary_min_idx'),
+            models.Index(fields=['salary_max'], name='jobcard_salary_max_idx'),
+        ]
+
+    def __str__(self):
+        return f"Card for job {self.job_id}: {self.title}"
+
+
+class JobSignature(models.Model):
+    """MinHash signature of a job's text, NUM_PERM little-endian uint32s (see job.dedup)"""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    minhash = models.BinaryField()
+
+    def __str__(self):
+        return f"Signature for job {self.job_id}"
+
+
+class JobSignatureBand(models.Model):
+    """LSH bucket of one band of a job's signature; jobs sharing any bucket are duplicate candidates"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='jobsigband_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.job_id} band {self.band}"
+
 
 class SavedCandidate(models.Model):
     """Model to store employer's saved/shortlisted candidates"""
@@ -118,6 +595,9 @@ class SavedCandidate(models.Model):
     class Meta:
         ordering = ['-saved_at']
         unique_together = ['employer', 'candidate']  # Prevent duplicate saves
+        indexes = [
+            models.Index(fields=['employer', '-saved_at'], name='savedcand_employer_saved_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employer.email} saved {self.candidate.email}"
@@ -131,6 +611,13 @@ class Application(models.Model):
         ('accepted', 'Accepted'),
         ('rejected', 'Rejected'),
     ]
+    # Funnel state machine: status -> statuses it may move to
+    TRANSITIONS = {
+        'pending': {'reviewed', 'accepted', 'rejected'},
+        'reviewed': {'pending', 'accepted', 'rejected'},
+        'accepted': {'reviewed', 'rejected'},
+        'rejected': {'reviewed', 'accepted'},
+    }
 
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     seeker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='applications')
@@ -145,6 +632,69 @@ class Application(models.Model):
     def __str__(self):
         return f"{self.seeker.email} applied to {self.job.title}"
 
+    def can_move_to(self, status):
+        return status == self.status or status in self.TRANSITIONS.get(self.status, ())
+
+    def save(self, *args, **kwargs):
+        """Save, logging an ApplicationEvent and moving the job's status counters on create
+        or status change. Set `changed_by` on the instance to record who made the change."""
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            old_status = None
+            if not adding and (update_fields is None or 'status' in update_fields):
+                old_status = (
+                    Application.objects.select_for_update().filter(pk=self.pk)
+                    .values_list('status', flat=True).first()
+                )
+            super().save(*args, **kwargs)
+            if adding or (old_status is not None and old_status != self.status):
+                self.move_job_counters(old_status, self.status)
+                ApplicationEvent.objects.create(
+                    application=self, job_id=self.job_id, seeker_id=self.seeker_id,
+                    actor=getattr(self, 'changed_by', None),
+                    from_status=old_status, to_status=self.status,
+                )
+
+    def move_job_counters(self, old_status, new_status):
+        """Move this application between the job's status counters in one UPDATE
+        (old_status None: a new application; new_status None: a deleted one)"""
+        changes = {}
+        if old_status:
+            changes[f'{old_status}_count'] = F(f'{old_status}_count') - 1
+        if new_status:
+            changes[f'{new_status}_count'] = F(f'{new_status}_count') + 1
+        step = 1 if old_status is None else -1 if new_status is None else 0
+        if step:
+            changes['applicant_count'] = F('applicant_count') + step
+            JobCard.objects.filter(job_id=self.job_id).update(applicant_count=F('applicant_count') + step)
+        Job.objects.filter(pk=self.job_id).update(**changes)
+
+
+class ApplicationEvent(models.Model):
+    """Append-only log of application status changes, for funnel and time-in-stage metrics"""
+    application = models.ForeignKey(
+        Application, on_delete=models.SET_NULL, null=True, blank=True, related_name='events'
+    )
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='application_events')
+    seeker = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='application_events'
+    )
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    from_status = models.CharField(max_length=20, blank=True, null=True)  # None when applying
+    to_status = models.CharField(max_length=20)  # a status, or 'withdrawn'/'deleted'
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['job', 'created_at'], name='appevent_job_created_idx'),
+            models.Index(fields=['application', 'created_at'], name='appevent_app_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Application {self.application_id}: {self.from_status} -> {self.to_status}"
+
 
 class Conversation(models.Model):
     """Model to store conversations between employers and seekers"""
@@ -171,11 +721,55 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at'], name='message_conv_created_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.email} at {self.created_at}"
 
 
+class MessageArchiveManager(models.Manager):
+    def page(self, conversation, before_id=None, limit=50):
+        """Return up to `limit` archived message rows with id < before_id, oldest first"""
+        archives = self.filter(conversation=conversation).order_by('-last_message_id')
+        if before_id is not None:
+            archives = archives.filter(first_message_id__lt=before_id)
+        rows = []
+        for archive in archives.iterator():
+            rows.extend(
+                row for row in decode_messages(archive.data)
+                if before_id is None or row['id'] < before_id
+            )
+            if len(rows) >= limit:
+                break
+        rows.sort(key=lambda row: row['id'])
+        return rows[-limit:]
+
+
+class MessageArchive(models.Model):
+    """A compressed chunk of old messages moved out of the hot Message table by archive_messages"""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='archives')
+    first_message_id = models.BigIntegerField()
+    last_message_id = models.BigIntegerField()
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField()  # gzip-compressed JSON lines, see job.archive
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = MessageArchiveManager()
+
+    class Meta:
+        ordering = ['conversation', 'first_message_id']
+        indexes = [
+            models.Index(fields=['conversation', '-last_message_id'], name='msgarchive_conv_last_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.message_count} archived messages in conversation {self.conversation_id}"
+
+
 # Model for seekers saving jobs
 class SavedJob(models.Model):
     seeker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_jobs')
@@ -185,6 +779,158 @@ class SavedJob(models.Model):
     class Meta:
         ordering = ['-saved_at']
         unique_together = ['seeker', 'job']
+        indexes = [
+            models.Index(fields=['seeker', '-saved_at'], name='savedjob_seeker_saved_idx'),
+        ]
 
     def __str__(self):
         return f"{self.seeker.email} saved {self.job.title}"
+
+
+class MatchScoreManager(models.Manager):
+    def score_pair(self, job, seeker):
+        """Compute and upsert the score for one (job, seeker) pair"""
+        match, _ = self.update_or_create(
+            job=job, seeker=seeker,
+            defaults={
+                'score': compute_match_score(job, seeker),
+                'job_fingerprint': job_fingerprint(job),
+                'seeker_fingerprint': seeker_fingerprint(seeker),
+            },
+        )
+        return match
+
+    def refresh_for_job(self, job):
+        """Recompute only the stored pairs computed from an older version of this job"""
+        fp = job_fingerprint(job)
+        stale = list(self.filter(job=job).exclude(job_fingerprint=fp).select_related('seeker'))
+        for match in stale:
+            match.job = job
+            match.score = compute_match_score(job, match.seeker)
+            match.job_fingerprint = fp
+            match.seeker_fingerprint = seeker_fingerprint(match.seeker)
+            match.computed_at = timezone.now()
+        self.bulk_update(stale, ['score', 'job_fingerprint', 'seeker_fingerprint', 'computed_at'])
+        return len(stale)
+
+    def refresh_for_seeker(self, seeker):
+        """Recompute only the stored pairs computed from an older version of this seeker"""
+        fp = seeker_fingerprint(seeker)
+        stale = list(self.filter(seeker=seeker).exclude(seeker_fingerprint=fp).select_related('job'))
+        for match in stale:
+            match.seeker = seeker
+            match.score = compute_match_score(match.job, seeker)
+            match.job_fingerprint = job_fingerprint(match.job)
+            match.seeker_fingerprint = fp
+            match.computed_at = timezone.now()
+        self.bulk_update(stale, ['score', 'job_fingerprint', 'seeker_fingerprint', 'computed_at'])
+        return len(stale)
+
+
+class MatchScore(models.Model):
+    """Server-side match score for a (job, seeker) pair, recomputed when either side changes"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='match_scores')
+    seeker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='match_scores')
+    score = models.PositiveSmallIntegerField(default=0)
+    # Hashes of the job/seeker fields the score was computed from (see job.matching)
+    job_fingerprint = models.CharField(max_length=16)
+    seeker_fingerprint = models.CharField(max_length=16)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    objects = MatchScoreManager()
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = ['job', 'seeker']
+        indexes = [
+            models.Index(fields=['job', '-score'], name='matchscore_job_score_idx'),
+            models.Index(fields=['seeker', '-score'], name='matchscore_seeker_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.seeker.email} scores {self.score} for {self.job.title}"
+
+
+class NotificationManager(models.Manager):
+    def pending(self):
+        return self.filter(sent_at__isnull=True)
+
+    def due_recipient_ids(self, window, after_id=0, limit=500):
+        """Recipients whose oldest unsent notification has waited at least `window`, by id"""
+        cutoff = timezone.now() - window
+        return list(
+            self.pending().filter(recipient_id__gt=after_id)
+            .values('recipient_id').annotate(oldest=Min('created_at')).filter(oldest__lte=cutoff)
+            .order_by('recipient_id').values_list('recipient_id', flat=True)[:limit]
+        )
+
+
+class Notification(models.Model):
+    """One event a user should hear about; unsent rows are batched into digests"""
+    KIND_CHOICES = [
+        ('application', 'New application'),
+        ('status', 'Application status changed'),
+        ('message', 'New message'),
+    ]
+
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    actor = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )
+    detail = models.CharField(max_length=20, blank=True, default='')  # e.g. the new application status
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = NotificationManager()
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # Only unsent rows are ever scanned by the digest command
+            models.Index(
+                fields=['recipient', 'created_at'], name='notification_pending_idx',
+                condition=Q(sent_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.recipient_id} at {self.created_at}"
+
+
+class JobArchive(models.Model):
+    """A closed or expired job moved out of the hot tables by archive_jobs"""
+    id = models.BigIntegerField(primary_key=True)  # the original Job id
+    posted_by_id = models.BigIntegerField(db_index=True)
+    title = models.CharField(max_length=255)
+    company = models.CharField(max_length=255)
+    status = models.CharField(max_length=10)
+    posted_at = models.DateTimeField()
+    closed_at = models.DateTimeField(blank=True, null=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder)  # every other Job column, as stored
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-posted_at']
+
+    def __str__(self):
+        return f"Archived job {self.id}: {self.title}"
+
+
+class ApplicationArchive(models.Model):
+    """An application to an archived job, with its status history"""
+    id = models.BigIntegerField(primary_key=True)  # the original Application id
+    job = models.ForeignKey(JobArchive, on_delete=models.CASCADE, related_name='applications')
+    seeker_id = models.BigIntegerField(db_index=True)
+    status = models.CharField(max_length=20)
+    applied_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    events = models.JSONField(default=list, encoder=DjangoJSONEncoder)  # [{from_status, to_status, actor_id, created_at}]
+
+    class Meta:
+        ordering = ['-applied_at']
+
+    def __str__(self):
+        return f"Archived application {self.id} to job {self.job_id}"
@@ -0,0 +1,74 @@
+import json
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+def _name(user):
+    return (user.name or user.email) if user else 'Someone'
+
+
+def render_digest(recipient, notifications):
+    """Return (subject, body) summarising a recipient's unsent notifications"""
+    applications = Counter(n.job.title for n in notifications if n.kind == 'application' and n.job)
+    messages = Counter(_name(n.actor) for n in notifications if n.kind == 'message')
+    # Only the latest status per job matters
+    statuses = {n.job.title: n.detail for n in notifications if n.kind == 'status' and n.job}
+
+    parts, lines = [], []
+    if applications:
+        total = sum(applications.values())
+        parts.append(f"{total} new application{'s' if total != 1 else ''}")
+        lines.append('New applications:')
+        lines += [f'  {title}: {count}' for title, count in applications.most_common()]
+    if messages:
+        total = sum(messages.values())
+        parts.append(f"{total} new message{'s' if total != 1 else ''}")
+        lines.append('New messages:')
+        lines += [f'  from {name}: {count}' for name, count in messages.most_common()]
+    if statuses:
+        parts.append(f"{len(statuses)} application update{'s' if len(statuses) != 1 else ''}")
+        lines.append('Application updates:')
+        lines += [f'  {title}: {status}' for title, status in statuses.items()]
+
+    subject = 'You have ' + ' and '.join(parts) if parts else 'Your notifications'
+    body = f'Hi {_name(recipient)},\n\n' + '\n'.join(lines) + '\n'
+    return subject, body
+
+
+class ConsoleSender:
+    """Write digests to stdout (the default; handy in development)"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, recipient, subject, body):
+        self.stream.write(f'To: {recipient.email}\nSubject: {subject}\n\n{body}\n')
+        self.stream.flush()
+
+
+class FileSender:
+    """Append digests as JSON lines to NOTIFICATION_FILE_PATH"""
+
+    def __init__(self, path=None):
+        self.path = path or settings.NOTIFICATION_FILE_PATH
+
+    def send(self, recipient, subject, body):
+        record = {'to': recipient.email, 'subject': subject, 'body': body, 'sent_at': timezone.now().isoformat()}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+class EmailSender:
+    """Send digests through Django's email backend (EMAIL_BACKEND and friends)"""
+
+    def send(self, recipient, subject, body):
+        send_mail(subject, body, None, [recipient.email])
+
+
+def get_sender():
+    return import_string(settings.NOTIFICATION_SENDER)()
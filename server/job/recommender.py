@@ -0,0 +1,240 @@
+import math
+import re
+import threading
+import zlib
+from array import array
+
+import numpy as np
+
+from .generations import SharedGeneration
+
+
+DIMENSIONS = 128
+NUM_TABLES = 8
+BITS_PER_TABLE = 12
+# Below this many live rows a brute-force scan is faster than probing buckets
+EXACT_SCAN_THRESHOLD = 20_000
+
+TOKEN_RE = re.compile(r'[a-z0-9+#]+(?:\.[a-z0-9]+)?')
+
+JOB_TYPE_CODES = {'full-time': 1, 'part-time': 2, 'contract': 3, 'remote': 4}
+
+
+def _tokens(text):
+    words = TOKEN_RE.findall(text.lower())
+    # Unigrams plus bigrams so 'machine learning' differs from 'machine' + 'learning'
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+def embed(weighted_texts, dimensions=DIMENSIONS):
+    """Embed [(text, weight)] with the signed hashing trick into an L2-normalized float32 vector"""
+    counts = {}
+    for text, weight in weighted_texts:
+        if not text:
+            continue
+        for token in _tokens(text):
+            counts[token] = counts.get(token, 0.0) + weight
+
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for token, count in counts.items():
+        h = zlib.crc32(token.encode('utf-8'))
+        sign = 1.0 if h & 0x80000000 else -1.0
+        vector[h % dimensions] += sign * math.log1p(count)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def _text_list(value):
+    if isinstance(value, str):
+        return value
+    return ' '.join(item for item in value or [] if isinstance(item, str))
+
+
+def embed_job(title, description, requirements):
+    return embed([(title, 3.0), (_text_list(requirements), 2.0), (description, 1.0)])
+
+
+def embed_seeker(seeker):
+    return embed([
+        (_text_list(seeker.skills), 3.0),
+        (seeker.experience, 1.5),
+        (seeker.bio, 1.0),
+        (seeker.education, 0.5),
+    ])
+
+
+class JobVectorIndex(SharedGeneration):
+    """Append-only float32 matrix of job embeddings with LSH buckets for candidate lookup.
+
+    Lives in process memory: built from the database on first use, kept current by
+    the Job signal handlers in the worker that makes a write and rebuilt by the
+    others (see job.generations).
+
+    Each of NUM_TABLES tables hashes a vector to BITS_PER_TABLE sign bits against
+    fixed random hyperplanes; a query probes its own bucket and every bucket one
+    bit away in each table, then ranks the union exactly. Edits append a new row
+    and tombstone the old one; the matrix is rebuilt once tombstones dominate.
+    """
+    generation_key = 'recommender:generation'
+
+    def __init__(self, dimensions=DIMENSIONS, num_tables=NUM_TABLES, bits=BITS_PER_TABLE, seed=42):
+        self.dimensions = dimensions
+        self.num_tables = num_tables
+        self.bits = bits
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((num_tables * bits, dimensions)).astype(np.float32)
+        self._powers = (1 << np.arange(bits, dtype=np.int64))
+        self._lock = threading.RLock()
+        self._rebuilding = threading.Lock()
+        self.is_built = False
+        self._reset()
+
+    def _reset(self, capacity=1024):
+        self._vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        self._job_ids = np.zeros(capacity, dtype=np.int64)
+        self._types = np.zeros(capacity, dtype=np.uint8)
+        self._places = np.full(capacity, -1, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._size = 0
+        self._rows = {}  # job id -> row
+        self._buckets = [{} for _ in range(self.num_tables)]  # code -> array('q') of rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _codes(self, vectors):
+        bits = (vectors @ self._planes.T) > 0
+        bits = bits.reshape(len(vectors), self.num_tables, self.bits)
+        return bits @ self._powers  # (n, num_tables)
+
+    def _grow(self, needed):
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('_vectors', '_job_ids', '_types', '_places', '_alive'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            if name == '_places':
+                new.fill(-1)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _append(self, job_ids, vectors, types, places):
+        start = self._size
+        end = start + len(job_ids)
+        self._grow(end)
+        self._vectors[start:end] = vectors
+        self._job_ids[start:end] = job_ids
+        self._types[start:end] = types
+        self._places[start:end] = places
+        self._alive[start:end] = True
+        for offset, code_row in enumerate(self._codes(vectors)):
+            row = start + offset
+            for table, code in enumerate(code_row):
+                self._buckets[table].setdefault(int(code), array('q')).append(row)
+        for offset, job_id in enumerate(job_ids):
+            old_row = self._rows.get(int(job_id))
+            if old_row is not None:
+                self._alive[old_row] = False
+            self._rows[int(job_id)] = start + offset
+        self._size = end
+
+    def upsert(self, job):
+        """Add or replace one job (incremental update from the post_save signal)"""
+        vector = embed_job(job.title, job.description, job.requirements)
+        with self._lock:
+            self._append(
+                [job.id], vector[None, :], [JOB_TYPE_CODES.get(job.type, 0)],
+                [job.place_id if job.place_id is not None else -1],
+            )
+            if self._size > 4 * max(len(self._rows), 1024):
+                self._compact()
+
+    def remove(self, job_id):
+        with self._lock:
+            row = self._rows.pop(job_id, None)
+            if row is not None:
+                self._alive[row] = False
+
+    def _compact(self):
+        alive = np.flatnonzero(self._alive[:self._size])
+        vectors = self._vectors[alive].copy()
+        job_ids, types, places = self._job_ids[alive], self._types[alive], self._places[alive]
+        self._reset(capacity=max(1024, len(alive) * 2))
+        if len(alive):
+            self._append(job_ids, vectors, types, places)
+
+    def build(self, batch_size=2000):
+        """(Re)build the index from the database; queries keep using the old one until the swap"""
+        from .models import Job
+
+        generation = self.current_generation()
+        rows = Job.objects.filter(status='open').values_list(
+            'id', 'title', 'description', 'requirements', 'type', 'place_id'
+        ).order_by('pk')
+        job_ids, vectors, types, places = [], [], [], []
+        for job_id, title, description, requirements, job_type, place_id in rows.iterator(chunk_size=batch_size):
+            job_ids.append(job_id)
+            vectors.append(embed_job(title, description, requirements))
+            types.append(JOB_TYPE_CODES.get(job_type, 0))
+            places.append(place_id if place_id is not None else -1)
+        with self._lock:
+            self._reset(capacity=max(1024, len(job_ids) * 2))
+            if job_ids:
+                self._append(job_ids, np.stack(vectors), types, places)
+            self.is_built = True
+            self.mark_built(generation)
+
+    def ensure_built(self):
+        if not self.is_built:
+            with self._lock:
+                if not self.is_built:
+                    self.build()
+
+    def _candidates(self, vector):
+        codes = self._codes(vector[None, :])[0]
+        found = []
+        for table, code in enumerate(codes):
+            buckets = self._buckets[table]
+            code = int(code)
+            for probe in [code] + [code ^ (1 << bit) for bit in range(self.bits)]:
+                rows = buckets.get(probe)
+                if rows is not None:
+                    found.append(np.frombuffer(rows, dtype=np.int64))
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def query(self, vector, limit=20, job_type=None, place_ids=None, exclude_ids=()):
+        """Return [(job_id, similarity)] for the best `limit` live jobs, most similar first"""
+        with self._lock:
+            if len(self._rows) <= EXACT_SCAN_THRESHOLD:
+                rows = np.arange(self._size)
+            else:
+                rows = self._candidates(vector)
+
+            mask = self._alive[rows]
+            if job_type is not None:
+                mask &= self._types[rows] == JOB_TYPE_CODES.get(job_type, 0)
+            if place_ids is not None:
+                mask &= np.isin(self._places[rows], np.fromiter(place_ids, dtype=np.int64))
+            if exclude_ids:
+                mask &= ~np.isin(self._job_ids[rows], np.fromiter(exclude_ids, dtype=np.int64))
+            rows = rows[mask]
+            if not len(rows):
+                return []
+
+            scores = self._vectors[rows] @ vector
+            if len(rows) > limit:
+                top = np.argpartition(-scores, limit)[:limit]
+            else:
+                top = np.arange(len(rows))
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._job_ids[rows[i]]), float(scores[i])) for i in top]
+
+
+index = JobVectorIndex()
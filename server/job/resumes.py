@@ -0,0 +1,372 @@
+"""Resume ingestion: fetch the file behind User.resume, extract its text, index its words.
+
+User.save queues a ResumeDocument whenever the link changes; `manage.py ingest_resumes`
+works through the queue in batches. Fetching and text extraction (PDF, DOCX or plain
+text) run on a thread pool, then each batch is written in one transaction: the
+normalized text, the known skills found in it, and one ResumeTerm row per distinct
+word, so a ?resume= search is an index lookup rather than a scan of the text.
+"""
+import hashlib
+import io
+import ipaddress
+import logging
+import re
+import socket
+import unicodedata
+import urllib.request
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlparse
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .matching import STOPWORDS
+from .models import ResumeDocument, ResumeTerm, UserSkill
+
+logger = logging.getLogger(__name__)
+
+TERM_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 10
+MAX_SKILLS = 50
+MAX_SKILL_WORDS = 3
+
+
+class FetchError(Exception):
+    pass
+
+
+class ExtractionError(Exception):
+    pass
+
+
+# Fetchers: anything with fetch(url) -> bytes, chosen by RESUME_FETCHER
+
+def _read_capped(stream):
+    data = stream.read(settings.RESUME_MAX_BYTES + 1)
+    if len(data) > settings.RESUME_MAX_BYTES:
+        raise FetchError(f'File is larger than {settings.RESUME_MAX_BYTES} bytes')
+    return data
+
+
+class MediaFetcher:
+    """Read resumes under MEDIA_URL from the default storage (local uploads; used in tests)"""
+
+    def fetch(self, url):
+        path = unquote(urlparse(url).path)
+        prefix = urlparse(settings.MEDIA_URL).path
+        if not path.startswith(prefix):
+            raise FetchError('Not a media URL')
+        try:
+            with default_storage.open(path[len(prefix):], 'rb') as f:
+                return _read_capped(f)
+        except (FileNotFoundError, OSError) as exc:
+            raise FetchError(f'Could not read {path}: {exc}') from exc
+
+
+def _check_public(url):
+    """Refuse anything but http(s) to a public address; resume links are user input"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise FetchError('Only http(s) links can be fetched')
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP)}
+    except socket.gaierror as exc:
+        raise FetchError(f'Could not resolve {parsed.hostname}') from exc
+    for address in addresses:
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise FetchError(f'{parsed.hostname} is not a public address')
+
+
+class _PublicRedirectHandler(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        _check_public(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+class HttpFetcher:
+    """Download resumes over HTTP(S), refusing private addresses and oversized files"""
+
+    def __init__(self):
+        self.opener = urllib.request.build_opener(_PublicRedirectHandler)
+
+    def fetch(self, url):
+        _check_public(url)
+        request = urllib.request.Request(url, headers={'User-Agent': 'job-resume-ingest/1.0'})
+        try:
+            with self.opener.open(request, timeout=settings.RESUME_FETCH_TIMEOUT) as response:
+                return _read_capped(response)
+        except (OSError, ValueError) as exc:  # URLError and HTTPError are OSErrors
+            raise FetchError(f'Could not download: {exc}') from exc
+
+
+def get_fetcher():
+    return import_string(settings.RESUME_FETCHER)()
+
+
+# Text extraction
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def _docx_text(data):
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            info = archive.getinfo('word/document.xml')
+            if info.file_size > settings.RESUME_MAX_BYTES * 10:
+                raise ExtractionError('Document body is too large')
+            xml = archive.read(info)
+    except (zipfile.BadZipFile, KeyError) as exc:
+        raise ExtractionError('Not a DOCX file') from exc
+
+    paragraphs, runs = [], []
+    try:
+        for _, element in ElementTree.iterparse(io.BytesIO(xml), events=('end',)):
+            if element.tag == WORD_NS + 't':
+                runs.append(element.text or '')
+            elif element.tag in (WORD_NS + 'tab', WORD_NS + 'br'):
+                runs.append(' ')
+            elif element.tag == WORD_NS + 'p':
+                paragraphs.append(''.join(runs))
+                runs = []
+                element.clear()
+    except ElementTree.ParseError as exc:
+        raise ExtractionError('Malformed DOCX') from exc
+    return '\n'.join(paragraphs)
+
+
+# Content streams: text shown by Tj/'/" (one string) or TJ (array of strings and kerning)
+_PDF_STREAM_RE = re.compile(rb'(?<!end)stream\r?\n')
+_PDF_TEXT_RE = re.compile(
+    rb'\[((?:[^\]\\]|\\.)*)\]\s*TJ|\(((?:[^()\\]|\\.)*)\)\s*(?:Tj|\'|")|(T\*|Td|TD|ET)', re.S
+)
+_PDF_ARRAY_RE = re.compile(rb'\(((?:[^()\\]|\\.)*)\)|(-?\d+(?:\.\d+)?)')
+_PDF_ESCAPE_RE = re.compile(rb'\\([0-7]{1,3}|.)', re.S)
+_PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+
+
+def _pdf_string(raw):
+    def unescape(match):
+        value = match.group(1)
+        if value[:1].isdigit():
+            return bytes([int(value, 8) & 0xFF])
+        return _PDF_ESCAPES.get(value, value if value != b'\n' else b'')
+    return _PDF_ESCAPE_RE.sub(unescape, raw).decode('latin-1')
+
+
+def _pdf_streams(data):
+    limit = settings.RESUME_MAX_BYTES * 10
+    for match in _PDF_STREAM_RE.finditer(data):
+        end = data.find(b'endstream', match.end())
+        if end < 0:
+            return
+        header = data[max(0, match.start() - 512):match.start()]
+        header = header[header.rfind(b'obj'):]
+        raw = data[match.end():end]
+        if b'/FlateDecode' in header:
+            try:
+                # Bounded, so a compression bomb cannot exhaust memory
+                raw = zlib.decompressobj().decompress(raw, limit)
+            except zlib.error:
+                continue
+        if b'BT' in raw:
+            yield raw
+
+
+def _pdf_text_builtin(data):
+    """Text of simply-encoded PDFs (Flate streams, single-byte fonts); no dependency needed"""
+    lines, line = [], []
+    for stream in _pdf_streams(data):
+        for array, string, newline in _PDF_TEXT_RE.findall(stream):
+            if newline:
+                lines.append(''.join(line))
+                line = []
+            elif string:
+                line.append(_pdf_string(string))
+            else:
+                for part, kerning in _PDF_ARRAY_RE.findall(array):
+                    if part:
+                        line.append(_pdf_string(part))
+                    elif float(kerning) < -200:  # a wide negative adjustment is a word gap
+                        line.append(' ')
+    lines.append(''.join(line))
+    return '\n'.join(lines)
+
+
+def _pdf_text(data):
+    # pypdf understands font encodings and object streams; it is optional
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return _pdf_text_builtin(data)
+    try:
+        return '\n'.join(page.extract_text() or '' for page in PdfReader(io.BytesIO(data)).pages)
+    except Exception as exc:  # pypdf raises a variety of errors on damaged files
+        raise ExtractionError(f'Unreadable PDF: {exc}') from exc
+
+
+def extract_text(data):
+    """Raw text of a PDF, DOCX or plain-text resume, told apart by content rather than name"""
+    if b'%PDF-' in data[:1024]:
+        return _pdf_text(data)
+    if data[:4] == b'PK\x03\x04':
+        return _docx_text(data)
+    if b'\x00' not in data[:1024]:
+        try:
+            return data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            pass
+    raise ExtractionError('Unsupported file type (expected PDF, DOCX or text)')
+
+
+def normalize_text(text):
+    text = unicodedata.normalize('NFKC', text)
+    return ' '.join(text.split())[:settings.RESUME_MAX_CHARS]
+
+
+# Terms and skills
+
+def words(text):
+    """Lower-cased words in order; keeps tokens such as c++, c# and node.js whole"""
+    return [word.rstrip('.') for word in TERM_RE.findall(text.lower())]
+
+
+def terms(text):
+    """Distinct searchable words of a text"""
+    return {
+        word for word in words(text)
+        if 2 <= len(word) <= MAX_TERM_LENGTH and word not in STOPWORDS
+    }
+
+
+def query_terms(query):
+    return sorted(terms(query or ''))[:MAX_QUERY_TERMS]
+
+
+def skill_vocabulary():
+    """Skills seekers list on their profiles (normalized), as the set resumes are matched against"""
+    return {
+        name for name in UserSkill.objects.values_list('name', flat=True).distinct()
+        if len(name) >= 2 and len(name.split()) <= MAX_SKILL_WORDS
+    }
+
+
+def extract_skills(text, vocabulary):
+    """Known skills (single words or phrases of up to three) in order of first mention"""
+    sequence = words(text)
+    found = {}
+    for size in range(1, MAX_SKILL_WORDS + 1):
+        for i in range(len(sequence) - size + 1):
+            phrase = ' '.join(sequence[i:i + size])
+            if phrase in vocabulary and phrase not in found:
+                found[phrase] = i
+    return sorted(found, key=found.get)[:MAX_SKILLS]
+
+
+def search(queryset, query):
+    """Users whose ingested resume contains every term of `query`"""
+    wanted = query_terms(query)
+    if not wanted:
+        return queryset
+    matching = (
+        ResumeTerm.objects.filter(term__in=wanted).values('user_id')
+        .annotate(matched=Count('term')).filter(matched=len(wanted)).values('user_id')
+    )
+    return queryset.filter(pk__in=matching)
+
+
+# Ingestion
+
+class ResumeIngestor:
+    """Ingest queued ResumeDocuments in keyset batches.
+
+    Files whose content hash is unchanged since they were last indexed are not
+    extracted or re-indexed again. A document whose link changes while its batch is
+    in flight is left pending for the next run.
+    """
+
+    def __init__(self, fetcher=None, workers=None, batch_size=50):
+        self.fetcher = fetcher or get_fetcher()
+        self.workers = workers or settings.RESUME_INGEST_WORKERS
+        self.batch_size = batch_size
+        self._vocabulary = None
+        self.counts = {'indexed': 0, 'unchanged': 0, 'failed': 0}
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = skill_vocabulary()
+        return self._vocabulary
+
+    def run(self, statuses=('pending',)):
+        queue = ResumeDocument.objects.filter(status__in=statuses).order_by('user_id')
+        last_id = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                batch = list(queue.filter(user_id__gt=last_id)[:self.batch_size])
+                if not batch:
+                    break
+                self.store(batch, list(pool.map(self.ingest, batch)))
+                last_id = batch[-1].user_id
+        return self.counts
+
+    def ingest(self, document):
+        """(content_hash, text or None when unchanged, error) for one document; runs on the pool"""
+        try:
+            data = self.fetcher.fetch(document.source_url)
+            digest = hashlib.sha256(data).hexdigest()
+            if digest == document.content_hash and document.indexed_at is not None:
+                return digest, None, ''
+            text = normalize_text(extract_text(data))
+            if not text:
+                raise ExtractionError('No text found (a scanned image?)')
+            return digest, text, ''
+        except (FetchError, ExtractionError) as exc:
+            return '', None, str(exc)
+        except Exception as exc:
+            logger.exception('Resume ingestion failed for user %s', document.user_id)
+            return '', None, f'{type(exc).__name__}: {exc}'
+
+    def store(self, batch, results):
+        now = timezone.now()
+        reindexed, rows = [], []
+        with transaction.atomic():
+            current = dict(
+                ResumeDocument.objects.select_for_update()
+                .filter(user_id__in=[document.user_id for document in batch])
+                .values_list('user_id', 'source_url')
+            )
+            updated = []
+            for document, (digest, text, error) in zip(batch, results):
+                if current.get(document.user_id) != document.source_url:
+                    continue
+                if error:
+                    document.status, document.error = 'failed', error[:255]
+                    document.attempts += 1
+                    self.counts['failed'] += 1
+                elif text is None:
+                    document.status, document.error = 'indexed', ''
+                    self.counts['unchanged'] += 1
+                else:
+                    document.status, document.error, document.attempts = 'indexed', '', 0
+                    document.content_hash, document.text, document.indexed_at = digest, text, now
+                    document.skills = extract_skills(text, self.vocabulary)
+                    reindexed.append(document.user_id)
+                    rows += [ResumeTerm(user_id=document.user_id, term=term) for term in terms(text)]
+                    self.counts['indexed'] += 1
+                document.updated_at = now
+                updated.append(document)
+            ResumeDocument.objects.bulk_update(
+                updated,
+                ['status', 'error', 'attempts', 'content_hash', 'text', 'skills', 'indexed_at', 'updated_at'],
+            )
+            ResumeTerm.objects.filter(user_id__in=reindexed).delete()
+            ResumeTerm.objects.bulk_create(rows, batch_size=1000)
@@ -0,0 +1,131 @@
+import re
+
+
+# Currency markers, checked in order (longer codes before their prefixes)
+CURRENCY_MARKERS = [
+    ('KSH', 'KES'),
+    ('KES', 'KES'),
+    ('USD', 'USD'),
+    ('EUR', 'EUR'),
+    ('GBP', 'GBP'),
+    ('INR', 'INR'),
+    ('NGN', 'NGN'),
+    ('ZAR', 'ZAR'),
+    ('US$', 'USD'),
+    ('$', 'USD'),
+    ('€', 'EUR'),
+    ('£', 'GBP'),
+    ('₹', 'INR'),
+    ('₦', 'NGN'),
+]
+
+# (period, word forms, unit after a slash). Word forms must start at a word boundary;
+# a slash may follow a letter, as in "80k/month"
+PERIOD_PATTERNS = [
+    ('hour', r'per\s+hour|hourly|an?\s+hour|p\.?h', r'h(ou)?r'),
+    ('day', r'per\s+day|daily|a\s+day', r'day'),
+    ('week', r'per\s+week|weekly|a\s+week', r'w(ee)?k'),
+    ('month', r'per\s+month|monthly|a\s+month|p\.?m', r'mo(nth)?'),
+    ('year', r'per\s+(year|annum)|yearly|annual(ly)?|a\s+year|p\.?a', r'y(ea)?r'),
+]
+PERIOD_PATTERNS = [
+    (period, re.compile(r'((?<![a-z])(' + words + r')|/\s*(' + unit + r'))(?![a-z])', re.I))
+    for period, words, unit in PERIOD_PATTERNS
+]
+
+NUMBER_RE = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*([kKmM])?(?![a-zA-Z])')
+
+# Look like amounts but are not, e.g. "plus 401k"
+NOT_AMOUNT_RE = re.compile(r'(?<![a-z\d])401\s*\(?k\)?(?![a-z])', re.I)
+
+# A bare number only counts as an amount next to one of these: a currency marker or
+# salary keyword just before it, or a currency marker or period just after it
+CURRENCY_RE = '|'.join(
+    (r'(?<![a-z])' if marker[0].isalpha() else '') + re.escape(marker) for marker, _ in CURRENCY_MARKERS
+)
+MARKED_BEFORE_RE = re.compile(
+    r'((' + CURRENCY_RE + r')\.?|(?<![a-z])(salary|pay|paid|wage|stipend|earn|up\s+to)\W*)\s*$', re.I
+)
+MARKED_AFTER_RE = re.compile(
+    r'\s*(' + CURRENCY_RE + '|' + '|'.join(pattern.pattern for _, pattern in PERIOD_PATTERNS) + ')', re.I
+)
+# Between the two ends of a range, e.g. "50,000 - 80,000 KES" or "50 to 80k"
+RANGE_RE = re.compile(r'\s*(-|–|—|to)\s*', re.I)
+
+MULTIPLIERS = {'k': 1_000, 'm': 1_000_000}
+
+# Largest amount kept: salary_min/salary_max are PositiveIntegerFields (int4 on Postgres)
+MAX_AMOUNT = 2**31 - 1
+
+
+def _detect_currency(text):
+    upper = text.upper()
+    for marker, code in CURRENCY_MARKERS:
+        if marker in upper:
+            return code
+    return None
+
+
+def _detect_period(text):
+    for period, pattern in PERIOD_PATTERNS:
+        if pattern.search(text):
+            return period
+    return None
+
+
+def _amount_matches(text):
+    """NUMBER_RE matches in `text` that are amounts: those with a k/m suffix or a marker next
+    to them (see MARKED_BEFORE_RE), and the other end of a range one of them is in. When the
+    text is nothing but numbers, e.g. "50000 - 80000", they all are."""
+    matches = list(NUMBER_RE.finditer(text))
+    bare = not re.search(r'[^\W\d_]', NUMBER_RE.sub('', text))
+    marked = [
+        bare or bool(match.group(2))
+        or bool(MARKED_BEFORE_RE.search(text, 0, match.start()))
+        or bool(MARKED_AFTER_RE.match(text, match.end()))
+        for match in matches
+    ]
+    for i in range(len(matches) - 1):
+        if (marked[i] or marked[i + 1]) and RANGE_RE.fullmatch(text, matches[i].end(), matches[i + 1].start()):
+            marked[i] = marked[i + 1] = True
+    return [match for match, is_amount in zip(matches, marked) if is_amount]
+
+
+def parse_salary(text):
+    """Parse a free-form salary string into (min, max, currency, period).
+
+    Unparseable parts come back as None, e.g. "Negotiable" -> (None, None, None, None)
+    and "KES 80k - 120k per month" -> (80000, 120000, 'KES', 'month'). Numbers that are
+    not marked as money are skipped: "3+ years, KES 60,000" -> (60000, 60000, 'KES', None).
+    """
+    if not text:
+        return None, None, None, None
+
+    amounts = []
+    for match in _amount_matches(NOT_AMOUNT_RE.sub(' ', text)):
+        number, suffix = match.groups()
+        try:
+            value = float(number.replace(',', ''))
+        except ValueError:
+            continue
+        if suffix:
+            value *= MULTIPLIERS[suffix.lower()]
+        if value > MAX_AMOUNT:
+            continue  # a typo or not a salary; would not fit the columns
+        amounts.append(int(value))
+        if len(amounts) == 2:
+            break
+
+    # "50-80k" means 50k-80k: carry the suffix of the upper bound down
+    if len(amounts) == 2 and amounts[0] < 1_000 <= amounts[1] and amounts[0] * 1_000 <= amounts[1]:
+        scale = 1_000_000 if amounts[1] >= 1_000_000 else 1_000
+        amounts[0] *= scale
+
+    if not amounts:
+        salary_min = salary_max = None
+    elif len(amounts) == 1:
+        salary_min = salary_max = amounts[0]
+    else:
+        salary_min, salary_max = min(amounts), max(amounts)
+
+    return salary_min, salary_max, _detect_currency(text), _detect_period(text)
@@ -1,6 +1,20 @@
 from rest_framework import serializers
 from django.conf import settings
-from .models import User
+from django.utils import timezone
+from .models import (
+    User, Job, JobCard, SavedJob, SavedCandidate, Application, ApplicationEvent,
+    Conversation, Message, MessageArchive,
+)
+
+
+class PartialSaveMixin:
+    """update() writes only the columns present in validated_data, not the whole row"""
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -20,21 +34,16 @@ class RegisterSerializer(serializers.ModelSerializer):
         raw_email = validated_data['email']
         provided_username = validated_data.get('username', '') or ''
         base_username = provided_username.strip() if provided_username.strip() else raw_email.split('@')[0]
-        username = base_username
-        # Ensure uniqueness by appending a numeric suffix if needed
-        counter = 0
-        while User.objects.filter(username=username).exists():
-            counter += 1
-            username = f"{base_username}{counter}"
 
         # Get role from validated data, default to 'seeker'
         role = validated_data.get('role', 'seeker')
         if role not in ['seeker', 'employer']:
             role = 'seeker'
 
-        user = User.objects.create_user(
+        # Ensure uniqueness by appending a numeric suffix if needed
+        user = User.objects.create_user_with_free_username(
             email=raw_email,
-            username=username,
+            base_username=base_username,
             password=validated_data['password'],
             name=validated_data.get('name', ''),
             role=role,
@@ -56,7 +65,7 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(PartialSaveMixin, serializers.ModelSerializer):
     avatar = serializers.SerializerMethodField()
     resume = serializers.URLField(required=False, allow_null=True, allow_blank=True)
     skills = serializers.ListField(
@@ -73,9 +82,9 @@ class UserSerializer(serializers.ModelSerializer):
             'avatar', 'bio', 'location', 'phone', 'website',
             'skills', 'experience', 'education', 'linkedin', 'github', 'portfolio', 'resume',
             'company', 'company_size', 'industry', 'founded',
-            'is_active', 'created_at'
+            'is_active', 'created_at', 'version'
         ]
-        read_only_fields = ['id', 'email', 'created_at']
+        read_only_fields = ['id', 'email', 'created_at', 'version']
 
     def get_avatar(self, obj):
         if obj.avatar:
@@ -87,7 +96,32 @@ class UserSerializer(serializers.ModelSerializer):
 
     # `resume` is a direct URL field on the model and is handled by the URLField above
 
-class ProfileSerializer(serializers.ModelSerializer):
+
+class DirectorySeekerSerializer(serializers.ModelSerializer):
+    """Compact public listing of a seeker; the viewset loads only these columns"""
+    avatar = serializers.SerializerMethodField()
+    class Meta:
+        model = User
+        fields = ['id', 'name', 'location', 'skills', 'avatar']
+        read_only_fields = fields
+
+    def get_avatar(self, obj):
+        return UserSerializer.get_avatar(self, obj)
+
+
+class DirectoryEmployerSerializer(serializers.ModelSerializer):
+    """Compact public listing of an employer; the viewset loads only these columns"""
+    avatar = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'name', 'company', 'industry', 'company_size', 'location', 'avatar']
+        read_only_fields = fields
+
+    def get_avatar(self, obj):
+        return UserSerializer.get_avatar(self, obj)
+
+class ProfileSerializer(PartialSaveMixin, serializers.ModelSerializer):
     """Serializer for user profile with additional validation"""
     avatar = serializers.SerializerMethodField()
     resume = serializers.URLField(required=False, allow_null=True, allow_blank=True)
@@ -104,9 +138,9 @@ class ProfileSerializer(serializers.ModelSerializer):
             'avatar', 'bio', 'location', 'phone', 'website',
             'skills', 'experience', 'education', 'linkedin', 'github', 'portfolio', 'resume',
             'company', 'company_size', 'industry', 'founded',
-            'is_active', 'created_at'
+            'is_active', 'created_at', 'version'
         ]
-        read_only_fields = ['id', 'email', 'role', 'created_at', 'is_active']
+        read_only_fields = ['id', 'email', 'role', 'created_at', 'is_active', 'version']
 
     def get_avatar(self, obj):
         if obj.avatar:
@@ -152,21 +186,35 @@ class ProfileSerializer(serializers.ModelSerializer):
         return value
 
 
-from .models import Job
-
-
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(PartialSaveMixin, serializers.ModelSerializer):
     posted_by = serializers.PrimaryKeyRelatedField(read_only=True)
     posted_by_details = UserSerializer(source='posted_by', read_only=True)
 
     class Meta:
         model = Job
         fields = [
-            'id', 'title', 'company', 'location', 'description',
-            'requirements', 'salary', 'type', 'posted_by', 'posted_by_details',
-            'posted_at', 'applicant_count'
+            'id', 'title', 'company', 'location', 'place', 'description',
+            'requirements', 'salary', 'salary_min', 'salary_max', 'salary_currency',
+            'salary_period', 'type', 'posted_by', 'posted_by_details',
+            'posted_at', 'status', 'expires_at', 'closed_at', 'applicant_count', 'duplicate_of', 'version'
         ]
-        read_only_fields = ['id', 'posted_by', 'posted_at', 'applicant_count']
+        read_only_fields = [
+            'id', 'place', 'posted_by', 'posted_at', 'closed_at', 'applicant_count',
+            'salary_min', 'salary_max', 'salary_currency', 'salary_period', 'duplicate_of', 'version'
+        ]
+
+    def validate_status(self, value):
+        # 'expired' is only ever set by archive_jobs
+        if value not in ['open', 'closed']:
+            raise serializers.ValidationError('Status must be open or closed')
+        return value
+
+    def validate(self, data):
+        job_status = data.get('status', self.instance.status if self.instance else 'open')
+        expires_at = data.get('expires_at', self.instance.expires_at if self.instance else None)
+        if job_status == 'open' and expires_at is not None and expires_at <= timezone.now():
+            raise serializers.ValidationError({'expires_at': 'An open job must expire in the future'})
+        return data
 
     def create(self, validated_data):
         # Set the posted_by to the current user
@@ -174,7 +222,78 @@ class JobSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-from .models import SavedCandidate
+class JobCardSerializer(serializers.ModelSerializer):
+    """Compact job representation for list views, read from the denormalized JobCard"""
+    id = serializers.IntegerField(source='job_id', read_only=True)
+    posted_by = serializers.IntegerField(source='employer_id', read_only=True)
+    posted_by_details = serializers.SerializerMethodField()
+
+    class Meta:
+        model = JobCard
+        fields = [
+            'id', 'title', 'company', 'location', 'place', 'description',
+            'requirements', 'salary', 'salary_min', 'salary_max', 'salary_currency',
+            'salary_period', 'type', 'posted_by', 'posted_by_details',
+            'posted_at', 'status', 'expires_at', 'applicant_count', 'duplicate_of'
+        ]
+        read_only_fields = fields
+
+    def get_posted_by_details(self, obj):
+        avatar = obj.employer_avatar_url or None
+        if avatar:
+            request = self.context.get('request')
+            if request:
+                avatar = request.build_absolute_uri(avatar)
+            elif avatar.startswith('/') and settings.SITE_URL:
+                avatar = f"{settings.SITE_URL.rstrip('/')}{avatar}"
+        return {
+            'id': obj.employer_id,
+            'name': obj.employer_name,
+            'email': obj.employer_email,
+            'company': obj.employer_company,
+            'avatar': avatar,
+        }
+
+
+class JobSnapshotSerializer(JobCardSerializer):
+    """What a saved-job badge or row shows, from the JobCard (no description or requirements)"""
+
+    class Meta(JobCardSerializer.Meta):
+        fields = [
+            'id', 'title', 'company', 'location', 'type', 'salary', 'posted_by', 'posted_by_details',
+            'posted_at', 'status', 'expires_at', 'applicant_count',
+        ]
+        read_only_fields = fields
+
+
+class CandidateSnapshotSerializer(serializers.ModelSerializer):
+    """What a shortlist row shows of a candidate; the view loads only these columns"""
+    avatar = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'name', 'username', 'email', 'avatar', 'location', 'skills', 'experience']
+        read_only_fields = fields
+
+    def get_avatar(self, obj):
+        return UserSerializer.get_avatar(self, obj)
+
+
+class SnapshotMixin:
+    """Nest the related row's snapshot under snapshot_field.
+
+    The view batch-loads the related rows and serializes them once with
+    snapshot_serializer into context['snapshots'] ({id: data}); building a nested
+    serializer per row would cost more than the smaller payload saves.
+    """
+    snapshot_serializer = None
+    snapshot_source = None  # the FK attname, e.g. 'job_id'
+    snapshot_field = None  # e.g. 'job_details', as in the full serializer
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data[self.snapshot_field] = self.context['snapshots'].get(getattr(instance, self.snapshot_source))
+        return data
 
 
 class SavedCandidateSerializer(serializers.ModelSerializer):
@@ -215,7 +334,15 @@ class SavedCandidateSerializer(serializers.ModelSerializer):
         return data
 
 
-from .models import Application
+class SavedCandidateSnapshotSerializer(SnapshotMixin, serializers.ModelSerializer):
+    snapshot_serializer = CandidateSnapshotSerializer
+    snapshot_source = 'candidate_id'
+    snapshot_field = 'candidate_details'
+
+    class Meta:
+        model = SavedCandidate
+        fields = ['id', 'candidate_id', 'match_score', 'notes', 'applied_for', 'saved_at']
+        read_only_fields = fields
 
 
 class ApplicationSerializer(serializers.ModelSerializer):
@@ -226,33 +353,44 @@ class ApplicationSerializer(serializers.ModelSerializer):
     seeker_name = serializers.CharField(source='seeker.name', read_only=True)
     seeker_email = serializers.EmailField(source='seeker.email', read_only=True)
     seeker_details = serializers.SerializerMethodField()
+    match_score = serializers.SerializerMethodField()
 
     class Meta:
         model = Application
         fields = [
             'id', 'job_id', 'job_details', 'seeker_id', 'seeker_name', 'seeker_email',
-            'seeker_details', 'status', 'applied_at', 'updated_at'
+            'seeker_details', 'status', 'match_score', 'applied_at', 'updated_at'
+        ]
+        # status only moves through ApplicationStatusSerializer, which enforces Application.TRANSITIONS
+        read_only_fields = [
+            'id', 'seeker_id', 'seeker_name', 'seeker_email', 'seeker_details', 'status', 'match_score',
+            'applied_at', 'updated_at',
         ]
-        read_only_fields = ['id', 'seeker_id', 'seeker_name', 'seeker_email', 'seeker_details', 'applied_at', 'updated_at']
 
     def get_seeker_details(self, obj):
         return UserSerializer(obj.seeker, context=self.context).data
 
+    def get_match_score(self, obj):
+        # Annotated by the viewset (see views.with_match_scores); None when not yet scored
+        return getattr(obj, 'match_score', None)
+
     def create(self, validated_data):
         job_id = validated_data.pop('job_id')
         try:
             job = Job.objects.get(id=job_id)
         except Job.DoesNotExist:
             raise serializers.ValidationError({'job_id': 'Job not found'})
+        if not job.is_open():
+            raise serializers.ValidationError({'job_id': 'This job is no longer accepting applications'})
         
         validated_data['job'] = job
         validated_data['seeker'] = self.context['request'].user
-        
-        # Increment applicant count on the job
-        job.applicant_count += 1
-        job.save()
-        
-        return super().create(validated_data)
+
+        # Application.save bumps the job's applicant and status counters and logs the event
+        application = Application(**validated_data)
+        application.changed_by = validated_data['seeker']
+        application.save()
+        return application
 
     def validate(self, data):
         user = self.context['request'].user
@@ -277,10 +415,17 @@ class ApplicationStatusSerializer(serializers.ModelSerializer):
     def validate_status(self, value):
         if value not in ['pending', 'reviewed', 'accepted', 'rejected']:
             raise serializers.ValidationError('Invalid status')
+        if self.instance is not None and not self.instance.can_move_to(value):
+            raise serializers.ValidationError(f'Cannot move an application from {self.instance.status} to {value}')
         return value
 
 
-from .models import Conversation, Message
+class ApplicationEventSerializer(serializers.ModelSerializer):
+    """Serializer for one entry of an application's status history"""
+    class Meta:
+        model = ApplicationEvent
+        fields = ['id', 'from_status', 'to_status', 'actor', 'created_at']
+        read_only_fields = fields
 
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -318,6 +463,15 @@ class ConversationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_last_message(self, obj):
+        # Use the annotations from views.with_conversation_summary when present
+        if hasattr(obj, 'last_message_created_at'):
+            if obj.last_message_created_at is None:
+                return None
+            return {
+                'content': obj.last_message_content,
+                'created_at': obj.last_message_created_at,
+                'sender_id': obj.last_message_sender_id
+            }
         last_msg = obj.messages.order_by('-created_at').first()
         if last_msg:
             return {
@@ -328,6 +482,8 @@ class ConversationSerializer(serializers.ModelSerializer):
         return None
 
     def get_unread_count(self, obj):
+        if hasattr(obj, 'unread_messages'):
+            return obj.unread_messages
         request = self.context.get('request')
         if request and request.user:
             return obj.messages.filter(is_read=False).exclude(sender=request.user).count()
@@ -348,15 +504,49 @@ class ConversationDetailSerializer(serializers.ModelSerializer):
     """Serializer for conversation with all messages"""
     employer_details = UserSerializer(source='employer', read_only=True)
     seeker_details = UserSerializer(source='seeker', read_only=True)
-    messages = MessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
+    has_archived_messages = serializers.SerializerMethodField()
     participant = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
         fields = ['id', 'employer_details', 'seeker_details', 'participant',
-                  'messages', 'created_at', 'updated_at']
+                  'messages', 'has_archived_messages', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def get_messages(self, obj):
+        """All hot messages, or with ?before=<message id>&limit=N one page reaching into the archive"""
+        request = self.context.get('request')
+        params = getattr(request, 'query_params', {})
+        hot = obj.messages.select_related('sender')
+        if not params.get('before') and not params.get('limit'):
+            return MessageSerializer(hot, many=True, context=self.context).data
+
+        try:
+            before = int(params['before']) if params.get('before') else None
+            limit = min(max(int(params.get('limit') or 50), 1), 200)
+        except ValueError:
+            raise serializers.ValidationError({'error': 'before and limit must be integers'})
+
+        if before is not None:
+            hot = hot.filter(id__lt=before)
+        page = list(hot.order_by('-id')[:limit])
+        # Archived chunks can interleave with hot rows left behind (e.g. unread), so merge by id
+        archived = MessageArchive.objects.page(obj, before_id=before, limit=limit)
+        if archived:
+            participants = {obj.employer_id: obj.employer, obj.seeker_id: obj.seeker}
+            page += [
+                Message(conversation=obj, sender=participants[row['sender_id']], **{
+                    key: value for key, value in row.items() if key != 'sender_id'
+                })
+                for row in archived if row['sender_id'] in participants
+            ]
+        page = sorted(page, key=lambda message: message.id)[-limit:]
+        return MessageSerializer(page, many=True, context=self.context).data
+
+    def get_has_archived_messages(self, obj):
+        return obj.archives.exists()
+
     def get_participant(self, obj):
         """Return the other participant's details based on current user"""
         request = self.context.get('request')
@@ -378,15 +568,18 @@ class SendMessageSerializer(serializers.Serializer):
             raise serializers.ValidationError('Message cannot be empty')
         return value.strip()
 
-    def validate_recipient_id(self, value):
-        try:
-            User.objects.get(id=value, is_active=True)
-        except User.DoesNotExist:
-            raise serializers.ValidationError('Recipient not found')
-        return value
+    # The recipient itself is checked once, by job.messaging.send
+
 
+class SavedJobSnapshotSerializer(SnapshotMixin, serializers.ModelSerializer):
+    snapshot_serializer = JobSnapshotSerializer
+    snapshot_source = 'job_id'
+    snapshot_field = 'job_details'
 
-from .models import SavedJob
+    class Meta:
+        model = SavedJob
+        fields = ['id', 'job_id', 'saved_at']
+        read_only_fields = fields
 
 
 class SavedJobSerializer(serializers.ModelSerializer):
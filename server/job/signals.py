@@ -0,0 +1,232 @@
+from collections import defaultdict
+
+from django.db.models import Case, F, PositiveIntegerField, QuerySet, When
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import facets
+from .autocomplete import index as autocomplete_index
+from .matching import JOB_MATCH_FIELDS, SEEKER_MATCH_FIELDS
+from .models import Application, ApplicationEvent, Job, JobCard, MatchScore, Message, Notification, User
+
+
+def _job_terms(job):
+    return (job.title, job.company, job.location)
+
+
+def _user_terms(user):
+    return (user.skills, user.location) if user.is_active else None
+
+
+# Autocomplete index: capture the stored values before a write so the
+# post-save handler can swap old terms for new ones incrementally, then
+# tell the other workers' indexes to rebuild (see job.generations).
+
+@receiver(pre_save, sender=Job)
+def remember_job_terms(sender, instance, **kwargs):
+    if not autocomplete_index.is_built:
+        return
+    old = None
+    if instance.pk:
+        old = Job.objects.filter(pk=instance.pk).values_list('title', 'company', 'location').first()
+    instance._autocomplete_old = old
+
+
+@receiver(post_save, sender=Job)
+def index_job_terms(sender, instance, update_fields=None, **kwargs):
+    if hasattr(instance, '_autocomplete_old'):
+        old = instance._autocomplete_old
+        del instance._autocomplete_old
+        if old != _job_terms(instance):
+            autocomplete_index.job_changed(old, _job_terms(instance))
+            autocomplete_index.changed()
+    elif update_fields is None or {'title', 'company', 'location'} & set(update_fields):
+        # Not built in this worker, so the old terms are unknown: assume they changed
+        autocomplete_index.changed()
+
+
+@receiver(post_delete, sender=Job)
+def unindex_job_terms(sender, instance, **kwargs):
+    autocomplete_index.job_changed(_job_terms(instance), None)
+    autocomplete_index.changed()
+
+
+@receiver(pre_save, sender=User)
+def remember_user_terms(sender, instance, update_fields=None, **kwargs):
+    if not autocomplete_index.is_built:
+        return
+    if update_fields is not None and not {'skills', 'location', 'is_active'} & set(update_fields):
+        return
+    old = None
+    if instance.pk:
+        row = User.objects.filter(pk=instance.pk).values_list('skills', 'location', 'is_active').first()
+        if row and row[2]:
+            old = (row[0], row[1])
+    instance._autocomplete_old = old
+
+
+@receiver(post_save, sender=User)
+def index_user_terms(sender, instance, update_fields=None, **kwargs):
+    if hasattr(instance, '_autocomplete_old'):
+        old = instance._autocomplete_old
+        del instance._autocomplete_old
+        if old != _user_terms(instance):
+            autocomplete_index.user_changed(old, _user_terms(instance))
+            autocomplete_index.changed()
+    elif update_fields is None or {'skills', 'location', 'is_active'} & set(update_fields):
+        autocomplete_index.changed()
+
+
+@receiver(post_delete, sender=User)
+def unindex_user_terms(sender, instance, **kwargs):
+    autocomplete_index.user_changed(_user_terms(instance), None)
+    autocomplete_index.changed()
+
+
+# Match scores: recompute only the stored pairs whose inputs changed
+
+@receiver(post_save, sender=Job)
+def refresh_job_match_scores(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not set(JOB_MATCH_FIELDS) & set(update_fields)):
+        return
+    MatchScore.objects.refresh_for_job(instance)
+
+
+@receiver(post_save, sender=User)
+def refresh_seeker_match_scores(sender, instance, created, update_fields=None, **kwargs):
+    if created or instance.role != 'seeker':
+        return
+    if update_fields is not None and not set(SEEKER_MATCH_FIELDS) & set(update_fields):
+        return
+    MatchScore.objects.refresh_for_seeker(instance)
+
+
+@receiver(post_save, sender=Application)
+def score_application(sender, instance, created, **kwargs):
+    if created:
+        MatchScore.objects.score_pair(instance.job, instance.seeker)
+
+
+# Near-duplicate detection: MinHash signature and LSH buckets per job
+
+@receiver(post_save, sender=Job)
+def store_job_signature(sender, instance, update_fields=None, **kwargs):
+    from .dedup import job_signature, store_signature
+
+    if update_fields is not None and not {'title', 'description', 'requirements'} & set(update_fields):
+        return
+    store_signature(instance.id, job_signature(instance))
+
+
+# Cached search facet counts
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_facets(sender, instance, **kwargs):
+    facets.invalidate()
+
+
+# Per-job status counters. Only a delete started from applications moves them row by row:
+# a deleted job takes its counters with it, and a deleted account is settled in one UPDATE up front.
+
+def _deleting(origin, model):
+    """Whether the delete() that sent a signal was called on `model` (an instance or a queryset)"""
+    return isinstance(origin, model) or (isinstance(origin, QuerySet) and origin.model is model)
+
+
+@receiver(post_delete, sender=Application)
+def uncount_application(sender, instance, origin=None, **kwargs):
+    if origin is None or _deleting(origin, Application):
+        instance.move_job_counters(instance.status, None)
+
+
+@receiver(pre_delete, sender=User)
+def uncount_seeker_applications(sender, instance, **kwargs):
+    # One application per job and seeker, so each job loses one from the status it was in.
+    # The user's own jobs are deleted with them, so their counters need no update.
+    jobs_by_status = defaultdict(list)
+    for job_id, status in (
+        Application.objects.filter(seeker=instance).exclude(job__posted_by=instance).values_list('job_id', 'status')
+    ):
+        jobs_by_status[status].append(job_id)
+    if not jobs_by_status:
+        return
+    job_ids = [job_id for ids in jobs_by_status.values() for job_id in ids]
+    Job.objects.filter(pk__in=job_ids).update(
+        applicant_count=F('applicant_count') - 1,
+        **{
+            f'{status}_count': Case(
+                When(pk__in=ids, then=F(f'{status}_count') - 1), default=F(f'{status}_count'),
+                output_field=PositiveIntegerField(),
+            )
+            for status, ids in jobs_by_status.items()
+        },
+    )
+    JobCard.objects.filter(job_id__in=job_ids).update(applicant_count=F('applicant_count') - 1)
+
+
+# Recommendation vectors: the index is heavy (NumPy), so only update it once built;
+# other workers rebuild theirs after the write commits (see job.generations)
+
+@receiver(post_save, sender=Job)
+def index_job_vector(sender, instance, update_fields=None, **kwargs):
+    from .recommender import index as recommender_index
+
+    if update_fields is not None and not {'title', 'description', 'requirements', 'type', 'place', 'status'} & set(update_fields):
+        return
+    if recommender_index.is_built:
+        if instance.status == 'open':
+            recommender_index.upsert(instance)
+        else:
+            recommender_index.remove(instance.id)
+    recommender_index.changed()
+
+
+@receiver(post_delete, sender=Job)
+def unindex_job_vector(sender, instance, **kwargs):
+    from .recommender import index as recommender_index
+
+    if recommender_index.is_built:
+        recommender_index.remove(instance.id)
+    recommender_index.changed()
+
+
+# Notifications: recorded here, batched into digests by send_notification_digests
+
+@receiver(post_save, sender=ApplicationEvent)
+def notify_application_event(sender, instance, created, **kwargs):
+    if not created:
+        return
+    if instance.from_status is None:
+        employer_id = Job.objects.filter(pk=instance.job_id).values_list('posted_by_id', flat=True).first()
+        Notification.objects.create(
+            recipient_id=employer_id, kind='application', actor_id=instance.seeker_id, job_id=instance.job_id,
+        )
+    elif instance.seeker_id and instance.to_status in Application.TRANSITIONS and instance.actor_id != instance.seeker_id:
+        Notification.objects.create(
+            recipient_id=instance.seeker_id, kind='status', actor_id=instance.actor_id,
+            job_id=instance.job_id, detail=instance.to_status,
+        )
+
+
+# Messaging participant cache (see job.messaging)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_messaging_participant(sender, instance, update_fields=None, **kwargs):
+    from .messaging import forget_participant
+
+    if update_fields is not None and not {'role', 'is_active'} & set(update_fields):
+        return
+    forget_participant(instance.pk)
+
+
+@receiver(post_save, sender=Message)
+def notify_message(sender, instance, created, **kwargs):
+    if not created:
+        return
+    conversation = instance.conversation
+    recipient_id = conversation.seeker_id if instance.sender_id == conversation.employer_id else conversation.employer_id
+    Notification.objects.create(
+        recipient_id=recipient_id, kind='message', actor_id=instance.sender_id, conversation_id=conversation.pk,
+    )
@@ -1,3 +1,1640 @@
-from django.test import TestCase
+"""Tests for the job API: a performance contract, then behaviour per feature.
 
-# Create your tests here.
+Every viewset action is called against a dataset seeded at scale N and again after
+growing it to 10N. The number of SQL queries must not change with the data size and
+must stay within the action's declared budget; a new N+1 (e.g. a nested serializer
+without select_related) fails here. A second suite, run only with PERF_TIMING=1 since
+wall-clock times depend on the machine, checks the read endpoints on a fixed dataset
+against per-action ceilings. Resume ingestion is tested end to end against files in
+media storage, and worker warmup leaves the first request nothing to build. The
+remaining classes each cover one feature's behaviour.
+
+    python manage.py test job
+    PERF_TIMING=1 python manage.py test job.tests.ResponseTimeTests
+"""
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from datetime import timedelta
+from itertools import count
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core import mail
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from api.profiling import ProfilingMiddleware, list_records
+
+from . import messaging
+from .autocomplete import PrefixIndex, index as autocomplete_index
+from .coalesce import SingleFlight, request_key
+from .matching import compute_match_score
+from .models import (
+    Application, ApplicationArchive, ApplicationEvent, Conversation, Job, JobArchive, JobCard, MatchScore, Message,
+    Notification, ResumeDocument, ResumeTerm, SavedCandidate, SavedJob, User,
+)
+from .recommender import JobVectorIndex, index as recommender_index
+from .salary import parse_salary
+from .throttling import LocalBucketStore, local_store, parse_rate
+from .user_import import UserImporter, read_rows
+from .warmup import warm
+
+N = 3
+SCALE = 10
+# Response-time ceilings are opt-in (PERF_TIMING=1) and multiplied by PERF_CEILING_SCALE,
+# e.g. 3 on a slow box; query-count budgets are the gate everywhere
+TIMING_ENABLED = os.environ.get('PERF_TIMING', 'False').lower() in ('1', 'true', 'yes')
+CEILING_SCALE = float(os.environ.get('PERF_CEILING_SCALE', '1'))
+TIMING_ROWS = 50
+
+# A 1x1 transparent PNG
+PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+
+def _user(email, role='seeker', **fields):
+    user = User.objects.create_user(
+        email=email, username=email.split('@')[0], password='pw123456', role=role, name=email, **fields
+    )
+    Token.objects.create(user=user)
+    return user
+
+
+def _client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=user).key}')
+    return client
+
+
+def _job(employer, label):
+    # Distinct wording per job so near-duplicate detection leaves them alone
+    return Job.objects.create(
+        posted_by=employer, title=f'{label} engineer', company=employer.company or 'Acme',
+        location='Nairobi', salary='KES 50,000 - 80,000 per month', requirements=['python', label],
+        description=f'Build {label} systems; {label} ownership of {label} pipelines and {label} tooling.',
+    )
+
+
+class Dataset:
+    """Rows for the measured users, grown in place by `grow(n)`"""
+
+    def __init__(self):
+        self.seeker = _user('seeker@example.com', skills=['python', 'django'], location='Nairobi')
+        self.employer = _user('employer@example.com', role='employer', company='Acme', industry='Tech')
+        self.admin = _user('admin@example.com', is_staff=True, is_superuser=True)
+        self.jobs = []
+        self.seekers = []
+        self.count = 0
+
+    def grow(self, n):
+        """Add n of everything that lists, counts or nests per row"""
+        for _ in range(n):
+            i = self.count = self.count + 1
+            seeker = _user(f'seeker{i}@example.com', skills=['python', f'skill{i}'], location='Nairobi')
+            ResumeTerm.objects.bulk_create([ResumeTerm(user=seeker, term=term) for term in ('python', 'kubernetes')])
+            employer = _user(f'employer{i}@example.com', role='employer', company=f'Company {i}', industry='Tech')
+            job = _job(self.employer, f'role{i}')
+            other_job = _job(employer, f'other{i}')
+            self.jobs.append(job)
+            self.seekers.append(seeker)
+
+            for applicant, target in ((seeker, self.jobs[0]), (self.seeker, job), (self.seeker, other_job)):
+                application = Application(job=target, seeker=applicant)
+                application.changed_by = applicant
+                application.save()
+            SavedJob.objects.create(seeker=self.seeker, job=other_job)
+            SavedCandidate.objects.create(employer=self.employer, candidate=seeker, notes='maybe')
+
+            for employer_side, seeker_side in ((employer, self.seeker), (self.employer, seeker)):
+                conversation = Conversation.objects.create(employer=employer_side, seeker=seeker_side)
+                Message.objects.create(conversation=conversation, sender=employer_side, content='Hello')
+                Message.objects.create(conversation=conversation, sender=seeker_side, content='Hi there')
+        self.conversation = Conversation.objects.filter(seeker=self.seeker).earliest('pk')
+        self.application = Application.objects.filter(job=self.jobs[0]).earliest('pk')
+        self.some_seeker = User.objects.get(email='seeker1@example.com')
+        self.some_employer = User.objects.get(email='employer1@example.com')
+
+
+# (name, acting user, method, path, body, query budget). Paths and bodies are callables
+# of (dataset, fresh) where `fresh` is a counter for rows an action creates or deletes.
+def _fresh_job(d, i):
+    return _job(d.employer, f'fresh{i}')
+
+
+def _apply(job, seeker):
+    application = Application(job=job, seeker=seeker)
+    application.changed_by = seeker
+    application.save()
+    return application
+
+
+def _job_with_applicants(d, i):
+    """A fresh job every measured seeker applied to, so deleting it cascades per row"""
+    job = _fresh_job(d, i)
+    for seeker in d.seekers:
+        _apply(job, seeker)
+    return job
+
+
+def _seeker_with_history(d, i, label):
+    """A fresh seeker who applied to every measured job and wrote to the employer once per row"""
+    seeker = _user(f'{label}{i}@example.com')
+    for job in d.jobs:
+        _apply(job, seeker)
+    conversation = Conversation.objects.create(employer=d.employer, seeker=seeker)
+    Message.objects.bulk_create([
+        Message(conversation=conversation, sender=seeker, content=f'Note {n}') for n in range(d.count)
+    ])
+    return seeker
+
+
+def _fresh_application(d, i):
+    return _apply(d.jobs[0], _user(f'applicant{i}@example.com'))
+
+
+ACTIONS = [
+    # Auth and autocomplete
+    ('register', None, 'post', '/api/auth/register/',
+     lambda d, i: {'email': f'new{i}@example.com', 'password': 'pw123456', 'role': 'seeker'}, 11),
+    ('login', None, 'post', '/api/auth/login/',
+     lambda d, i: {'email': 'seeker@example.com', 'password': 'pw123456'}, 2),
+    ('autocomplete', None, 'get', '/api/autocomplete/?q=pyt', None, 0),
+
+    # Users
+    ('user list', 'admin', 'get', '/api/users/', None, 2),
+    ('user retrieve', 'seeker', 'get', lambda d, i: f'/api/users/{d.employer.pk}/', None, 2),
+    ('user partial_update', 'seeker', 'patch', lambda d, i: f'/api/users/{d.seeker.pk}/', {'bio': 'Updated'}, 10),
+    ('user destroy', 'admin', 'delete',
+     lambda d, i: f"/api/users/{_seeker_with_history(d, i, 'doomed').pk}/", None, 31),
+    ('user me', 'seeker', 'get', '/api/users/me/', None, 1),
+    ('user me update', 'seeker', 'patch', '/api/users/me/', {'bio': 'Me'}, 9),
+    ('user seekers', None, 'get', '/api/users/seekers/', None, 1),
+    ('user employers', None, 'get', '/api/users/employers/', None, 1),
+    ('user seekers by resume', 'employer', 'get', '/api/users/seekers/?resume=kubernetes', None, 2),
+
+    # Profile
+    ('profile', 'seeker', 'get', '/api/profile/', None, 1),
+    ('profile me', 'seeker', 'get', '/api/profile/me/', None, 1),
+    ('profile me update', 'seeker', 'patch', '/api/profile/me/', {'bio': 'Profile'}, 9),
+    ('profile me delete', None, 'delete', '/api/profile/me/', None, 30),
+    ('profile seekers', None, 'get', '/api/profile/seekers/', None, 1),
+    ('profile employers', None, 'get', '/api/profile/employers/', None, 1),
+    ('profile company', 'employer', 'patch', '/api/profile/company/', {'industry': 'Software'}, 7),
+    ('profile skills', 'seeker', 'patch', '/api/profile/skills/', lambda d, i: {'skills': ['python', f'go{i}']}, 13),
+    ('profile avatar', 'seeker', 'post', '/api/profile/avatar/', 'avatar', 7),
+
+    # Directory
+    ('directory seekers', None, 'get', '/api/directory/seekers/', None, 1),
+    ('directory seekers by skill', None, 'get', '/api/directory/seekers/?skills=python', None, 1),
+    ('directory employers', None, 'get', '/api/directory/employers/?industry=Tech', None, 1),
+    ('directory seekers by resume', 'employer', 'get', '/api/directory/seekers/?resume=python+kubernetes', None, 2),
+
+    # Jobs
+    ('job list', None, 'get', '/api/jobs/', None, 1),
+    ('job search', None, 'get', '/api/jobs/?search=engineer&type=full-time', None, 1),
+    ('job create', 'employer', 'post', '/api/jobs/',
+     lambda d, i: {'title': f'Created {i} analyst', 'company': 'Acme', 'location': 'Nairobi',
+                   'description': f'Analyse created{i} numbers for created{i} teams', 'requirements': []}, 17),
+    ('job retrieve', None, 'get', lambda d, i: f'/api/jobs/{d.jobs[0].pk}/', None, 1),
+    ('job update', 'employer', 'put', lambda d, i: f'/api/jobs/{d.jobs[0].pk}/',
+     lambda d, i: {'title': 'Lead engineer', 'company': 'Acme', 'location': 'Nairobi',
+                   'description': d.jobs[0].description, 'requirements': ['python']}, 21),
+    ('job partial_update', 'employer', 'patch', lambda d, i: f'/api/jobs/{d.jobs[0].pk}/',
+     {'salary': 'KES 60,000 - 90,000 per month'}, 10),
+    ('job destroy', 'employer', 'delete', lambda d, i: f'/api/jobs/{_job_with_applicants(d, i).pk}/', None, 15),
+    ('job my_jobs', 'employer', 'get', '/api/jobs/my_jobs/', None, 2),
+    ('job by_employer', None, 'get', lambda d, i: f'/api/jobs/by_employer/?employer_id={d.employer.pk}', None, 1),
+    ('job recent', None, 'get', '/api/jobs/recent/', None, 1),
+    ('job recommended', 'seeker', 'get', '/api/jobs/recommended/', None, 3),
+    ('job facets', None, 'get', '/api/jobs/facets/?type=full-time', None, 5),
+    ('job application_stats', 'employer', 'get',
+     lambda d, i: f'/api/jobs/{d.jobs[0].pk}/application-stats/', None, 2),
+
+    # Applications
+    ('application list (seeker)', 'seeker', 'get', '/api/applications/', None, 2),
+    ('application list (employer)', 'employer', 'get', '/api/applications/', None, 2),
+    ('application create', 'seeker', 'post', '/api/applications/',
+     lambda d, i: {'job_id': _fresh_job(d, i).pk}, 18),
+    ('application retrieve', 'employer', 'get', lambda d, i: f'/api/applications/{d.application.pk}/', None, 2),
+    ('application destroy', 'employer', 'delete',
+     lambda d, i: f'/api/applications/{_fresh_application(d, i).pk}/', None, 9),
+    ('application my_applications', 'seeker', 'get', '/api/applications/my-applications/', None, 2),
+    ('application for_job', 'employer', 'get', lambda d, i: f'/api/applications/for-job/{d.jobs[0].pk}/', None, 3),
+    ('application status', 'employer', 'patch', lambda d, i: f'/api/applications/{_fresh_application(d, i).pk}/status/',
+     {'status': 'reviewed'}, 9),
+    ('application history', 'employer', 'get', lambda d, i: f'/api/applications/{d.application.pk}/history/', None, 3),
+    ('application check', 'seeker', 'get', lambda d, i: f'/api/applications/check/{d.jobs[0].pk}/', None, 2),
+
+    # Saved candidates
+    ('saved candidate list', 'employer', 'get', '/api/saved-candidates/', None, 2),
+    ('saved candidate snapshot', 'employer', 'get', '/api/saved-candidates/?view=snapshot', None, 3),
+    ('saved candidate ids', 'employer', 'get', '/api/saved-candidates/?view=ids', None, 2),
+    ('saved candidate create', 'employer', 'post', '/api/saved-candidates/',
+     lambda d, i: {'candidate_id': _user(f'candidate{i}@example.com').pk}, 4),
+    ('saved candidate retrieve', 'employer', 'get',
+     lambda d, i: f'/api/saved-candidates/{SavedCandidate.objects.filter(employer=d.employer).earliest("pk").pk}/',
+     None, 2),
+    ('saved candidate update', 'employer', 'patch',
+     lambda d, i: f'/api/saved-candidates/{SavedCandidate.objects.filter(employer=d.employer).earliest("pk").pk}/',
+     {'notes': 'Call back'}, 3),
+    ('saved candidate destroy', 'employer', 'delete',
+     lambda d, i: f'/api/saved-candidates/{SavedCandidate.objects.create(employer=d.employer, candidate=_user(f"gone{i}@example.com")).pk}/',
+     None, 3),
+    ('saved candidate check', 'employer', 'get', lambda d, i: f'/api/saved-candidates/check/{d.some_seeker.pk}/', None, 2),
+    ('saved candidate notes', 'employer', 'patch', lambda d, i: f'/api/saved-candidates/notes/{d.some_seeker.pk}/',
+     {'notes': 'Strong'}, 4),
+    ('saved candidate remove', 'employer', 'delete',
+     lambda d, i: f'/api/saved-candidates/by-candidate/{SavedCandidate.objects.create(employer=d.employer, candidate=_user(f"removed{i}@example.com")).candidate_id}/',
+     None, 3),
+
+    # Saved jobs
+    ('saved job list', 'seeker', 'get', '/api/saved-jobs/', None, 2),
+    ('saved job snapshot', 'seeker', 'get', '/api/saved-jobs/?view=snapshot', None, 3),
+    ('saved job ids', 'seeker', 'get', '/api/saved-jobs/?view=ids', None, 2),
+    ('saved job create', 'seeker', 'post', '/api/saved-jobs/', lambda d, i: {'job_id': _fresh_job(d, i).pk}, 5),
+    ('saved job destroy', 'seeker', 'delete',
+     lambda d, i: f'/api/saved-jobs/{SavedJob.objects.create(seeker=d.seeker, job=_fresh_job(d, i)).job_id}/', None, 3),
+    ('saved job check', 'seeker', 'get', lambda d, i: f'/api/saved-jobs/check/{d.jobs[0].pk}/', None, 2),
+
+    # Conversations
+    ('conversation list', 'seeker', 'get', '/api/conversations/', None, 2),
+    ('conversation retrieve', 'seeker', 'get', lambda d, i: f'/api/conversations/{d.conversation.pk}/', None, 7),
+    ('conversation destroy', 'seeker', 'delete',
+     lambda d, i: f'/api/conversations/{Conversation.objects.create(employer=_user(f"talk{i}@example.com", role="employer"), seeker=d.seeker).pk}/',
+     None, 6),
+    ('conversation send', 'seeker', 'post', '/api/conversations/send/',
+     lambda d, i: {'recipient_id': d.some_employer.pk, 'content': f'Message {i}'}, 8),
+    ('conversation reply', 'seeker', 'post', lambda d, i: f'/api/conversations/{d.conversation.pk}/reply/',
+     lambda d, i: {'content': f'Reply {i}'}, 7),
+    ('conversation mark_read', 'seeker', 'post', lambda d, i: f'/api/conversations/{d.conversation.pk}/mark-read/', None, 3),
+    ('conversation with_user', 'seeker', 'get',
+     lambda d, i: f'/api/conversations/with-user/{d.conversation.employer_id}/', None, 8),
+    ('conversation unread_count', 'seeker', 'get', '/api/conversations/unread-count/', None, 2),
+]
+# Not covered: POST /api/conversations/ (conversations are created by send/), POST /api/users/
+# (email is read-only there, so a second create collides on the empty address) and
+# POST /api/users/import/ (its cost is the password hashing pool, not queries).
+
+# Read endpoints timed on TIMING_ROWS rows: (action name, ceiling in ms)
+CEILINGS_MS = {
+    'job list': 300, 'job search': 300, 'job retrieve': 100, 'job recent': 150,
+    'job by_employer': 300, 'job my_jobs': 400, 'job recommended': 400, 'job facets': 200,
+    'user seekers': 300, 'user employers': 300, 'profile seekers': 300, 'profile employers': 300,
+    'directory seekers': 150, 'directory employers': 150,
+    'application list (seeker)': 500, 'application list (employer)': 500,
+    'application my_applications': 500, 'application for_job': 500,
+    'saved job list': 500, 'saved candidate list': 400,
+    'saved job snapshot': 150, 'saved candidate snapshot': 150, 'saved job ids': 50, 'saved candidate ids': 50,
+    'conversation list': 300, 'conversation retrieve': 200, 'conversation unread_count': 100,
+}
+
+
+def _resolve(value, dataset, fresh):
+    return value(dataset, fresh) if callable(value) else value
+
+
+# call() clears the cache, which the in-memory indexes would take for another worker's
+# write (job.generations) and rebuild mid-measurement; they are built once per dataset
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], SITE_URL='http://testserver',
+    INDEX_REFRESH_SECONDS=3600,
+)
+class ApiPerformanceTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.fresh = 0
+
+    def build(self, n):
+        dataset = Dataset()
+        dataset.grow(n)
+        # In-memory indexes are kept current by signals once built; build them now so
+        # every measured request sees the same (warm) state
+        autocomplete_index.build()
+        recommender_index.build()
+        return dataset
+
+    def call(self, dataset, action):
+        """Issue one action from a clean cache; returns the response and its query count"""
+        name, role, method, path, body, _ = action
+        self.fresh += 1
+        path = _resolve(path, dataset, self.fresh)
+        body = _resolve(body, dataset, self.fresh)
+        client = APIClient()
+        if role is None and name == 'profile me delete':
+            role = _seeker_with_history(dataset, self.fresh, 'leaving')
+        if role is not None:
+            user = role if isinstance(role, User) else getattr(dataset, role)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=user).key}')
+        if body == 'avatar':
+            body, fmt = {'avatar': SimpleUploadedFile('a.png', PNG, content_type='image/png')}, 'multipart'
+        else:
+            fmt = 'json'
+        cache.clear()
+        local_store.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(path, body, format=fmt)
+        self.assertLess(response.status_code, 400, f'{name}: {response.status_code} {getattr(response, "data", "")}')
+        return response, len(queries)
+
+
+class QueryCountTests(ApiPerformanceTestCase):
+    def test_query_counts_are_constant_and_within_budget(self):
+        dataset = self.build(N)
+        small = {action[0]: self.call(dataset, action)[1] for action in ACTIONS}
+        dataset.grow(N * (SCALE - 1))
+        large = {action[0]: self.call(dataset, action)[1] for action in ACTIONS}
+
+        for name, role, method, path, body, budget in ACTIONS:
+            with self.subTest(action=name):
+                self.assertEqual(
+                    small[name], large[name],
+                    f'{name}: {small[name]} queries at N={N}, {large[name]} at N={N * SCALE}',
+                )
+                self.assertLessEqual(large[name], budget, f'{name}: {large[name]} queries, budget {budget}')
+
+
+@skipUnless(TIMING_ENABLED, 'wall-clock ceilings run with PERF_TIMING=1')
+class ResponseTimeTests(ApiPerformanceTestCase):
+    def test_read_endpoints_stay_under_their_ceilings(self):
+        dataset = self.build(TIMING_ROWS)
+        actions = {action[0]: action for action in ACTIONS}
+        for name, ceiling_ms in CEILINGS_MS.items():
+            with self.subTest(action=name):
+                self.call(dataset, actions[name])  # warm up
+                best = min(self._timed(dataset, actions[name]) for _ in range(3))
+                self.assertLessEqual(
+                    best, ceiling_ms * CEILING_SCALE,
+                    f'{name}: {best:.0f} ms on {TIMING_ROWS} rows, ceiling {ceiling_ms * CEILING_SCALE:.0f} ms',
+                )
+
+    def _timed(self, dataset, action):
+        start = time.perf_counter()
+        self.call(dataset, action)
+        return (time.perf_counter() - start) * 1000
+
+
+def _pdf(*lines):
+    """A one-page PDF showing `lines` through a Flate-compressed content stream"""
+    ops = ['BT /F1 12 Tf 72 720 Td']
+    for line in lines:
+        # Split each line into a kerned TJ array the way word processors write it
+        parts = ' '.join(f'({word}) -250' for word in line.split())
+        ops.append(f'[{parts}] TJ T*')
+    content = zlib.compress(('\n'.join(ops) + ' ET').encode('latin-1'))
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content) + content + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    out, offsets = bytearray(b'%PDF-1.4\n'), []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _docx(*paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    document = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('word/document.xml', document)
+    return buffer.getvalue()
+
+
+@override_settings(RESUME_FETCHER='job.resumes.MediaFetcher')
+class ResumeIngestionTests(ApiPerformanceTestCase):
+    def setUp(self):
+        super().setUp()
+        # Profile skills are the vocabulary resume skills are recognised from
+        _user('vocabulary@example.com', skills=['Kubernetes', 'Machine Learning', 'C++'])
+        self.employer = _user('hiring@example.com', role='employer', company='Acme')
+
+    def upload(self, name, data):
+        return 'http://testserver' + default_storage.url(default_storage.save(f'resumes/{name}', ContentFile(data)))
+
+    def ingest(self, *args):
+        out = io.StringIO()
+        call_command('ingest_resumes', *args, stdout=out)
+        return out.getvalue()
+
+    def search(self, path, user=None):
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=user).key}')
+        local_store.clear()
+        return client.get(path)
+
+    def test_pdf_and_docx_resumes_are_indexed_and_searchable(self):
+        pdf_seeker = _user('pdf@example.com', resume=self.upload('pdf.pdf', _pdf(
+            'Platform engineer running Kubernetes clusters', 'Wrote C++ services and machine learning tooling',
+        )))
+        docx_seeker = _user('docx@example.com', resume=self.upload('docx.docx', _docx(
+            'Data analyst', 'Machine learning with Python and SQL',
+        )))
+        self.assertEqual(ResumeDocument.objects.filter(status='pending').count(), 2)
+
+        self.assertIn('Indexed 2 resumes', self.ingest())
+        pdf_document = ResumeDocument.objects.get(user=pdf_seeker)
+        self.assertEqual(pdf_document.status, 'indexed')
+        self.assertIn('Platform engineer running Kubernetes clusters', pdf_document.text)
+        self.assertEqual(pdf_document.skills, ['kubernetes', 'c++', 'machine learning'])
+        self.assertEqual(ResumeDocument.objects.get(user=docx_seeker).skills, ['machine learning'])
+
+        response = self.search('/api/directory/seekers/?resume=kubernetes+c%2B%2B', self.employer)
+        self.assertEqual([row['id'] for row in response.data['results']], [pdf_seeker.pk])
+        response = self.search('/api/users/seekers/?resume=machine+learning', self.employer)
+        self.assertEqual({row['id'] for row in response.data}, {pdf_seeker.pk, docx_seeker.pk})
+        self.assertIn('email', response.data[0])  # the talent pool keeps its full shape
+        self.assertEqual(self.search('/api/profile/seekers/?resume=kubernetes').status_code, 403)
+
+    def test_ingestion_is_incremental(self):
+        seeker = _user('moving@example.com', resume=self.upload('first.docx', _docx('Kubernetes operator')))
+        self.ingest()
+        self.assertIn('Indexed 0 resumes, 0 unchanged, 0 failed', self.ingest())
+
+        # Requeued files whose content did not change are not re-extracted
+        self.assertIn('Indexed 0 resumes, 1 unchanged', self.ingest('--requeue'))
+
+        seeker.resume = self.upload('second.docx', _docx('Rust developer'))
+        seeker.save(update_fields=['resume'])
+        self.assertEqual(ResumeDocument.objects.get(user=seeker).status, 'pending')
+        self.ingest()
+        self.assertEqual(set(ResumeTerm.objects.filter(user=seeker).values_list('term', flat=True)), {'rust', 'developer'})
+
+        seeker.resume = ''
+        seeker.save(update_fields=['resume'])
+        self.assertFalse(ResumeDocument.objects.filter(user=seeker).exists())
+        self.assertFalse(ResumeTerm.objects.filter(user=seeker).exists())
+
+    def test_unreadable_files_are_marked_failed(self):
+        seeker = _user('broken@example.com', resume=self.upload('broken.docx', b'PK\x03\x04not really a zip'))
+        missing = _user('missing@example.com', resume='http://testserver/media/resumes/nowhere.pdf')
+        self.assertIn('2 failed', self.ingest())
+        self.assertEqual(ResumeDocument.objects.get(user=seeker).error, 'Not a DOCX file')
+        self.assertEqual(ResumeDocument.objects.get(user=missing).attempts, 1)
+
+
+class WarmupTests(ApiPerformanceTestCase):
+    def test_first_request_after_warmup_builds_nothing(self):
+        dataset = Dataset()
+        dataset.grow(N)
+        autocomplete_index.is_built = recommender_index.is_built = False
+        timings = warm(['database', 'urls', 'storage', 'autocomplete', 'recommender'])
+        self.assertNotIn(None, timings.values())
+        self.assertTrue(autocomplete_index.is_built and recommender_index.is_built)
+        _, queries = self.call(dataset, ('autocomplete', None, 'get', '/api/autocomplete/?q=pyt', None, 0))
+        self.assertEqual(queries, 0)
+
+    def test_warmup_runs_under_an_event_loop(self):
+        async def boot():
+            return warm(['database', 'urls', 'storage'])
+
+        # A connection would belong to the warmup thread, so only process-wide steps run
+        self.assertEqual(list(asyncio.run(boot())), ['urls', 'storage'])
+
+    def test_unknown_steps_are_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            warm(['urls', 'bogus'])
+
+    def test_startup_profile_reports_imports_and_steps(self):
+        out = io.StringIO()
+        call_command('startup_profile', '--steps', 'urls', '--prefix', 'job', stdout=out)
+        self.assertIn('warmup urls:', out.getvalue())
+        self.assertIn('job.views', out.getvalue())
+
+
+class ApplicationStatusTests(TestCase):
+    def setUp(self):
+        self.employer = _user('hiring@example.com', role='employer', company='Acme')
+        self.seeker = _user('applying@example.com')
+        self.job = _job(self.employer, 'status')
+        response = _client(self.seeker).post(
+            '/api/applications/', {'job_id': self.job.pk, 'status': 'accepted'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.application = Application.objects.get(pk=response.data['id'])
+
+    def move(self, user, status):
+        return _client(user).patch(f'/api/applications/{self.application.pk}/status/', {'status': status}, format='json')
+
+    def test_status_is_not_writable_through_the_application(self):
+        self.assertEqual(self.application.status, 'pending')
+        for method in ('put', 'patch'):
+            response = getattr(_client(self.seeker), method)(
+                f'/api/applications/{self.application.pk}/', {'job_id': self.job.pk, 'status': 'accepted'}, format='json'
+            )
+            self.assertEqual(response.status_code, 405)
+        self.assertEqual(self.move(self.seeker, 'accepted').status_code, 403)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'pending')
+
+    def test_transitions_are_enforced(self):
+        self.assertEqual(self.move(self.employer, 'accepted').status_code, 200)
+        self.assertEqual(self.move(self.employer, 'pending').status_code, 400)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'accepted')
+        self.assertEqual(
+            list(self.application.events.values_list('from_status', 'to_status')),
+            [(None, 'pending'), ('pending', 'accepted')],
+        )
+
+    def test_deleting_applications_releases_the_job_counters(self):
+        other = _user('second@example.com')
+        application = Application(job=self.job, seeker=other)
+        application.changed_by = other
+        application.save()
+        self.assertEqual(self.move(self.employer, 'reviewed').status_code, 200)
+
+        def counters():
+            job = Job.objects.get(pk=self.job.pk)
+            card = JobCard.objects.get(job=self.job)
+            return job.applicant_count, card.applicant_count, job.pending_count, job.reviewed_count
+
+        self.assertEqual(counters(), (2, 2, 1, 1))
+        self.assertEqual(_client(self.seeker).delete(f'/api/applications/{self.application.pk}/').status_code, 204)
+        self.assertEqual(counters(), (1, 1, 1, 0))
+        other.delete()  # cascades to the application
+        self.assertEqual(counters(), (0, 0, 0, 0))
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_cascaded_deletes_settle_counters_without_per_row_updates(self):
+        jobs = [self.job] + [_job(self.employer, f'cascade{i}') for i in range(2)]
+        for job in jobs[1:]:
+            Application.objects.create(job=job, seeker=self.seeker)
+        for i in range(20):
+            Application.objects.create(job=jobs[2], seeker=_user(f'cascade{i}@example.com'))
+
+        def counter_updates(queries):
+            return [query['sql'] for query in queries if query['sql'].startswith('UPDATE') and '_count' in query['sql']]
+
+        # The seeker's three applications: one UPDATE for the jobs, one for their cards
+        with CaptureQueriesContext(connection) as queries:
+            self.seeker.delete()
+        self.assertEqual(len(counter_updates(queries)), 2)
+        self.assertEqual(
+            list(Job.objects.filter(pk__in=[job.pk for job in jobs]).order_by('pk').values_list('applicant_count', 'pending_count')),
+            [(0, 0), (0, 0), (20, 20)],
+        )
+        self.assertEqual(JobCard.objects.get(job=jobs[2]).applicant_count, 20)
+
+        # The job's own counters go with it
+        with CaptureQueriesContext(connection) as queries:
+            jobs[2].delete()
+        self.assertEqual(counter_updates(queries), [])
+        self.assertFalse(Application.objects.filter(job_id=jobs[2].pk).exists())
+
+
+class UsernameAllocationTests(TestCase):
+    def allocate(self, email):
+        return User.objects.create_user_with_free_username(email, 'zzinfo', 'pw123456').username
+
+    def test_suffixes_continue_from_the_highest(self):
+        self.assertEqual(self.allocate('a@example.com'), 'zzinfo')
+        self.assertEqual(self.allocate('b@example.com'), 'zzinfo1')
+        _user('zzinfo41@example.com')  # username zzinfo41
+        self.assertEqual(self.allocate('c@example.com'), 'zzinfo42')
+
+    def test_long_suffixes_do_not_wedge_signups(self):
+        _user('zzinfo@example.com')
+        _user('zzinfo999999999@example.com')
+        self.assertEqual(self.allocate('a@example.com'), 'zzinfo1000000000')
+        self.assertEqual(self.allocate('b@example.com'), 'zzinfo1000000001')
+
+        # Past what a 64-bit integer holds the suffix is not counted; allocation goes random
+        _user('zzinfo1000000000000000000@example.com')
+        _user('zzinfo999999999999999999@example.com')
+        username = self.allocate('c@example.com')
+        self.assertRegex(username, r'^zzinfo[0-9]+$')
+        self.assertEqual(User.objects.filter(username__startswith='zzinfo').count(), 7)
+
+
+class SalaryParsingTests(SimpleTestCase):
+    # text -> (min, max, currency, period)
+    CASES = {
+        'KES 80k - 120k per month': (80_000, 120_000, 'KES', 'month'),
+        '80k/month': (80_000, 80_000, None, 'month'),
+        '$120k/yr': (120_000, 120_000, 'USD', 'year'),
+        'USD 30 / hr': (30, 30, 'USD', 'hour'),
+        '1,500 EUR a week': (1_500, 1_500, 'EUR', 'week'),
+        '£200 per day': (200, 200, 'GBP', 'day'),
+        '50k p.a.': (50_000, 50_000, None, 'year'),
+        'Up to 5000000000': (None, None, None, None),
+        'KES 50,000 - 90000000000': (50_000, 50_000, 'KES', None),
+        '2147483647': (2_147_483_647, 2_147_483_647, None, None),
+        # Ranges and suffixes
+        '50-80k': (50_000, 80_000, None, None),
+        '1.5M - 2M': (1_500_000, 2_000_000, None, None),
+        '50,000 - 80,000 KES': (50_000, 80_000, 'KES', None),
+        '60000 to 90000 per year': (60_000, 90_000, None, 'year'),
+        'Ksh. 45,000': (45_000, 45_000, 'KES', None),
+        '50000€': (50_000, 50_000, 'EUR', None),
+        '50000': (50_000, 50_000, None, None),
+        'Salary: 70000': (70_000, 70_000, None, None),
+        # Numbers that are not salaries
+        'Competitive, plus 401k': (None, None, None, None),
+        '2 years experience, 50k': (50_000, 50_000, None, None),
+        '5-7 years, KES 100k': (100_000, 100_000, 'KES', None),
+        'Team of 12, paid 4000 a month': (4_000, 4_000, None, 'month'),
+        'Negotiable': (None, None, None, None),
+        '': (None, None, None, None),
+    }
+
+    def test_cases(self):
+        for text, expected in self.CASES.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_salary(text), expected)
+
+
+class MatchScoreOrderingTests(TestCase):
+    def setUp(self):
+        self.employer = _user('scoring@example.com', role='employer', company='Acme')
+        self.job = _job(self.employer, 'scored')
+        self.seekers = [_user(f'ranked{i}@example.com') for i in range(4)]
+        for seeker in self.seekers:
+            application = Application(job=self.job, seeker=seeker)
+            application.changed_by = seeker
+            application.save()
+        for seeker, score in zip(self.seekers, (40, 90, 10)):
+            MatchScore.objects.filter(job=self.job, seeker=seeker).update(score=score)
+        MatchScore.objects.filter(seeker=self.seekers[3]).delete()  # not scored yet
+
+    def test_ordering_by_score_joins_the_stored_scores(self):
+        client = _client(self.employer)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/applications/for-job/{self.job.pk}/?ordering=-match_score')
+        sql = queries[-1]['sql']
+        self.assertIn('LEFT OUTER JOIN "job_matchscore"', sql)
+        self.assertNotIn('(SELECT', sql)
+        self.assertEqual([row['match_score'] for row in response.data], [90, 40, 10, None])
+
+        response = client.get(f'/api/applications/for-job/{self.job.pk}/?ordering=match_score')
+        self.assertEqual([row['match_score'] for row in response.data], [10, 40, 90, None])
+
+
+class MatchScoreRecomputeTests(TestCase):
+    def setUp(self):
+        self.employer = _user('rescoring@example.com', role='employer', company='Acme')
+        self.job = _job(self.employer, 'rescored')
+        self.seekers = [_user(f'rescored{i}@example.com', skills=['python']) for i in range(2)]
+        for seeker in self.seekers:
+            Application.objects.create(job=self.job, seeker=seeker)
+
+    def scores(self):
+        return dict(MatchScore.objects.filter(job=self.job).values_list('seeker_id', 'score'))
+
+    def test_only_pairs_whose_inputs_changed_are_recomputed(self):
+        first, second = self.seekers
+        self.assertEqual(self.scores()[first.pk], compute_match_score(self.job, first))
+        MatchScore.objects.filter(job=self.job).update(score=0)
+
+        self.job.status = 'closed'
+        self.job.save(update_fields=['status'])  # not a match input
+        self.assertEqual(self.scores(), {first.pk: 0, second.pk: 0})
+
+        first.bio = 'Python services and rescored pipelines'
+        first.save()
+        self.assertEqual(self.scores(), {first.pk: compute_match_score(self.job, first), second.pk: 0})
+
+        self.job.requirements = ['python']
+        self.job.save()
+        self.assertEqual(self.scores(), {
+            first.pk: compute_match_score(self.job, first), second.pk: compute_match_score(self.job, second),
+        })
+
+    def test_backfill_writes_only_missing_or_stale_scores(self):
+        MatchScore.objects.filter(seeker=self.seekers[0]).delete()
+        out = io.StringIO()
+        call_command('compute_match_scores', stdout=out)
+        self.assertIn('Wrote 1 match scores', out.getvalue())
+        self.assertEqual(len(self.scores()), 2)
+        call_command('compute_match_scores', stdout=out)
+        self.assertIn('Wrote 0 match scores', out.getvalue())
+
+
+class AutocompleteTests(TestCase):
+    def test_prefix_search_ranks_by_frequency_and_matches_inner_words(self):
+        index = PrefixIndex()
+        index.add('Senior Developer', 'title', count=3)
+        index.add('Developer Advocate', 'title', count=5)
+        index.add('Designer', 'title')
+        index.add('Devon', 'location', count=9)
+        self.assertEqual(
+            [result['value'] for result in index.search('dev', kind='title')],
+            ['Developer Advocate', 'Senior Developer'],
+        )
+        self.assertEqual(index.search('de', limit=2)[0], {'value': 'Devon', 'kind': 'location', 'count': 9})
+        index.remove('Devon', 'location', count=9)
+        self.assertEqual([result['kind'] for result in index.search('de')], ['title'] * 3)
+
+    def test_a_full_index_keeps_the_term_being_added(self):
+        index = PrefixIndex(max_terms=10)
+        for i in range(9):
+            index.add(f'common {i}', 'skill', count=5)
+        index.add('old rare', 'skill')
+        index.add('brand new', 'skill')
+        self.assertEqual(index.search('brand'), [{'value': 'brand new', 'kind': 'skill', 'count': 1}])
+        self.assertEqual(index.search('old'), [])
+        self.assertLessEqual(len(index), 10)
+
+    @override_settings(INDEX_REFRESH_SECONDS=0)
+    def test_other_workers_rebuild_after_a_write(self):
+        employer = _user('indexing@example.com', role='employer', company='Acme')
+        _job(employer, 'existing')
+        autocomplete_index.build()
+        other_worker = PrefixIndex()
+        other_worker.build()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            _job(employer, 'zookeeper')
+        with self.assertNumQueries(0):
+            autocomplete_index.ensure_current()  # made the write, so already current
+        self.assertEqual(len(autocomplete_index.search('zookeeper')), 1)
+
+        self.assertEqual(other_worker.search('zookeeper'), [])
+        other_worker.ensure_current()
+        self.assertEqual(len(other_worker.search('zookeeper')), 1)
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.employer = _user('recommending@example.com', role='employer', company='Acme')
+        self.seeker = _user('recommended@example.com', skills=['python', 'django'])
+        self.jobs = [_job(self.employer, f'python{i}') for i in range(6)]
+
+    def test_jobs_expired_in_bulk_do_not_shorten_the_list(self):
+        recommender_index.build()
+        expired = [job.pk for job in self.jobs[:4]]
+        Job.objects.filter(pk__in=expired).update(expires_at=timezone.now() - timedelta(days=1))
+        response = _client(self.seeker).get('/api/jobs/recommended/?limit=2')
+        self.assertEqual(len(response.data), 2)
+        self.assertFalse({row['id'] for row in response.data} & set(expired))
+        self.assertLess(len(recommender_index), 6)  # expired jobs met on the way are dropped
+
+    @override_settings(INDEX_REFRESH_SECONDS=0)
+    def test_other_workers_rebuild_after_a_write(self):
+        recommender_index.build()
+        other_worker = JobVectorIndex()
+        other_worker.build()
+        with self.captureOnCommitCallbacks(execute=True):
+            closed = self.jobs[0]
+            closed.status = 'closed'
+            closed.save()
+        with self.assertNumQueries(0):
+            recommender_index.ensure_current()
+        self.assertEqual((len(recommender_index), len(other_worker)), (5, 6))
+        other_worker.ensure_current()
+        self.assertEqual(len(other_worker), 5)
+
+
+class JobArchivalTests(TestCase):
+    def setUp(self):
+        self.employer = _user('archiving@example.com', role='employer', company='Acme')
+        self.seekers = [_user(f'archived{i}@example.com') for i in range(3)]
+        self.job = _job(self.employer, 'archived')
+        self.job.expires_at = timezone.now() - timedelta(days=1)
+        self.job.save()
+        for seeker in self.seekers:
+            Application.objects.create(job=self.job, seeker=seeker)
+        application = Application.objects.get(seeker=self.seekers[0])
+        application.status = 'reviewed'
+        application.changed_by = self.employer
+        application.save()
+
+    def test_expiry_then_archival_moves_rows_with_their_history(self):
+        call_command('archive_jobs', '--skip-archive', stdout=io.StringIO())
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, JobCard.objects.get(job=self.job).status), ('expired', 'expired'))
+        self.assertNotIn(self.job.pk, [row['id'] for row in _client(self.seekers[0]).get('/api/jobs/').data])
+
+        Job.objects.filter(pk=self.job.pk).update(closed_at=timezone.now() - timedelta(days=400))
+        with CaptureQueriesContext(connection) as queries:
+            call_command('archive_jobs', '--older-than-days', '30', stdout=io.StringIO())
+        # No per-application counter updates on the way out
+        counter_updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertFalse([sql for sql in counter_updates if 'applicant_count' in sql])
+
+        self.assertFalse(Job.objects.filter(pk=self.job.pk).exists())
+        self.assertFalse(Application.objects.filter(job_id=self.job.pk).exists())
+        self.assertFalse(ApplicationEvent.objects.filter(job_id=self.job.pk).exists())
+        archived = JobArchive.objects.get(pk=self.job.pk)
+        self.assertEqual((archived.status, archived.title), ('expired', 'archived engineer'))
+        self.assertEqual(archived.data['reviewed_count'], 1)
+        applications = ApplicationArchive.objects.filter(job=archived)
+        self.assertEqual(applications.count(), 3)
+        history = applications.get(seeker_id=self.seekers[0].pk).events
+        self.assertEqual(
+            [(event['from_status'], event['to_status'], event['actor_id']) for event in history],
+            [(None, 'pending', None), ('pending', 'reviewed', self.employer.pk)],
+        )
+
+    def test_employers_close_and_reopen_jobs(self):
+        job = _job(self.employer, 'lifecycle')
+        lifetime = job.expires_at - job.posted_at
+        self.assertEqual(round(lifetime / timedelta(days=1)), 60)
+        employer, seeker = _client(self.employer), _client(self.seekers[1])
+
+        def listed():
+            return job.pk in {row['id'] for row in seeker.get('/api/jobs/').data}
+
+        self.assertEqual(employer.patch(f'/api/jobs/{job.pk}/', {'status': 'closed'}, format='json').status_code, 200)
+        job.refresh_from_db()
+        self.assertIsNotNone(job.closed_at)
+        self.assertFalse(listed())
+        self.assertEqual(seeker.post('/api/applications/', {'job_id': job.pk}, format='json').status_code, 400)
+
+        self.assertEqual(employer.patch(f'/api/jobs/{job.pk}/', {'status': 'expired'}, format='json').status_code, 400)
+        past = (timezone.now() - timedelta(days=1)).isoformat()
+        response = employer.patch(f'/api/jobs/{job.pk}/', {'status': 'open', 'expires_at': past}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(employer.patch(f'/api/jobs/{job.pk}/', {'status': 'open'}, format='json').status_code, 200)
+        job.refresh_from_db()
+        self.assertIsNone(job.closed_at)
+        self.assertTrue(listed())
+
+
+class RadiusSearchTests(TestCase):
+    def setUp(self):
+        self.employer = _user('placing@example.com', role='employer', company='Acme')
+        self.jobs = {}
+        for location in ('Nairobi', 'Westlands, Thika, Kenya', 'Mombasa', 'Atlantis'):
+            job = _job(self.employer, location.split(',')[0].lower())
+            job.location = location
+            job.save()  # no places yet, so left unlinked
+            self.jobs[location] = job.pk
+        call_command('load_gazetteer', stdout=io.StringIO())
+
+    def search(self, query):
+        response = _client(self.employer).get(f'/api/jobs/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.data}
+
+    def test_gazetteer_load_links_existing_jobs(self):
+        self.assertEqual(Job.objects.get(pk=self.jobs['Westlands, Thika, Kenya']).place.name, 'Thika')
+        self.assertEqual(JobCard.objects.get(job_id=self.jobs['Mombasa']).place.name, 'Mombasa')
+        self.assertIsNone(Job.objects.get(pk=self.jobs['Atlantis']).place)
+
+    def test_radius_around_a_place_or_a_point(self):
+        nairobi, thika, mombasa = self.jobs['Nairobi'], self.jobs['Westlands, Thika, Kenya'], self.jobs['Mombasa']
+        self.assertEqual(self.search('near=Nairobi&radius=60'), {nairobi, thika})
+        self.assertEqual(self.search('near=nairobi&radius=10'), {nairobi})
+        self.assertEqual(self.search('lat=-1.05&lon=37.07&radius=10'), {thika})
+        self.assertEqual(self.search('near=Nairobi&radius=500'), {nairobi, thika, mombasa})
+        # Unknown places fall back to matching the text, bad coordinates match nothing
+        self.assertEqual(self.search('near=atlantis'), {self.jobs['Atlantis']})
+        self.assertEqual(self.search('lat=north&lon=36.8'), set())
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def read_database(self, method, path, token='Token first', status=200):
+        """The alias a model read inside the view would use"""
+        seen = []
+
+        def view(request):
+            seen.append(PrimaryReplicaRouter().db_for_read(Job))
+            return HttpResponse(status=status)
+
+        request = getattr(RequestFactory(), method)(path, HTTP_AUTHORIZATION=token)
+        ReplicaRoutingMiddleware(view)(request)
+        return seen[0]
+
+    def test_only_allow_listed_reads_use_a_replica(self):
+        self.assertEqual(self.read_database('get', '/api/jobs/'), 'replica_1')
+        self.assertEqual(self.read_database('get', '/api/jobs/7/'), 'replica_1')
+        self.assertEqual(self.read_database('get', '/api/applications/'), 'default')
+        self.assertEqual(self.read_database('post', '/api/jobs/'), 'default')
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.read_database('get', '/api/jobs/'), 'default')
+
+    def test_a_write_pins_that_client_to_the_primary(self):
+        self.read_database('post', '/api/jobs/', status=400)  # failed writes change nothing
+        self.assertEqual(self.read_database('get', '/api/jobs/'), 'replica_1')
+        self.read_database('post', '/api/jobs/', status=201)
+        self.assertEqual(self.read_database('get', '/api/jobs/'), 'default')
+        self.assertEqual(self.read_database('get', '/api/jobs/', token='Token second'), 'replica_1')
+
+    def test_pinned_clients_do_not_share_replica_reads(self):
+        keys = []
+
+        def view(request):
+            keys.append(request_key('job-list', request))
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        middleware = ReplicaRoutingMiddleware(view)
+        factory = RequestFactory()
+        middleware(factory.get('/api/jobs/', HTTP_AUTHORIZATION='Token second'))
+        middleware(factory.post('/api/jobs/', HTTP_AUTHORIZATION='Token first'))
+        middleware(factory.get('/api/jobs/', HTTP_AUTHORIZATION='Token first'))
+        middleware(factory.get('/api/jobs/', HTTP_AUTHORIZATION='Token third'))
+        self.assertNotEqual(keys[0], keys[2])
+        self.assertEqual(keys[0], keys[3])
+
+    def test_async_requests_are_routed_the_same_way(self):
+        async def view(request):
+            return HttpResponse(PrimaryReplicaRouter().db_for_read(Job))
+
+        middleware = ReplicaRoutingMiddleware(view)
+        factory = RequestFactory()
+        token = {'HTTP_AUTHORIZATION': 'Token first'}
+        self.assertEqual(asyncio.run(middleware(factory.get('/api/jobs/', **token))).content, b'replica_1')
+        asyncio.run(middleware(factory.delete('/api/jobs/7/', **token)))
+        self.assertEqual(asyncio.run(middleware(factory.get('/api/jobs/', **token))).content, b'default')
+
+
+class JobCardSyncTests(TestCase):
+    def setUp(self):
+        self.employer = _user('carding@example.com', role='employer', company='Acme')
+        self.jobs = [_job(self.employer, f'carded{i}') for i in range(2)]
+
+    def listed(self):
+        return {row['id']: row for row in _client(self.employer).get('/api/jobs/').data}
+
+    def test_cards_follow_job_and_employer_writes(self):
+        job = self.jobs[0]
+        job.title = 'Renamed engineer'
+        job.salary = 'USD 4k a month'
+        job.save()
+        row = self.listed()[job.pk]
+        self.assertEqual((row['title'], row['salary_min'], row['salary_currency']), ('Renamed engineer', 4000, 'USD'))
+
+        self.employer.name = 'Carding Ltd hiring'
+        self.employer.save(update_fields=['name'])
+        self.assertEqual({row['posted_by_details']['name'] for row in self.listed().values()}, {'Carding Ltd hiring'})
+
+        # The list keeps the employer fields the full serializer returned before cards
+        full = _client(self.employer).get(f'/api/jobs/{job.pk}/').data['posted_by_details']
+        details = self.listed()[job.pk]['posted_by_details']
+        self.assertEqual(details, {key: full[key] for key in ('id', 'name', 'email', 'company', 'avatar')})
+        self.employer.email = 'hiring@carding.example.com'
+        self.employer.save(update_fields=['email'])
+        self.assertEqual(self.listed()[job.pk]['posted_by_details']['email'], 'hiring@carding.example.com')
+
+        self.jobs[1].delete()
+        self.assertEqual(list(self.listed()), [job.pk])
+        self.assertEqual(JobCard.objects.count(), 1)
+
+    def test_rebuild_repairs_cards_after_bulk_updates(self):
+        Job.objects.filter(pk__in=[job.pk for job in self.jobs]).update(title='Bulk title')
+        self.assertNotIn('Bulk title', {row['title'] for row in self.listed().values()})
+        out = io.StringIO()
+        call_command('rebuild_job_cards', '--batch-size', '1', stdout=out)
+        self.assertIn('Rebuilt 2 job cards', out.getvalue())
+        self.assertEqual({row['title'] for row in self.listed().values()}, {'Bulk title'})
+
+
+class MessageArchiveTests(TestCase):
+    def setUp(self):
+        self.employer = _user('archiving-messages@example.com', role='employer', company='Acme')
+        self.seeker = _user('archived-messages@example.com')
+        self.conversation = Conversation.objects.create(employer=self.employer, seeker=self.seeker)
+        self.messages = [
+            Message.objects.create(
+                conversation=self.conversation, sender=self.employer if i % 2 else self.seeker,
+                content=f'Message {i} \N{SNOWMAN}', is_read=True,
+            )
+            for i in range(9)
+        ]
+        old = timezone.now() - timedelta(days=100)
+        Message.objects.filter(pk__in=[message.pk for message in self.messages[:7]]).update(created_at=old)
+        # Unread messages stay hot; the employer sent this one, so their reads leave it unread
+        Message.objects.filter(pk=self.messages[3].pk).update(is_read=False)
+
+    def fetch(self, query=''):
+        response = _client(self.employer).get(f'/api/conversations/{self.conversation.pk}/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_archived_messages_read_back_unchanged(self):
+        before = self.fetch('?limit=50')['messages']
+        out = io.StringIO()
+        call_command('archive_messages', '--older-than-days', '30', '--chunk-size', '4', stdout=out)
+        self.assertIn('Archived 6 messages from 1 conversations', out.getvalue())
+        self.assertEqual(self.conversation.archives.count(), 2)
+        self.assertEqual(
+            list(Message.objects.filter(conversation=self.conversation).values_list('pk', flat=True)),
+            [self.messages[i].pk for i in (3, 7, 8)],
+        )
+
+        data = self.fetch('?limit=50')
+        self.assertTrue(data['has_archived_messages'])
+        self.assertEqual(data['messages'], before)
+        page = self.fetch(f'?before={self.messages[5].pk}&limit=3')['messages']
+        self.assertEqual([row['id'] for row in page], [self.messages[i].pk for i in (2, 3, 4)])
+
+
+class _ObservedFlight(SingleFlight):
+    """Counts callers joining a flight, so a test can wait for them"""
+
+    def __init__(self):
+        super().__init__()
+        self.joined = threading.Semaphore(0)
+
+    def _join(self, key):
+        joined = super()._join(key)
+        self.joined.release()
+        return joined
+
+
+@override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'job_search': '2/min', 'directory': None}})
+class ThrottleAndCoalesceTests(TestCase):
+    def setUp(self):
+        local_store.clear()
+        self.seeker = _user('throttled@example.com')
+
+    def test_token_bucket_allows_a_burst_then_refills(self):
+        store = LocalBucketStore()
+        capacity, refill_rate = parse_rate('3/min')
+        self.assertEqual([store.consume('client', capacity, refill_rate, now=0) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(store.consume('client', capacity, refill_rate, now=0), 20)
+        self.assertEqual(store.consume('other', capacity, refill_rate, now=0), 0)
+        self.assertEqual(store.consume('client', capacity, refill_rate, now=20), 0)
+
+    @override_settings(THROTTLE_BACKEND='cache')
+    def test_search_is_throttled_per_client(self):
+        cache.clear()
+        client = _client(self.seeker)
+        self.assertEqual([client.get('/api/jobs/?search=python').status_code for _ in range(2)], [200, 200])
+        response = client.get('/api/jobs/?search=python')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(client.get('/api/jobs/').status_code, 200)  # plain lists are not rationed
+        self.assertEqual(_client(_user('other@example.com')).get('/api/jobs/?search=python').status_code, 200)
+
+    @override_settings(REST_FRAMEWORK={
+        'DEFAULT_THROTTLE_RATES': {'job_search': '2/min', 'directory': None}, 'NUM_PROXIES': 1,
+    })
+    def test_anonymous_clients_cannot_dodge_the_limit_with_x_forwarded_for(self):
+        # Behind one proxy (the NUM_PROXIES default, as on Render)
+        client = APIClient()
+
+        def search(spoofed, address='203.0.113.9'):
+            # The proxy appends the address it saw after whatever the client sent
+            return client.get('/api/jobs/?search=python', HTTP_X_FORWARDED_FOR=f'{spoofed}, {address}').status_code
+
+        self.assertEqual([search(f'198.51.100.{i}') for i in range(3)], [200, 200, 429])
+        self.assertEqual(search('198.51.100.9', address='203.0.113.10'), 200)
+
+    def test_concurrent_identical_calls_share_one_run(self):
+        flight = _ObservedFlight()
+        runs = []
+
+        def work():
+            runs.append(1)
+            # Hold the call open until the second caller has joined it
+            self.assertTrue(flight.joined.acquire(timeout=5) and flight.joined.acquire(timeout=5))
+            return object()
+
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(flight.do('key', work)))
+        leader = threading.Thread(target=lambda: results.append(flight.do('key', work)))
+        leader.start()
+        waiter.start()
+        leader.join(5)
+        waiter.join(5)
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0], results[1])
+        # Nothing is cached once the call has finished
+        self.assertIsNot(flight.do('key', object), results[0])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserImportTests(TestCase):
+    ROWS = [
+        '{"email": "Ada@Example.com", "username": "ada", "password": "s3cret!", "skills": "Python; Django"}',
+        '{"email": "Ada@EXAMPLE.com", "username": "ada2"}',
+        '{"email": "broken"',
+        '["not", "an", "object"]',
+        '{"name": "No Email"}',
+        '{"email": "taken@example.com"}',
+        '{"email": "fresh@example.com", "username": "taken"}',
+        '{"email": "taken@elsewhere.com", "location": "Nairobi"}',
+    ]
+
+    def setUp(self):
+        _user('taken@example.com')
+
+    def run_import(self, **options):
+        rows = read_rows(io.StringIO('\n'.join(self.ROWS)), 'jsonl')
+        return UserImporter(batch_size=3, workers=1, **options).run(rows).as_dict()
+
+    def test_bad_and_duplicate_rows_are_reported_and_the_rest_imported(self):
+        result = self.run_import()
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(
+            [(error['row'], error['error']) for error in result['errors']],
+            [(3, 'invalid JSON'), (4, 'not a JSON object'), (5, 'a valid email is required')],
+        )
+        self.assertEqual(
+            [(duplicate['row'], duplicate['reason']) for duplicate in result['duplicates']],
+            [(2, 'email repeated in file'), (6, 'email already registered'), (7, 'username already taken')],
+        )
+        ada = User.objects.get(email='Ada@example.com')
+        self.assertTrue(ada.check_password('s3cret!'))
+        self.assertEqual(ada.skills, ['Python', 'Django'])
+        self.assertTrue(Token.objects.filter(user=ada).exists())
+        self.assertEqual(User.objects.get(email='taken@elsewhere.com').username, 'taken1')
+
+    def test_dry_run_writes_nothing(self):
+        self.assertEqual(self.run_import(dry_run=True)['created'], 2)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_endpoint_is_admin_only(self):
+        def upload():
+            return SimpleUploadedFile('users.jsonl', '\n'.join(self.ROWS).encode(), 'application/x-ndjson')
+
+        response = _client(_user('member@example.com')).post('/api/users/import/', {'file': upload()})
+        self.assertEqual(response.status_code, 403)
+        admin = _user('admin@example.com', is_staff=True)
+        response = _client(admin).post('/api/users/import/', {'file': upload(), 'dry_run': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], len(response.data['errors'])), (2, 3))
+        response = _client(admin).post('/api/users/import/', {'file': SimpleUploadedFile('users.xlsx', b'')})
+        self.assertEqual(response.status_code, 400)
+
+        # Larger files go through the management command
+        with override_settings(USER_IMPORT_MAX_ROWS=len(self.ROWS) - 1):
+            response = _client(admin).post('/api/users/import/', {'file': upload()})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('manage.py import_users', response.data['error'])
+        self.assertFalse(User.objects.filter(email='fresh@example.com').exists())
+        with override_settings(USER_IMPORT_MAX_ROWS=len(self.ROWS)):
+            response = _client(admin).post('/api/users/import/', {'file': upload()})
+        self.assertEqual((response.status_code, response.data['created']), (201, 2))
+
+
+class FailingSender:
+    """Digest sender that refuses employers, for the retry test"""
+    sent = []
+
+    def send(self, recipient, subject, body):
+        if recipient.role == 'employer':
+            raise ConnectionError('mail server down')
+        self.sent.append((recipient.email, subject, body))
+
+
+@override_settings(NOTIFICATION_SENDER='job.notifications.EmailSender')
+class NotificationDigestTests(TestCase):
+    def setUp(self):
+        self.employer = _user('digesting@example.com', role='employer', company='Acme')
+        self.seekers = [_user(f'digested{i}@example.com') for i in range(3)]
+        self.jobs = [_job(self.employer, 'digest'), _job(self.employer, 'other')]
+        for seeker in self.seekers:
+            _client(seeker).post('/api/applications/', {'job_id': self.jobs[0].pk}, format='json')
+        _client(self.seekers[0]).post('/api/applications/', {'job_id': self.jobs[1].pk}, format='json')
+        application = Application.objects.get(job=self.jobs[0], seeker=self.seekers[0])
+        for status in ('reviewed', 'accepted'):
+            _client(self.employer).patch(f'/api/applications/{application.pk}/status/', {'status': status}, format='json')
+        for content in ('Hello', 'Are you free?'):
+            _client(self.seekers[1]).post(
+                '/api/conversations/send/', {'recipient_id': self.employer.pk, 'content': content}, format='json'
+            )
+
+    def send_digests(self, age_minutes=20):
+        Notification.objects.pending().update(created_at=timezone.now() - timedelta(minutes=age_minutes))
+        out = io.StringIO()
+        call_command('send_notification_digests', '--window-minutes', '15', stdout=out)
+        return out.getvalue()
+
+    def test_one_digest_per_recipient_once_the_window_has_passed(self):
+        self.assertIn('Sent 0 digests', self.send_digests(age_minutes=5))
+        self.assertIn('Sent 2 digests covering 8 notifications', self.send_digests())
+        digests = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(
+            digests['digesting@example.com'].subject, 'You have 4 new applications and 2 new messages'
+        )
+        self.assertIn('digest engineer: 3', digests['digesting@example.com'].body)
+        self.assertIn(f'from {self.seekers[1].name}: 2', digests['digesting@example.com'].body)
+        self.assertEqual(digests['digested0@example.com'].subject, 'You have 1 application update')
+        self.assertIn('digest engineer: accepted', digests['digested0@example.com'].body)
+        self.assertIn('Sent 0 digests', self.send_digests())
+
+    @override_settings(NOTIFICATION_SENDER='job.tests.FailingSender')
+    def test_failed_sends_are_retried_on_the_next_run(self):
+        FailingSender.sent = []
+        with self.assertLogs('job.management.commands.send_notification_digests', 'ERROR'):
+            self.assertIn('Sent 1 digests covering 2 notifications', self.send_digests())
+        self.assertEqual([email for email, _, _ in FailingSender.sent], ['digested0@example.com'])
+        self.assertEqual(Notification.objects.pending().filter(recipient=self.employer).count(), 6)
+
+
+class DuplicateJobTests(TestCase):
+    POSTING = {
+        'title': 'Senior Backend Engineer', 'company': 'Acme', 'location': 'Nairobi', 'type': 'full-time',
+        'description': 'Design and run the payment APIs, own their reliability, mentor two engineers '
+                       'and work with product on the roadmap for merchant onboarding.',
+        'requirements': ['Python', 'Django', 'PostgreSQL'],
+    }
+
+    def setUp(self):
+        self.employer = _user('deduping@example.com', role='employer', company='Acme')
+
+    def post(self, **changes):
+        return _client(self.employer).post('/api/jobs/', {**self.POSTING, **changes}, format='json')
+
+    def listed(self, query=''):
+        return {row['id'] for row in _client(self.employer).get(f'/api/jobs/{query}').data}
+
+    def test_reposts_are_flagged_and_collapsed(self):
+        original = self.post().data['id']
+        repost = self.post(title='Senior backend engineer!')
+        self.assertEqual(repost.status_code, 201)
+        self.assertEqual(repost.data['duplicate_of'], original)
+        other = self.post(title='Data Analyst', description='Build dashboards and reports for the sales team.')
+        self.assertIsNone(other.data['duplicate_of'])
+
+        self.assertEqual(self.listed(), {original, repost.data['id'], other.data['id']})
+        self.assertEqual(self.listed('?collapse_duplicates=1'), {original, other.data['id']})
+        with override_settings(JOB_DUPLICATE_POLICY='reject'):
+            response = self.post()
+        self.assertEqual((response.status_code, response.data['duplicate_of']), (409, original))
+
+        # Reposting a closed job is legitimate
+        Job.objects.filter(pk__in=[original, repost.data['id']]).update(status='closed')
+        self.assertIsNone(self.post().data['duplicate_of'])
+
+    def test_other_employers_postings_are_never_duplicates(self):
+        original = self.post().data['id']
+        rival = _user('rival@example.com', role='employer', company='Globex')
+        with override_settings(JOB_DUPLICATE_POLICY='reject'):
+            response = _client(rival).post('/api/jobs/', {**self.POSTING, 'company': 'Globex'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.data['duplicate_of'])
+        self.assertEqual(self.listed('?collapse_duplicates=1'), {original, response.data['id']})
+
+        call_command('cluster_duplicate_jobs', stdout=io.StringIO())
+        self.assertFalse(Job.objects.filter(duplicate_of__isnull=False).exists())
+
+    def test_clustering_marks_jobs_created_without_signatures(self):
+        jobs = Job.objects.bulk_create([
+            Job(posted_by=self.employer, **self.POSTING),
+            Job(posted_by=self.employer, **{**self.POSTING, 'title': 'SENIOR BACKEND ENGINEER'}),
+            Job(posted_by=self.employer, **{**self.POSTING, 'title': 'Nurse', 'description': 'Night shifts.'}),
+        ])
+        JobCard.objects.refresh([job.pk for job in jobs])
+        out = io.StringIO()
+        call_command('cluster_duplicate_jobs', stdout=out)
+        self.assertIn('Computed 3 signatures', out.getvalue())
+        self.assertEqual(
+            dict(JobCard.objects.values_list('job_id', 'duplicate_of_id')),
+            {jobs[0].pk: None, jobs[1].pk: jobs[0].pk, jobs[2].pk: None},
+        )
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class DirectoryTests(TestCase):
+    def setUp(self):
+        local_store.clear()
+        self.seekers = [
+            _user(f'listed{i}@example.com', skills=skills, location=location)
+            for i, (skills, location) in enumerate([
+                (['Python', 'Django'], 'Nairobi'), (['python'], 'Nairobi'), (['Django', 'PYTHON', 'Go'], 'Mombasa'),
+                ([], ''), (['Java'], 'Nairobi'),
+            ])
+        ]
+        _user('unlisted@example.com', skills=['Python', 'Django'], is_active=False)
+        _user('fintech@example.com', role='employer', company='Pay', industry='fintech', company_size='11-50')
+        _user('bigtech@example.com', role='employer', company='Big', industry='fintech', company_size='500+')
+
+    def get(self, path):
+        response = APIClient().get(path)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_pages_walk_every_active_seeker_once(self):
+        page = self.get('/api/directory/seekers/?limit=2')
+        self.assertEqual(set(page['results'][0]), {'id', 'name', 'location', 'skills', 'avatar'})
+        seen = []
+        while True:
+            self.assertLessEqual(len(page['results']), 2)
+            seen += [row['id'] for row in page['results']]
+            if not page['next']:
+                break
+            page = self.get(page['next'])
+        self.assertEqual(seen, sorted((seeker.pk for seeker in self.seekers), reverse=True))
+
+    def test_filters(self):
+        def ids(query, role='seekers'):
+            return {row['id'] for row in self.get(f'/api/directory/{role}/?{query}')['results']}
+
+        first, second, third, _, fifth = (seeker.pk for seeker in self.seekers)
+        self.assertEqual(ids('skills=python,DJANGO'), {first, third})
+        self.assertEqual(ids('skills=python&location=Nairobi'), {first, second})
+        self.assertEqual(ids('location=nairobi'), {first, second, fifth})
+        self.assertEqual(len(ids('industry=fintech', 'employers')), 2)
+        employers = self.get('/api/directory/employers/?industry=fintech&company_size=500%2B')['results']
+        self.assertEqual([row['company'] for row in employers], ['Big'])
+
+    def test_resume_search_is_for_employers(self):
+        response = APIClient().get('/api/directory/seekers/?resume=python')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(LEGACY_DIRECTORY_MAX_ROWS=3)
+    def test_legacy_listings_are_capped_and_deprecated(self):
+        for path in ('/api/users/seekers/', '/api/profile/seekers/'):
+            response = APIClient().get(path)
+            self.assertEqual([row['id'] for row in response.data], [seeker.pk for seeker in self.seekers[:1:-1]])
+            self.assertEqual(response['Deprecation'], 'true')
+            self.assertEqual(response['Link'], '</api/directory/seekers/>; rel="successor-version"')
+        response = APIClient().get('/api/users/employers/')
+        self.assertEqual((len(response.data), response['Link']), (2, '</api/directory/employers/>; rel="successor-version"'))
+
+
+class VersionPreconditionTests(TestCase):
+    def setUp(self):
+        self.employer = _user('versioning@example.com', role='employer', company='Acme')
+        self.job = _job(self.employer, 'versioned')
+        self.client = _client(self.employer)
+
+    def edit(self, if_match=None, path=None, **data):
+        headers = {'HTTP_IF_MATCH': if_match} if if_match is not None else {}
+        return self.client.patch(path or f'/api/jobs/{self.job.pk}/', data, format='json', **headers)
+
+    def test_stale_if_match_is_refused_with_the_current_version(self):
+        etag = self.client.get(f'/api/jobs/{self.job.pk}/')['ETag']
+        response = self.edit(etag, title='First edit')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        stale = self.edit(etag, title='Lost update')
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(stale['ETag'], response['ETag'])
+        self.assertEqual(f'"{stale.data["version"]}"', response['ETag'])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.title, 'First edit')
+
+        # Weak and listed tags match, a wildcard or no header skips the check
+        self.assertEqual(self.edit(f'"0", W/{response["ETag"]}', title='Second edit').status_code, 200)
+        self.assertEqual(self.edit('*', title='Third edit').status_code, 200)
+        self.assertEqual(self.edit(title='Fourth edit').status_code, 200)
+
+    def test_profile_edits_check_the_user_version(self):
+        etag = self.client.get('/api/profile/me/')['ETag']
+        path = '/api/profile/company/'
+        self.assertEqual(self.edit(etag, path=path, industry='fintech').status_code, 200)
+        response = self.edit(etag, path=path, industry='retail')
+        self.assertEqual(response.status_code, 412)
+        self.employer.refresh_from_db()
+        self.assertEqual(self.employer.industry, 'fintech')
+
+    def test_the_spa_origin_may_send_if_match_and_read_the_etag(self):
+        origin = {'HTTP_ORIGIN': 'https://ai-job-portal-kohl.vercel.app'}
+        preflight = self.client.options(
+            f'/api/jobs/{self.job.pk}/', HTTP_ACCESS_CONTROL_REQUEST_METHOD='PATCH',
+            HTTP_ACCESS_CONTROL_REQUEST_HEADERS='authorization, content-type, if-match', **origin,
+        )
+        self.assertEqual(preflight.status_code, 200)
+        self.assertIn('if-match', preflight['Access-Control-Allow-Headers'])
+        self.assertIn('PATCH', preflight['Access-Control-Allow-Methods'])
+
+        response = self.client.get(f'/api/jobs/{self.job.pk}/', **origin)
+        self.assertEqual(response['Access-Control-Allow-Origin'], origin['HTTP_ORIGIN'])
+        self.assertIn('etag', response['Access-Control-Expose-Headers'].lower())
+        self.assertTrue(response['ETag'])
+
+    def test_saving_a_stale_job_keeps_counters_written_since(self):
+        stale = Job.objects.get(pk=self.job.pk)
+        Application.objects.create(job=self.job, seeker=_user('counted@example.com'))
+        stale.title = 'Edited from a stale copy'
+        stale.save()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.title, self.job.applicant_count, self.job.pending_count), (stale.title, 1, 1))
+
+
+class MessageSendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = _user('messaging@example.com', role='employer', company='Acme')
+        self.seeker = _user('messaged@example.com')
+
+    def send(self, sender, recipient_id, content='Hello'):
+        return _client(sender).post(
+            '/api/conversations/send/', {'recipient_id': recipient_id, 'content': content}, format='json'
+        )
+
+    def test_sends_reuse_one_conversation_per_pair(self):
+        first = self.send(self.employer, self.seeker.pk)
+        self.assertEqual(first.status_code, 201)
+        answer = self.send(self.seeker, self.employer.pk, 'Hi back')
+        self.assertEqual(answer.data['conversation_id'], first.data['conversation_id'])
+        conversation = Conversation.objects.get()
+        self.assertEqual(
+            list(conversation.messages.values_list('sender_id', 'content')),
+            [(self.employer.pk, 'Hello'), (self.seeker.pk, 'Hi back')],
+        )
+        self.assertEqual(Notification.objects.filter(kind='message', recipient=self.seeker).count(), 1)
+
+        # Warm: bump the conversation, insert the message and its notification
+        sent_at = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            messaging.send(self.employer, self.seeker.pk, 'Cached')
+        statements = [query['sql'].split()[0] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(statements, ['UPDATE', 'INSERT', 'INSERT'])
+        conversation.refresh_from_db()
+        self.assertGreaterEqual(conversation.updated_at, sent_at)
+
+    def test_a_conversation_deleted_behind_the_cache_is_recreated(self):
+        first = self.send(self.employer, self.seeker.pk).data['conversation_id']
+        Conversation.objects.filter(pk=first).delete()
+        second = self.send(self.employer, self.seeker.pk)
+        self.assertEqual(second.status_code, 201)
+        self.assertNotEqual(second.data['conversation_id'], first)
+        self.assertEqual(Conversation.objects.get().messages.count(), 1)
+
+    def test_refused_sends(self):
+        other_seeker = _user('peer@example.com')
+        response = self.send(self.seeker, other_seeker.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Messages can only be sent between employers and seekers')
+        self.assertEqual(self.send(self.seeker, 987654).data, {'recipient_id': ['Recipient not found']})
+
+        self.assertEqual(self.send(self.employer, self.seeker.pk).status_code, 201)  # caches the seeker
+        self.seeker.is_active = False
+        self.seeker.save(update_fields=['is_active'])
+        self.assertEqual(self.send(self.employer, self.seeker.pk).status_code, 400)
+
+        conversation = Conversation.objects.get()
+        response = _client(other_seeker).post(
+            f'/api/conversations/{conversation.pk}/reply/', {'content': 'Hi'}, format='json'
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(conversation.messages.count(), 1)
+
+
+class FacetCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_store.clear()
+        self.employer = _user('faceting@example.com', role='employer', company='Acme')
+        self.jobs = [_job(self.employer, f'faceted{i}') for i in range(3)]
+        self.jobs[2].location = 'Mombasa'
+        self.jobs[2].type = 'contract'
+        self.jobs[2].save()
+
+    def facets(self, query=''):
+        response = APIClient().get(f'/api/jobs/facets/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def counts(self, data, facet):
+        return {row['value']: row['count'] for row in data['facets'][facet]}
+
+    def test_each_facet_ignores_its_own_filter(self):
+        data = self.facets('?location=Nairobi')
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(self.counts(data, 'location'), {'Nairobi': 2, 'Mombasa': 1})
+        self.assertEqual(self.counts(data, 'type'), {'full-time': 2})
+        self.assertEqual(data['facets']['salary_band'], [{'value': '50000-100000', 'currency': 'KES', 'count': 2}])
+
+    def test_counts_are_cached_until_a_job_changes(self):
+        self.assertEqual(self.facets()['total'], 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.facets()['total'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            _job(self.employer, 'faceted3')
+        self.assertEqual(self.facets()['total'], 4)
+
+        # Bulk expiry goes around Job.save and invalidates explicitly
+        Job.objects.filter(pk=self.jobs[0].pk).update(expires_at=timezone.now() - timedelta(days=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_jobs', '--skip-archive', stdout=io.StringIO())
+        self.assertEqual(self.counts(self.facets(), 'location'), {'Nairobi': 2, 'Mombasa': 1})
+
+    def test_free_text_searches_are_not_cached(self):
+        self.facets('?search=faceted')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.facets('?search=faceted')['total'], 3)
+        self.assertTrue(queries)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        override = override_settings(
+            PROFILING_ENABLED=True, PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0,
+            PROFILING_SLOW_MS=0, PROFILING_SLOW_FOLLOWUPS=1, PROFILING_MAX_RECORDS=200,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.staff = _user('profiler@example.com', is_staff=True)
+        self.seeker = _user('profiled@example.com')
+        _job(_user('profiling@example.com', role='employer'), 'profiled')
+
+    def get(self, client, **headers):
+        # The middleware chain (and the slow-route state) is built per client
+        response = client.get('/api/jobs/', **headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_header_profiles_only_for_staff(self):
+        self.get(_client(self.seeker), HTTP_X_PROFILE='1')
+        self.assertEqual(list_records(), [])
+
+        self.get(_client(self.staff), HTTP_X_PROFILE='1')
+        [record] = list_records()
+        self.assertEqual((record['reason'], record['route'], record['has_profile']), ('header', 'job-list', True))
+        self.assertEqual(record['query_count'], len(record['queries']))
+        self.assertTrue(any('job_job' in query['sql'] for query in record['queries']))
+
+        out = io.StringIO()
+        call_command('profiles', 'show', 'latest', stdout=out)
+        self.assertIn('Top functions:', out.getvalue())
+        self.assertIn('Top queries by total time:', out.getvalue())
+
+    @override_settings(PROFILING_SLOW_MS=500)
+    def test_slow_request_arms_a_profile_of_the_next(self):
+        # Every clock reading is a second later, so each request takes over PROFILING_SLOW_MS
+        clock = SimpleNamespace(perf_counter=count().__next__, time=time.time, time_ns=time.time_ns)
+        client = _client(self.seeker)
+        with mock.patch('api.profiling.time', clock):
+            self.get(client)
+            self.get(client)
+        slow, followup = reversed(list_records())
+        self.assertEqual((slow['reason'], slow['has_profile']), ('slow', False))
+        self.assertEqual((followup['reason'], followup['has_profile']), ('slow-route', True))
+
+    def test_owed_profiles_are_handed_out_once_across_threads(self):
+        class YieldingDict(dict):
+            # Hand the GIL over mid read-modify-write, where an unguarded decrement races
+            def __getitem__(self, key):
+                time.sleep(0.0001)
+                return super().__getitem__(key)
+
+        middleware = ProfilingMiddleware(lambda request: HttpResponse())
+        middleware.armed = YieldingDict({'job-list': 50})
+        request = RequestFactory().get('/api/jobs/')
+        reasons = []
+
+        def take():
+            for _ in range(20):
+                reasons.append(middleware._reason(request, 'job-list', False))
+
+        threads = [threading.Thread(target=take) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        self.assertEqual(reasons.count('slow-route'), 50)
+        self.assertEqual(middleware.armed['job-list'], 0)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_MAX_RECORDS=2)
+    def test_records_are_a_ring_buffer(self):
+        client = _client(self.seeker)
+        for _ in range(3):
+            self.get(client)
+        self.assertEqual([record['reason'] for record in list_records()], ['sample', 'sample'])
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+
+        call_command('profiles', 'clear', stdout=io.StringIO())
+        self.assertEqual(os.listdir(self.directory), [])
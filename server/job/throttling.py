@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Per-process bucket table size; least recently seen clients are dropped first
+MAX_LOCAL_BUCKETS = 100_000
+
+
+def parse_rate(rate):
+    """'30/min' -> (capacity 30, refill 0.5 tokens/s); None disables the throttle"""
+    if rate is None:
+        return None
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / DURATIONS[period[0]]
+
+
+class LocalBucketStore:
+    """Token buckets in process memory: exact, but each worker counts separately"""
+
+    def __init__(self, max_buckets=MAX_LOCAL_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, now=None):
+        """Take one token; return 0 if allowed, else the seconds until one is available"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            wait = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / refill_rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Token buckets in the Django cache (Redis when REDIS_URL is set), shared by all workers.
+
+    Read-modify-write without a lock, so concurrent requests from one client
+    can occasionally both get the last token; fine for abuse protection.
+    """
+
+    def consume(self, key, capacity, refill_rate, now=None):
+        now = time.time() if now is None else now
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+        wait = 0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / refill_rate
+        # Expire once the bucket would have refilled anyway
+        cache.set(key, (tokens, now), timeout=int(capacity / refill_rate) + 1)
+        return wait
+
+    def clear(self):
+        pass
+
+
+local_store = LocalBucketStore()
+cache_store = CacheBucketStore()
+
+
+def get_store():
+    return cache_store if settings.THROTTLE_BACKEND == 'cache' else local_store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Per-client token bucket; the rate for `scope` comes from DEFAULT_THROTTLE_RATES.
+
+    Authenticated users are keyed by id, anonymous clients by IP, so a bucket
+    allows bursts up to the rate's count and refills smoothly over its period.
+    """
+    scope = None
+
+    def __init__(self):
+        self.rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(self.scope))
+        self.wait_seconds = None
+
+    def applies(self, request, view):
+        return True
+
+    def get_cache_key(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            ident = f'user:{user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'throttle:{self.scope}:{ident}'
+
+    def allow_request(self, request, view):
+        if self.rate is None or not self.applies(request, view):
+            return True
+        capacity, refill_rate = self.rate
+        self.wait_seconds = get_store().consume(self.get_cache_key(request), capacity, refill_rate)
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class JobSearchThrottle(TokenBucketThrottle):
+    """Free-text job search (?search=) scans title and description, so it is rationed"""
+    scope = 'job_search'
+
+    def applies(self, request, view):
+        return bool(request.GET.get('search'))
+
+
+class DirectoryThrottle(TokenBucketThrottle):
+    """Public seeker/employer directories return every active user"""
+    scope = 'directory'
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import RegisterView, LoginView, UserViewSet, JobViewSet, ProfileViewSet, SavedCandidateViewSet, ApplicationViewSet, ConversationViewSet
-from .views import SavedJobViewSet
+from .views import SavedJobViewSet, AutocompleteView, DirectoryViewSet
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
@@ -11,9 +11,11 @@ router.register(r'saved-candidates', SavedCandidateViewSet, basename='saved-cand
 router.register(r'applications', ApplicationViewSet, basename='application')
 router.register(r'conversations', ConversationViewSet, basename='conversation')
 router.register(r'saved-jobs', SavedJobViewSet, basename='saved-job')
+router.register(r'directory', DirectoryViewSet, basename='directory')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/login/', LoginView.as_view(), name='login'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
 ]
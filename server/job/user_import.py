@@ -0,0 +1,230 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+
+from .autocomplete import index as autocomplete_index
+from .models import Place, User, UserSkill
+
+
+# Columns accepted from an import file; anything else is ignored
+IMPORT_FIELDS = (
+    'email', 'username', 'name', 'role', 'password', 'phone', 'location', 'bio',
+    'skills', 'company', 'company_size', 'industry',
+)
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    return {'ndjson': 'jsonl', 'json': 'jsonl'}.get(extension, extension)
+
+
+def read_rows(stream, fmt):
+    """Yield (dict, None) or (None, error) per record of a CSV (with header) or JSON-lines stream"""
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield row, None
+        return
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield None, 'invalid JSON'
+            continue
+        yield (row, None) if isinstance(row, dict) else (None, 'not a JSON object')
+
+
+def text_stream(binary):
+    """Wrap an uploaded/opened binary file for read_rows without loading it into memory"""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def _init_worker():
+    # Spawned (non-fork) workers start without Django configured
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_passwords(passwords):
+    return [make_password(password or None) for password in passwords]
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.duplicates = []  # {'row', 'email', 'username', 'reason'}
+        self.errors = []  # {'row', 'error'}
+
+    def as_dict(self):
+        return {'created': self.created, 'duplicates': self.duplicates, 'errors': self.errors}
+
+
+class UserImporter:
+    """Bulk-create users (and their API tokens) from CSV/JSONL rows in batches.
+
+    Password hashing is the dominant cost, so each batch's passwords are hashed
+    across a process pool. Rows whose email or username already exists, in the
+    database or earlier in the same file, are skipped and reported.
+    """
+
+    def __init__(self, batch_size=1000, workers=None, dry_run=False):
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.dry_run = dry_run
+        self.result = ImportResult()
+        self._seen_emails = set()
+        self._seen_usernames = set()
+        self._next_suffix = {}  # derived base username -> next suffix to try
+        self._places = {}
+
+    def run(self, rows):
+        """Import read_rows() output; reported row numbers count records from 1"""
+        if self.workers == 1:
+            # Hash in this process: nothing to start, e.g. inside a web worker
+            self._map = map
+            return self._run(rows)
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            self._map = pool.map
+            return self._run(rows)
+
+    def _run(self, rows):
+        batch = []
+        for row_number, (row, error) in enumerate(rows, start=1):
+            if error:
+                self.result.errors.append({'row': row_number, 'error': error})
+                continue
+            batch.append((row_number, row))
+            if len(batch) == self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        return self.result
+
+    def _clean(self, row_number, row):
+        data = {field: row.get(field) for field in IMPORT_FIELDS if row.get(field) not in (None, '')}
+        email = (data.get('email') or '').strip()
+        if '@' not in email:
+            self.result.errors.append({'row': row_number, 'error': 'a valid email is required'})
+            return None
+        data['email'] = User.objects.normalize_email(email)
+        if data.get('role') not in ('seeker', 'employer'):
+            data['role'] = 'seeker'
+        skills = data.get('skills')
+        if isinstance(skills, str):
+            # CSV cells hold skills as "Python; Django" or "Python, Django"
+            separator = ';' if ';' in skills else ','
+            data['skills'] = [skill.strip() for skill in skills.split(separator) if skill.strip()]
+        elif not isinstance(skills, list):
+            data['skills'] = []
+        return data
+
+    def _duplicate(self, row_number, data, reason):
+        self.result.duplicates.append({
+            'row': row_number, 'email': data['email'], 'username': data.get('username'), 'reason': reason,
+        })
+
+    def _allocate_username(self, base):
+        """Next free base<suffix> for rows without a username, counting names taken earlier in the file"""
+        if base not in self._next_suffix:
+            candidate = User.objects.next_free_username(base)
+            self._next_suffix[base] = int(candidate[len(base):] or 0)
+        while True:
+            suffix = self._next_suffix[base]
+            self._next_suffix[base] = suffix + 1
+            username = f'{base}{suffix or ""}'
+            if username not in self._seen_usernames:
+                return username
+
+    def _import_batch(self, batch):
+        cleaned = [(row_number, data) for row_number, row in batch
+                   if (data := self._clean(row_number, row)) is not None]
+        emails = {data['email'] for _, data in cleaned}
+        usernames = {data['username'] for _, data in cleaned if data.get('username')}
+        existing_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        existing_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+        accepted = []
+        for row_number, data in cleaned:
+            if data['email'] in existing_emails:
+                self._duplicate(row_number, data, 'email already registered')
+            elif data['email'] in self._seen_emails:
+                self._duplicate(row_number, data, 'email repeated in file')
+            elif data.get('username') in existing_usernames:
+                self._duplicate(row_number, data, 'username already taken')
+            elif data.get('username') in self._seen_usernames:
+                self._duplicate(row_number, data, 'username repeated in file')
+            else:
+                if not data.get('username'):
+                    data['username'] = self._allocate_username(data['email'].split('@')[0][:140])
+                self._seen_emails.add(data['email'])
+                self._seen_usernames.add(data['username'])
+                accepted.append((row_number, data))
+        if self.dry_run:
+            self.result.created += len(accepted)  # would be created
+            return
+        if not accepted:
+            return
+
+        passwords = [data.pop('password', None) for _, data in accepted]
+        chunk = max(1, len(passwords) // (self.workers * 4))
+        hashed = [
+            password for part in self._map(
+                _hash_passwords, [passwords[i:i + chunk] for i in range(0, len(passwords), chunk)]
+            ) for password in part
+        ]
+
+        users = []
+        for (row_number, data), password in zip(accepted, hashed):
+            user = User(password=password, **data)
+            user.place = self._resolve_place(user.location)
+            users.append((row_number, user))
+        created = self._insert(users)
+
+        Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in created])
+        UserSkill.objects.sync_many(created)
+        for user in created:
+            # bulk_create skips the post_save handlers that keep the autocomplete index current
+            autocomplete_index.user_changed(None, (user.skills, user.location))
+        if created:
+            autocomplete_index.changed()
+        self.result.created += len(created)
+
+    def _resolve_place(self, location):
+        if not location:
+            return None
+        if location not in self._places:
+            self._places[location] = Place.objects.resolve(location)
+        return self._places[location]
+
+    def _insert(self, users):
+        """bulk_create the batch; if a concurrent signup claimed an email/username meanwhile,
+        fall back to row-by-row inserts and report the conflicting rows"""
+        try:
+            with transaction.atomic():
+                return User.objects.bulk_create([user for _, user in users])
+        except IntegrityError:
+            pass
+        created = []
+        for row_number, user in users:
+            try:
+                with transaction.atomic():
+                    user.pk = None
+                    User.objects.bulk_create([user])
+                created.append(user)
+            except IntegrityError:
+                self._duplicate(row_number, {'email': user.email, 'username': user.username},
+                                'registered concurrently')
+        return created
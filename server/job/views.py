@@ -1,21 +1,40 @@
-from django.shortcuts import render
 from django.contrib.auth import authenticate
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, F, FilteredRelation, OuterRef, Q, Subquery
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.authtoken.models import Token
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.decorators import action
-
-from .models import User, Job, Conversation, Message, SavedJob
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import CursorPagination
+from django.conf import settings
+from django.utils import timezone
+
+from .models import (
+    User, UserSkill, Job, JobCard, Conversation, Message, SavedJob, SavedCandidate, Place,
+    Application, ApplicationEvent, normalize_skill,
+)
+from .geo import DEFAULT_RADIUS_KM
+from .autocomplete import KINDS as AUTOCOMPLETE_KINDS, index as autocomplete_index
+from . import messaging, resumes
+from .coalesce import flights, request_key
+from .facets import facet_counts, parse_salary_band
+from .messaging import MessagingError
+from .throttling import DirectoryThrottle, JobSearchThrottle
+from .user_import import FORMATS as IMPORT_FORMATS, UserImporter, detect_format, read_rows, text_stream
 from .serializers import (
     RegisterSerializer, LoginSerializer, UserSerializer, ProfileSerializer,
-    JobSerializer, ConversationSerializer, ConversationDetailSerializer,
-    MessageSerializer, SendMessageSerializer, SavedJobSerializer
+    JobSerializer, JobCardSerializer, ConversationSerializer, ConversationDetailSerializer,
+    MessageSerializer, SendMessageSerializer, SavedJobSerializer,
+    DirectorySeekerSerializer, DirectoryEmployerSerializer,
+    CandidateSnapshotSerializer, SavedCandidateSerializer, SavedCandidateSnapshotSerializer, SavedJobSnapshotSerializer,
+    ApplicationSerializer, ApplicationStatusSerializer, ApplicationEventSerializer,
 )
 import logging
+from itertools import islice
 
 
 class RegisterView(APIView):
@@ -89,14 +108,199 @@ class LoginView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class AutocompleteView(APIView):
+    """Search-as-you-type suggestions for job titles, companies, locations and skills"""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        kind = request.query_params.get('kind', None)
+        if kind and kind not in AUTOCOMPLETE_KINDS:
+            return Response(
+                {'error': f"kind must be one of: {', '.join(AUTOCOMPLETE_KINDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+
+        autocomplete_index.ensure_current()
+        return Response({'query': query, 'results': autocomplete_index.search(query, kind=kind, limit=limit)})
+
+
+def filter_by_radius(queryset, params):
+    """Restrict a Job/User queryset to places within `radius` km of `near` or `lat`/`lon`"""
+    near = params.get('near', None)
+    lat = params.get('lat', None)
+    lon = params.get('lon', None)
+    if not near and not (lat and lon):
+        return queryset
+
+    try:
+        radius = float(params.get('radius', DEFAULT_RADIUS_KM))
+    except ValueError:
+        radius = DEFAULT_RADIUS_KM
+
+    if near:
+        origin = Place.objects.resolve(near)
+        if origin is None:
+            # Unknown place: fall back to a plain text match
+            return queryset.filter(location__icontains=near)
+        lat, lon = origin.latitude, origin.longitude
+    else:
+        try:
+            lat, lon = float(lat), float(lon)
+        except ValueError:
+            return queryset.none()
+
+    place_ids = [place.id for place, _ in Place.objects.within(lat, lon, radius)]
+    return queryset.filter(place_id__in=place_ids)
+
+
+def legacy_directory(queryset):
+    """The newest LEGACY_DIRECTORY_MAX_ROWS users of a deprecated unpaginated listing"""
+    return queryset.order_by('-id')[:settings.LEGACY_DIRECTORY_MAX_ROWS]
+
+
+def deprecated(response, successor):
+    """Flag a response from a deprecated endpoint and point clients at its replacement"""
+    response['Deprecation'] = 'true'
+    response['Link'] = f'<{successor}>; rel="successor-version"'
+    return response
+
+
+class VersionConflict(Exception):
+    def __init__(self, version):
+        self.version = version
+
+
+def if_match_versions(request):
+    """Versions named by the If-Match header ("3", W/"3"); None when absent or `*`"""
+    header = request.headers.get('If-Match', '').strip()
+    if not header or header == '*':
+        return None
+    versions = set()
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag.isdigit():
+            versions.add(int(tag))
+    return versions
+
+
+def lock_version(request, instance):
+    """Lock the instance's row, refresh its version and check it against If-Match.
+
+    Call inside transaction.atomic() before saving: concurrent edits of the row then
+    queue behind each other and a client holding an older version gets VersionConflict.
+    """
+    current = type(instance).objects.select_for_update().values_list('version', flat=True).get(pk=instance.pk)
+    versions = if_match_versions(request)
+    if versions is not None and current not in versions:
+        raise VersionConflict(current)
+    instance.version = current
+
+
+def with_etag(response, instance):
+    response['ETag'] = f'"{instance.version}"'
+    return response
+
+
+def version_conflict(exc):
+    response = Response(
+        {'error': 'This record was changed since you loaded it', 'version': exc.version},
+        status=status.HTTP_412_PRECONDITION_FAILED
+    )
+    response['ETag'] = f'"{exc.version}"'
+    return response
+
+
+def open_jobs(queryset):
+    """Restrict a Job/JobCard queryset to live postings (served by the partial open-jobs index)"""
+    return queryset.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()), status='open')
+
+
+def filter_jobs(queryset, params):
+    """Apply the job list query-string filters"""
+    # Filter by job type
+    job_type = params.get('type', None)
+    if job_type:
+        queryset = queryset.filter(type=job_type)
+    
+    # Filter by location
+    location = params.get('location', None)
+    if location:
+        queryset = queryset.filter(location__icontains=location)
+    
+    # Filter by company
+    company = params.get('company', None)
+    if company:
+        queryset = queryset.filter(company__icontains=company)
+
+    # Radius search, e.g. ?near=Nairobi&radius=25 or ?lat=-1.28&lon=36.82
+    queryset = filter_by_radius(queryset, params)
+    
+    # Search in title and description
+    search = params.get('search', None)
+    if search:
+        queryset = queryset.filter(
+            Q(title__icontains=search) |
+            Q(description__icontains=search)
+        )
+
+    # Salary range: jobs whose advertised range overlaps [salary_min, salary_max]
+    salary_min = params.get('salary_min', None)
+    if salary_min and salary_min.isdigit():
+        queryset = queryset.filter(salary_max__gte=int(salary_min))
+
+    salary_max = params.get('salary_max', None)
+    if salary_max and salary_max.isdigit():
+        queryset = queryset.filter(salary_min__lte=int(salary_max))
+
+    currency = params.get('currency', None)
+    if currency:
+        queryset = queryset.filter(salary_currency=currency.upper())
+
+    period = params.get('period', None)
+    if period:
+        queryset = queryset.filter(salary_period=period.lower())
+
+    # Salary band as listed by the facets, e.g. ?salary_band=50000-100000 or 250000+
+    band = params.get('salary_band', None)
+    if band:
+        bounds = parse_salary_band(band)
+        if bounds is None:
+            return queryset.none()
+        low, high = bounds
+        queryset = queryset.filter(salary_min__gte=low)
+        if high is not None:
+            queryset = queryset.filter(salary_min__lt=high)
+
+    # Show one posting per cluster of near-duplicates (the earliest)
+    if params.get('collapse_duplicates') in ('1', 'true'):
+        queryset = queryset.filter(duplicate_of_id__isnull=True)
+
+    # Sort by salary, e.g. ?ordering=-salary; jobs without a salary go last
+    ordering = params.get('ordering', None)
+    if ordering == 'salary':
+        queryset = queryset.order_by(F('salary_min').asc(nulls_last=True), '-posted_at')
+    elif ordering == '-salary':
+        queryset = queryset.order_by(F('salary_max').desc(nulls_last=True), '-posted_at')
+
+    return queryset
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     authentication_classes = [TokenAuthentication]
 
     def get_permissions(self):
-        if self.action in ['list', 'destroy']:
-            # Only admin can list all users or delete
+        if self.action in ['list', 'destroy', 'import_users']:
+            # Only admin can list all users, delete or bulk import
             return [IsAdminUser()]
         elif self.action in ['retrieve', 'update', 'partial_update']:
             return [IsAuthenticated()]
@@ -117,28 +321,75 @@ class UserViewSet(viewsets.ModelViewSet):
         user = request.user
         if request.method == 'GET':
             serializer = self.get_serializer(user)
-            return Response(serializer.data)
+            return with_etag(Response(serializer.data), user)
         
         partial = request.method == 'PATCH'
         serializer = self.get_serializer(user, data=request.data, partial=partial)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+            try:
+                with transaction.atomic():
+                    lock_version(request, user)
+                    serializer.save()
+            except VersionConflict as exc:
+                return version_conflict(exc)
+            return with_etag(Response(serializer.data), user)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=False, methods=['get'])
-    def seekers(self, request):
-        """Get all job seekers"""
-        seekers = User.objects.filter(role='seeker', is_active=True)
-        serializer = self.get_serializer(seekers, many=True)
-        return Response(serializer.data)
+    def update(self, request, *args, **kwargs):
+        try:
+            response = super().update(request, *args, **kwargs)
+        except VersionConflict as exc:
+            return version_conflict(exc)
+        response['ETag'] = f'"{response.data["version"]}"'
+        return response
 
-    @action(detail=False, methods=['get'])
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            lock_version(self.request, serializer.instance)
+            serializer.save()
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_users(self, request):
+        """Bulk-create users from a small uploaded CSV or JSONL `file` (admin only)"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get('format') or detect_format(upload.name)
+        if fmt not in IMPORT_FORMATS:
+            return Response(
+                {'error': f"format must be one of: {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+        # Hashing runs inside the request, so only small files are taken here
+        rows = list(islice(read_rows(text_stream(upload.file), fmt), settings.USER_IMPORT_MAX_ROWS + 1))
+        if len(rows) > settings.USER_IMPORT_MAX_ROWS:
+            return Response(
+                {'error': f'At most {settings.USER_IMPORT_MAX_ROWS} records per upload; '
+                          'import larger files with `manage.py import_users`'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        result = UserImporter(workers=1, dry_run=dry_run).run(rows)
+        return Response(result.as_dict(), status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], throttle_classes=[DirectoryThrottle])
+    def seekers(self, request):
+        """Newest job seekers, capped; deprecated for /api/directory/seekers/"""
+        query = resume_query(request)
+        def serialize():
+            seekers = resumes.search(User.objects.filter(role='seeker', is_active=True), query)
+            return self.get_serializer(legacy_directory(seekers), many=True).data
+        response = Response(flights.do(request_key('user-seekers', request), serialize))
+        return deprecated(response, '/api/directory/seekers/')
+
+    @action(detail=False, methods=['get'], throttle_classes=[DirectoryThrottle])
     def employers(self, request):
-        """Get all employers"""
-        employers = User.objects.filter(role='employer', is_active=True)
-        serializer = self.get_serializer(employers, many=True)
-        return Response(serializer.data)
+        """Newest employers, capped; deprecated for /api/directory/employers/"""
+        def serialize():
+            employers = User.objects.filter(role='employer', is_active=True)
+            return self.get_serializer(legacy_directory(employers), many=True).data
+        response = Response(flights.do(request_key('user-employers', request), serialize))
+        return deprecated(response, '/api/directory/employers/')
 
 
 class ProfileViewSet(viewsets.ViewSet):
@@ -160,14 +411,14 @@ class ProfileViewSet(viewsets.ViewSet):
     def list(self, request):
         """Get the current user's profile"""
         serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
+        return with_etag(Response(serializer.data), request.user)
 
     @action(detail=False, methods=['get', 'put', 'patch', 'delete'], url_path='me')
     def me(self, request):
         """Get or update the current user's profile"""
         if request.method == 'GET':
             serializer = self.get_serializer(request.user)
-            return Response(serializer.data)
+            return with_etag(Response(serializer.data), request.user)
 
         if request.method == 'DELETE':
             user = request.user
@@ -178,8 +429,13 @@ class ProfileViewSet(viewsets.ViewSet):
         partial = request.method == 'PATCH'
         serializer = self.get_serializer(request.user, data=request.data, partial=partial)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+            try:
+                with transaction.atomic():
+                    lock_version(request, request.user)
+                    serializer.save()
+            except VersionConflict as exc:
+                return version_conflict(exc)
+            return with_etag(Response(serializer.data), request.user)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['patch'], url_path='skills')
@@ -199,10 +455,15 @@ class ProfileViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        user.skills = skills
-        user.save()
+        try:
+            with transaction.atomic():
+                lock_version(request, user)
+                user.skills = skills
+                user.save(update_fields=['skills'])
+        except VersionConflict as exc:
+            return version_conflict(exc)
         serializer = self.get_serializer(user)
-        return Response(serializer.data)
+        return with_etag(Response(serializer.data), user)
 
     @action(detail=False, methods=['patch'], url_path='company')
     def update_company(self, request):
@@ -219,8 +480,13 @@ class ProfileViewSet(viewsets.ViewSet):
         
         serializer = self.get_serializer(user, data=update_data, partial=True)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+            try:
+                with transaction.atomic():
+                    lock_version(request, user)
+                    serializer.save()
+            except VersionConflict as exc:
+                return version_conflict(exc)
+            return with_etag(Response(serializer.data), user)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['post'], url_path='avatar')
@@ -251,25 +517,121 @@ class ProfileViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        user.avatar = avatar
-        user.save()
+        try:
+            with transaction.atomic():
+                lock_version(request, user)
+                user.avatar = avatar
+                user.save(update_fields=['avatar'])
+        except VersionConflict as exc:
+            return version_conflict(exc)
         serializer = self.get_serializer(user)
-        return Response(serializer.data)
+        return with_etag(Response(serializer.data), user)
     
 
+    @action(detail=False, methods=['get'], throttle_classes=[DirectoryThrottle])
+    def seekers(self, request):
+        """Newest job seekers, capped; deprecated for /api/directory/seekers/"""
+        query = resume_query(request)
+        def serialize():
+            seekers = resumes.search(User.objects.filter(role='seeker', is_active=True), query)
+            seekers = filter_by_radius(seekers, request.query_params)
+            return UserSerializer(legacy_directory(seekers), many=True).data
+        # Identical concurrent requests share one query and one serialization
+        response = Response(flights.do(request_key('profile-seekers', request), serialize))
+        return deprecated(response, '/api/directory/seekers/')
+
+    @action(detail=False, methods=['get'], throttle_classes=[DirectoryThrottle])
+    def employers(self, request):
+        """Newest employers, capped; deprecated for /api/directory/employers/"""
+        def serialize():
+            employers = User.objects.filter(role='employer', is_active=True)
+            return UserSerializer(legacy_directory(employers), many=True).data
+        response = Response(flights.do(request_key('profile-employers', request), serialize))
+        return deprecated(response, '/api/directory/employers/')
+
+
+class DirectoryPagination(CursorPagination):
+    """Keyset pages over the (role, -id) index: constant cost at any depth, bounded size"""
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+MAX_DIRECTORY_SKILLS = 10
+
+
+def resume_query(request):
+    """The ?resume= search terms, which only employers and staff may use"""
+    query = request.query_params.get('resume', None)
+    if query and not (request.user.is_authenticated and (request.user.role == 'employer' or request.user.is_staff)):
+        # Checked before coalescing so an anonymous request never shares an employer's result
+        raise PermissionDenied('Only employers can search resume contents')
+    return query
+
+
+def filter_directory(queryset, params):
+    """Apply the public directory filters: industry, company_size, skills, location/radius"""
+    industry = params.get('industry', None)
+    if industry:
+        queryset = queryset.filter(industry=industry)
+
+    company_size = params.get('company_size', None)
+    if company_size:
+        queryset = queryset.filter(company_size=company_size)
+
+    # ?skills=python,django matches users having all of them
+    skills = params.get('skills', None)
+    if skills:
+        names = {normalize_skill(skill) for skill in skills.split(',') if skill.strip()}
+        names = sorted(names)[:MAX_DIRECTORY_SKILLS]
+        if names:
+            matching = (
+                UserSkill.objects.filter(name__in=names).values('user_id')
+                .annotate(matched=Count('name')).filter(matched=len(names)).values('user_id')
+            )
+            queryset = queryset.filter(pk__in=matching)
+
+    location = params.get('location', None)
+    if location:
+        place = Place.objects.resolve(location)
+        if place is not None:
+            queryset = queryset.filter(place=place)
+        else:
+            queryset = queryset.filter(location__icontains=location)
+
+    return filter_by_radius(queryset, params)
+
+
+class DirectoryViewSet(viewsets.GenericViewSet):
+    """Public, paginated seeker/employer listings with a compact projection"""
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [AllowAny]
+    throttle_classes = [DirectoryThrottle]
+    pagination_class = DirectoryPagination
+    queryset = User.objects.filter(is_active=True)
+
+    def _list(self, role, serializer_class, resume=None):
+        queryset = self.get_queryset().filter(role=role).only(*serializer_class.Meta.fields)
+        queryset = resumes.search(filter_directory(queryset, self.request.query_params), resume)
+        page = self.paginate_queryset(queryset)
+        serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=False, methods=['get'])
     def seekers(self, request):
-        """Get all job seekers"""
-        seekers = User.objects.filter(role='seeker', is_active=True)
-        serializer = UserSerializer(seekers, many=True)
-        return Response(serializer.data)
+        """Active job seekers: id, name, location, skills, avatar; employers may add ?resume=terms"""
+        return self._list('seeker', DirectorySeekerSerializer, resume=resume_query(request))
 
     @action(detail=False, methods=['get'])
     def employers(self, request):
-        """Get all employers"""
-        employers = User.objects.filter(role='employer', is_active=True)
-        serializer = UserSerializer(employers, many=True)
-        return Response(serializer.data)
+        """Active employers: id, name, company, industry, company size, location, avatar"""
+        return self._list('employer', DirectoryEmployerSerializer)
+
+
+class DuplicateJob(Exception):
+    def __init__(self, job_id):
+        self.job_id = job_id
 
 
 class JobViewSet(viewsets.ModelViewSet):
@@ -278,62 +640,80 @@ class JobViewSet(viewsets.ModelViewSet):
     authentication_classes = [TokenAuthentication]
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'search', 'by_employer']:
+        if self.action in ['list', 'retrieve', 'search', 'by_employer', 'facets']:
             return [AllowAny()]
         elif self.action in ['create']:
             # Only employers can create jobs
             return [IsAuthenticated()]
+        elif self.action in ['recommended', 'application_stats']:
+            return [IsAuthenticated()]
         elif self.action in ['update', 'partial_update', 'destroy']:
             # Only the job owner can update/delete
             return [IsAuthenticated()]
         return [AllowAny()]
 
+    def get_throttles(self):
+        if self.action in ['list', 'facets']:
+            return [JobSearchThrottle()]
+        return super().get_throttles()
+
     def get_queryset(self):
-        queryset = Job.objects.all()
-        
-        # Filter by job type
-        job_type = self.request.query_params.get('type', None)
-        if job_type:
-            queryset = queryset.filter(type=job_type)
-        
-        # Filter by location
-        location = self.request.query_params.get('location', None)
-        if location:
-            queryset = queryset.filter(location__icontains=location)
-        
-        # Filter by company
-        company = self.request.query_params.get('company', None)
-        if company:
-            queryset = queryset.filter(company__icontains=company)
-        
-        # Search in title and description
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search)
+        return filter_jobs(Job.objects.select_related('posted_by'), self.request.query_params)
+
+    def list(self, request):
+        # List views read the denormalized cards: one table, no join to User
+        def serialize():
+            cards = filter_jobs(open_jobs(JobCard.objects.all()), request.query_params)
+            return JobCardSerializer(cards, many=True, context={'request': request}).data
+        return Response(flights.do(request_key('job-list', request), serialize))
+
+    def create(self, request, *args, **kwargs):
+        try:
+            return super().create(request, *args, **kwargs)
+        except DuplicateJob as exc:
+            return Response(
+                {'error': 'This job duplicates an existing posting', 'duplicate_of': exc.job_id},
+                status=status.HTTP_409_CONFLICT
             )
-        
-        return queryset
 
     def perform_create(self, serializer):
         # Ensure only employers can create jobs
         if self.request.user.role != 'employer':
-            from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied('Only employers can post jobs')
-        serializer.save(posted_by=self.request.user)
+        from .dedup import find_duplicate, signature
+
+        data = serializer.validated_data
+        duplicate = find_duplicate(
+            signature(data.get('title'), data.get('description'), data.get('requirements')), self.request.user.pk
+        )
+        if duplicate and settings.JOB_DUPLICATE_POLICY == 'reject':
+            raise DuplicateJob(duplicate[0])
+        serializer.save(posted_by=self.request.user, duplicate_of_id=duplicate[0] if duplicate else None)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        response['ETag'] = f'"{response.data["version"]}"'
+        return response
+
+    def update(self, request, *args, **kwargs):
+        try:
+            response = super().update(request, *args, **kwargs)
+        except VersionConflict as exc:
+            return version_conflict(exc)
+        response['ETag'] = f'"{response.data["version"]}"'
+        return response
 
     def perform_update(self, serializer):
         # Ensure only the job owner can update
         if serializer.instance.posted_by != self.request.user:
-            from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied('You can only update your own jobs')
-        serializer.save()
+        with transaction.atomic():
+            lock_version(self.request, serializer.instance)
+            serializer.save()
 
     def perform_destroy(self, instance):
         # Ensure only the job owner can delete
         if instance.posted_by != self.request.user:
-            from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied('You can only delete your own jobs')
         instance.delete()
 
@@ -342,30 +722,145 @@ class JobViewSet(viewsets.ModelViewSet):
         """Get jobs posted by the current employer"""
         if not request.user.is_authenticated:
             return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
-        jobs = Job.objects.filter(posted_by=request.user)
+        jobs = Job.objects.filter(posted_by=request.user).select_related('posted_by')
         serializer = self.get_serializer(jobs, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='application-stats')
+    def application_stats(self, request, pk=None):
+        """Get the number of applications per status for one of the employer's jobs"""
+        job = Job.objects.filter(pk=pk).only('posted_by_id', *Job.COUNTER_FIELDS).first()
+        if job is None:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        if job.posted_by_id != request.user.id:
+            return Response({'error': 'You can only view stats for your own jobs'}, status=status.HTTP_403_FORBIDDEN)
+        return Response({'job_id': job.id, 'total': sum(job.status_counts().values()), **job.status_counts()})
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Counts by type, location, company and salary band for the list filters (?facet_limit=)"""
+        try:
+            limit = min(max(int(request.query_params.get('facet_limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+
+        def search(params):
+            return filter_jobs(open_jobs(JobCard.objects.all()), params)
+
+        def compute():
+            return facet_counts(search, request.query_params, limit)
+        return Response(flights.do(request_key('job-facets', request), compute))
+
     @action(detail=False, methods=['get'])
     def by_employer(self, request):
         """Get jobs by a specific employer"""
         employer_id = request.query_params.get('employer_id', None)
         if not employer_id:
             return Response({'error': 'employer_id is required'}, status=status.HTTP_400_BAD_REQUEST)
-        jobs = Job.objects.filter(posted_by_id=employer_id)
-        serializer = self.get_serializer(jobs, many=True)
+        cards = open_jobs(JobCard.objects.filter(employer_id=employer_id))
+        serializer = JobCardSerializer(cards, many=True, context={'request': request})
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Get recent jobs (last 10)"""
-        jobs = Job.objects.all()[:10]
-        serializer = self.get_serializer(jobs, many=True)
+        cards = open_jobs(JobCard.objects.all())[:10]
+        serializer = JobCardSerializer(cards, many=True, context={'request': request})
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def recommended(self, request):
+        """Get jobs ranked for the current seeker's profile (?limit=, ?type=, ?location=, ?radius=)"""
+        from .recommender import embed_seeker, index as recommender_index
+
+        user = request.user
+        if user.role != 'seeker':
+            return Response({'error': 'Only job seekers get job recommendations'}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            limit = 20
+
+        place_ids = None
+        location = request.query_params.get('location', None)
+        if location:
+            place = Place.objects.resolve(location)
+            if place is None:
+                return Response([])
+            radius = request.query_params.get('radius', None)
+            if radius:
+                try:
+                    place_ids = [p.id for p, _ in Place.objects.within(place.latitude, place.longitude, float(radius))]
+                except ValueError:
+                    place_ids = [place.id]
+            else:
+                place_ids = [place.id]
+
+        applied = set(Application.objects.filter(seeker=user).values_list('job_id', flat=True))
+
+        recommender_index.ensure_current()
+        vector = embed_seeker(user)
+        # The index drops closed jobs as they change, but expiry happens in bulk elsewhere:
+        # over-fetch, keep the open jobs and forget the rest, until `limit` are left
+        fetch = limit * 2
+        while True:
+            ranked = recommender_index.query(
+                vector, limit=fetch,
+                job_type=request.query_params.get('type', None),
+                place_ids=place_ids, exclude_ids=applied,
+            )
+            jobs = open_jobs(Job.objects.select_related('posted_by')).in_bulk([job_id for job_id, _ in ranked])
+            for job_id, _ in ranked:
+                if job_id not in jobs:
+                    recommender_index.remove(job_id)
+            if len(jobs) >= limit or len(ranked) < fetch:
+                break
+            fetch *= 4
+
+        results = []
+        for job_id, similarity in ranked:
+            if job_id in jobs and len(results) < limit:
+                data = self.get_serializer(jobs[job_id]).data
+                data['match_score'] = max(0, round(similarity * 100))
+                results.append(data)
+        return Response(results)
+
+
+# ?view= of the saved-job and saved-candidate lists: 'full' nests the complete job/user as
+# before; 'snapshot' nests a compact one batch-loaded in one query; 'ids' is only the
+# count and the saved job/candidate ids, for rendering saved badges
+SAVED_VIEWS = ('full', 'snapshot', 'ids')
+# JobCard columns JobSnapshotSerializer reads
+JOB_SNAPSHOT_COLUMNS = (
+    'title', 'company', 'location', 'type', 'salary', 'employer', 'employer_name', 'employer_email',
+    'employer_company', 'employer_avatar_url', 'posted_at', 'status', 'expires_at', 'applicant_count',
+)
 
-from .models import SavedCandidate
-from .serializers import SavedCandidateSerializer
+
+def saved_list(request, queryset, related_field, serializer_class, snapshots):
+    """Response for a saved-items list in the ?view= the client asked for, or None for 'full'.
+
+    `snapshots(ids)` batch-loads the related rows ({id: row}) for the snapshot view.
+    """
+    view = request.query_params.get('view', 'full')
+    if view not in SAVED_VIEWS:
+        return Response(
+            {'error': f"view must be one of: {', '.join(SAVED_VIEWS)}"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if view == 'full':
+        return None
+    queryset = queryset.select_related(None)
+    if view == 'ids':
+        ids = list(queryset.values_list(related_field, flat=True))
+        return Response({'count': len(ids), 'ids': ids})
+    saved = list(queryset)
+    related = snapshots({getattr(row, related_field) for row in saved})
+    context = {'request': request}
+    context['snapshots'] = {
+        data['id']: data for data in serializer_class.snapshot_serializer(related.values(), many=True, context=context).data
+    }
+    return Response(serializer_class(saved, many=True, context=context).data)
 
 
 class SavedCandidateViewSet(viewsets.ModelViewSet):
@@ -376,7 +871,14 @@ class SavedCandidateViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # Only return saved candidates for the authenticated employer
-        return SavedCandidate.objects.filter(employer=self.request.user)
+        return SavedCandidate.objects.filter(employer=self.request.user).select_related('candidate')
+
+    def list(self, request, *args, **kwargs):
+        """Saved candidates, newest first; ?view=snapshot or ?view=ids for lighter responses"""
+        def snapshots(ids):
+            return User.objects.only(*CandidateSnapshotSerializer.Meta.fields).in_bulk(ids)
+        response = saved_list(request, self.get_queryset(), 'candidate_id', SavedCandidateSnapshotSerializer, snapshots)
+        return response or super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         serializer.save()
@@ -403,19 +905,37 @@ class SavedCandidateViewSet(viewsets.ModelViewSet):
         try:
             saved = SavedCandidate.objects.get(employer=request.user, candidate_id=candidate_id)
             saved.notes = request.data.get('notes', '')
-            saved.save()
+            saved.save(update_fields=['notes'])
             serializer = self.get_serializer(saved)
             return Response(serializer.data)
         except SavedCandidate.DoesNotExist:
             return Response({'error': 'Saved candidate not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-from .models import Application
-from .serializers import ApplicationSerializer, ApplicationStatusSerializer
-
-
-class ApplicationViewSet(viewsets.ModelViewSet):
-    """ViewSet for managing job applications"""
+def with_match_scores(applications, ordering=None):
+    """Annotate applications with their stored match score; ?ordering=-match_score sorts on it.
+
+    The score comes from a LEFT JOIN to the (job, seeker) MatchScore row rather than a
+    correlated subquery, so the sort is on a joined column and, for one job's or one
+    seeker's applications, can be read in order from matchscore_job_score_idx or
+    matchscore_seeker_score_idx. Also joins the job, its poster and the seeker, which
+    ApplicationSerializer nests.
+    """
+    applications = applications.select_related('job__posted_by', 'seeker').annotate(
+        match=FilteredRelation('job__match_scores', condition=Q(job__match_scores__seeker=F('seeker'))),
+        match_score=F('match__score'),
+    )
+    if ordering == 'match_score':
+        applications = applications.order_by(F('match_score').asc(nulls_last=True), '-applied_at')
+    elif ordering == '-match_score':
+        applications = applications.order_by(F('match_score').desc(nulls_last=True), '-applied_at')
+    return applications
+
+
+class ApplicationViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                         mixins.ListModelMixin, viewsets.GenericViewSet):
+    """ViewSet for managing job applications. There is no PUT/PATCH: the status only
+    changes through the status action, which checks the employer and the transition."""
     serializer_class = ApplicationSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
@@ -424,11 +944,13 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.role == 'seeker':
             # Seekers can only see their own applications
-            return Application.objects.filter(seeker=user)
+            queryset = Application.objects.filter(seeker=user)
         elif user.role == 'employer':
             # Employers can see applications for their jobs
-            return Application.objects.filter(job__posted_by=user)
-        return Application.objects.none()
+            queryset = Application.objects.filter(job__posted_by=user)
+        else:
+            return Application.objects.none()
+        return with_match_scores(queryset, self.request.query_params.get('ordering'))
 
     def get_serializer_class(self):
         if self.action == 'update_status':
@@ -440,7 +962,9 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         """Get all applications for the current seeker"""
         if request.user.role != 'seeker':
             return Response({'error': 'Only seekers can view their applications'}, status=status.HTTP_403_FORBIDDEN)
-        applications = Application.objects.filter(seeker=request.user)
+        applications = with_match_scores(
+            Application.objects.filter(seeker=request.user), request.query_params.get('ordering')
+        )
         serializer = self.get_serializer(applications, many=True)
         return Response(serializer.data)
 
@@ -449,9 +973,11 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         """Get all applications for a specific job (employer only)"""
         try:
             job = Job.objects.get(id=job_id)
-            if job.posted_by != request.user:
+            if job.posted_by_id != request.user.id:
                 return Response({'error': 'You can only view applications for your own jobs'}, status=status.HTTP_403_FORBIDDEN)
-            applications = Application.objects.filter(job=job)
+            applications = with_match_scores(
+                Application.objects.filter(job=job), request.query_params.get('ordering')
+            )
             serializer = self.get_serializer(applications, many=True)
             return Response(serializer.data)
         except Job.DoesNotExist:
@@ -467,12 +993,28 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             
             serializer = ApplicationStatusSerializer(application, data=request.data, partial=True)
             if serializer.is_valid():
-                serializer.save()
+                serializer.save(changed_by=request.user)
                 return Response(ApplicationSerializer(application).data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Application.DoesNotExist:
             return Response({'error': 'Application not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Get the application's status changes, oldest first"""
+        application = self.get_object()
+        serializer = ApplicationEventSerializer(application.events.all(), many=True)
+        return Response(serializer.data)
+
+    def log_removal(self, application, reason):
+        """Delete the application, closing its history; counters follow via post_delete"""
+        with transaction.atomic():
+            ApplicationEvent.objects.create(
+                application=application, job_id=application.job_id, seeker_id=application.seeker_id,
+                actor=self.request.user, from_status=application.status, to_status=reason,
+            )
+            application.delete()
+
     @action(detail=False, methods=['get'], url_path='check/(?P<job_id>[^/.]+)')
     def check_applied(self, request, job_id=None):
         """Check if current user has applied to a job"""
@@ -487,12 +1029,12 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             
             # Seeker can delete their own applications
             if user.role == 'seeker' and application.seeker == user:
-                application.delete()
+                self.log_removal(application, 'withdrawn')
                 return Response(status=status.HTTP_204_NO_CONTENT)
             
             # Employer can delete applications for their jobs
             if user.role == 'employer' and application.job.posted_by == user:
-                application.delete()
+                self.log_removal(application, 'deleted')
                 return Response(status=status.HTTP_204_NO_CONTENT)
             
             return Response({'error': 'You do not have permission to delete this application'}, status=status.HTTP_403_FORBIDDEN)
@@ -500,6 +1042,31 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Application not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+def with_conversation_summary(conversations, user):
+    """Annotate last-message fields and the user's unread count so listing conversations is one query"""
+    last = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at')
+    return conversations.select_related('employer', 'seeker').annotate(
+        last_message_content=Subquery(last.values('content')[:1]),
+        last_message_created_at=Subquery(last.values('created_at')[:1]),
+        last_message_sender_id=Subquery(last.values('sender_id')[:1]),
+        unread_messages=Count('messages', filter=Q(messages__is_read=False) & ~Q(messages__sender=user)),
+    )
+
+
+def unread_messages_for(user):
+    """Messages sent to the user that they have not read yet, across all their conversations"""
+    return Message.objects.filter(
+        Q(conversation__employer=user) | Q(conversation__seeker=user),
+        is_read=False,
+    ).exclude(sender=user)
+
+
+def messaging_error(exc):
+    if exc.field:
+        return Response({exc.field: [exc.error]}, status=exc.status)
+    return Response({'error': exc.error}, status=exc.status)
+
+
 class ConversationViewSet(viewsets.ModelViewSet):
     """ViewSet for managing conversations and messages"""
     serializer_class = ConversationSerializer
@@ -509,9 +1076,12 @@ class ConversationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         # Return conversations where user is either employer or seeker
-        return Conversation.objects.filter(
+        conversations = Conversation.objects.filter(
             Q(employer=user) | Q(seeker=user)
         ).order_by('-updated_at')
+        if self.action == 'list':
+            conversations = with_conversation_summary(conversations, user)
+        return conversations
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -536,70 +1106,33 @@ class ConversationViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        recipient_id = serializer.validated_data['recipient_id']
-        content = serializer.validated_data['content']
-        sender = request.user
-
         try:
-            recipient = User.objects.get(id=recipient_id, is_active=True)
-        except User.DoesNotExist:
-            return Response({'error': 'Recipient not found'}, status=status.HTTP_404_NOT_FOUND)
-
-        # Determine employer and seeker based on roles
-        if sender.role == 'employer' and recipient.role == 'seeker':
-            employer = sender
-            seeker = recipient
-        elif sender.role == 'seeker' and recipient.role == 'employer':
-            employer = recipient
-            seeker = sender
-        else:
-            return Response({'error': 'Messages can only be sent between employers and seekers'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
-
-        # Get or create conversation
-        conversation, created = Conversation.objects.get_or_create(
-            employer=employer,
-            seeker=seeker
-        )
-
-        # Create the message
-        message = Message.objects.create(
-            conversation=conversation,
-            sender=sender,
-            content=content
-        )
-
-        # Update conversation timestamp
-        conversation.save()  # This updates updated_at
+            message, conversation_id = messaging.send(
+                request.user, serializer.validated_data['recipient_id'], serializer.validated_data['content']
+            )
+        except MessagingError as exc:
+            return messaging_error(exc)
 
         # Return the message with conversation info
         message_data = MessageSerializer(message, context={'request': request}).data
         return Response({
             'message': message_data,
-            'conversation_id': conversation.id
+            'conversation_id': conversation_id
         }, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'], url_path='reply')
     def reply(self, request, pk=None):
         """Reply to an existing conversation"""
-        try:
-            conversation = self.get_queryset().get(pk=pk)
-        except Conversation.DoesNotExist:
-            return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
-
         content = request.data.get('content', '').strip()
         if not content:
             return Response({'error': 'Message content is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Create the message
-        message = Message.objects.create(
-            conversation=conversation,
-            sender=request.user,
-            content=content
-        )
-
-        # Update conversation timestamp
-        conversation.save()
+        try:
+            message = messaging.reply(request.user, int(pk), content)
+        except ValueError:
+            return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+        except MessagingError as exc:
+            return messaging_error(exc)
 
         message_data = MessageSerializer(message, context={'request': request}).data
         return Response(message_data, status=status.HTTP_201_CREATED)
@@ -655,13 +1188,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='unread-count')
     def unread_count(self, request):
         """Get total unread message count for the user"""
-        user = request.user
-        conversations = Conversation.objects.filter(Q(employer=user) | Q(seeker=user))
-        total_unread = sum(
-            conv.messages.filter(is_read=False).exclude(sender=user).count()
-            for conv in conversations
-        )
-        return Response({'unread_count': total_unread})
+        return Response({'unread_count': unread_messages_for(request.user).count()})
 
 
 class SavedJobViewSet(viewsets.ViewSet):
@@ -672,8 +1199,13 @@ class SavedJobViewSet(viewsets.ViewSet):
         return [IsAuthenticated()]
 
     def list(self, request):
-        user = request.user
-        saved = SavedJob.objects.filter(seeker=user)
+        """Saved jobs, newest first; ?view=snapshot or ?view=ids for lighter responses"""
+        def snapshots(ids):
+            return JobCard.objects.only(*JOB_SNAPSHOT_COLUMNS).in_bulk(ids)
+        saved = SavedJob.objects.filter(seeker=request.user).select_related('job__posted_by')
+        response = saved_list(request, saved, 'job_id', SavedJobSnapshotSerializer, snapshots)
+        if response is not None:
+            return response
         serializer = SavedJobSerializer(saved, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -0,0 +1,110 @@
+"""Warm a worker before it takes traffic.
+
+api.wsgi and api.asgi call warm() at import when WARMUP_ON_START is set, so the cost
+of the first request (connecting to the databases, importing every view, building the
+in-process autocomplete and recommender indexes) is paid while the worker boots. Each
+step is safe to repeat; one that fails is logged and the worker still starts, the work
+is then done lazily by the first request that needs it, as without warmup.
+
+Under ASGI the import happens on the server's event loop, so the steps run in a
+throwaway thread. Django's database connections belong to the thread that opened them
+and requests are served from other threads, so there the database step is skipped and
+the connections the other steps opened are closed: only the process-wide work (views,
+storage, indexes) carries over to requests.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def warm_database():
+    """Open the persistent connection to the primary and each replica"""
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+def warm_urls():
+    """Import every view (and its serializers) and build the reverse lookup tables"""
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+
+
+def warm_storage():
+    """Import the DEFAULT_FILE_STORAGE backend, e.g. the cloudinary SDK"""
+    default_storage._setup()
+
+
+def warm_autocomplete():
+    from .autocomplete import index
+
+    index.ensure_built()
+
+
+def warm_recommender():
+    from .recommender import index
+
+    index.ensure_built()
+
+
+STEPS = {
+    'database': warm_database,
+    'urls': warm_urls,
+    'storage': warm_storage,
+    'autocomplete': warm_autocomplete,
+    'recommender': warm_recommender,
+}
+
+
+def _run(steps):
+    timings = {}
+    for name in steps:
+        started = time.perf_counter()
+        try:
+            STEPS[name]()
+        except Exception:
+            logger.exception('Warmup step %s failed', name)
+            timings[name] = None
+        else:
+            timings[name] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def _run_in_thread(steps):
+    try:
+        return _run(steps)
+    finally:
+        connections.close_all()
+
+
+def warm(steps=None):
+    """Run the named steps (default WARMUP_STEPS) in order; {step: milliseconds, None if it failed}"""
+    steps = list(settings.WARMUP_STEPS if steps is None else steps)
+    unknown = [name for name in steps if name not in STEPS]
+    if unknown:
+        raise ImproperlyConfigured(f"Unknown warmup steps {', '.join(unknown)}; choose from {', '.join(STEPS)}")
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        timings = _run(steps)
+    else:
+        # ASGI servers import the application inside their event loop, where the ORM refuses to
+        # run; a connection opened in the thread used instead would serve no request
+        if 'database' in steps:
+            steps.remove('database')
+            logger.info('Warmup: skipping database under an event loop')
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            timings = executor.submit(_run_in_thread, steps).result()
+    logger.info('Warmup: %s', ', '.join(
+        f'{name} {ms:.0f} ms' if ms is not None else f'{name} failed' for name, ms in timings.items()
+    ))
+    return timings